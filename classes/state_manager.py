@@ -1,5 +1,7 @@
-from pydantic import BaseModel, Field, validate_call
-from typing import Optional, Union
+from pydantic import BaseModel, Field, PrivateAttr, validate_call
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Literal, Optional, Union
 import pandas as pd
 import numpy as np
 
@@ -11,10 +13,282 @@ import sys
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
-from functions.calc_funcs import calculate_amortization_schedule  # noqa: E402
+from functions.allocation_funcs import (  # noqa: E402
+    SHARED_COSTS,
+    allocate_costs,
+    allocation_matrix,
+    two_owner_shares,
+)
+from functions.calc_funcs import (  # noqa: E402
+    LOAN_TYPES,
+    calculate_amortization_schedules_batched,
+    expand_scenario_frame,
+    scenario_column,
+)
 
+# Grid units of the scenario index, the house price slider step and basis points
+HOUSE_PRICE_STEP = 100_000
+BASIS_POINTS_PER_UNIT = 10_000
 
-class ScenarioState(BaseModel):
+# Number of amortization schedules kept per ScenarioState
+SCHEDULE_CACHE_SIZE = 32
+
+
+class _ScenarioStateMethods:
+    """
+    Methods shared by ScenarioState and LightScenarioState.
+    """
+
+    __slots__ = ()
+
+    def set_results(self, df: pd.DataFrame, house_price_step: int = HOUSE_PRICE_STEP):
+        """
+        Stores new scenario results and indexes them by grid coordinates.
+
+        Rows are keyed on the house price in steps, the interest rate in basis points
+        and the position of the loan type in LOAN_TYPES, so lookups do not depend on
+        how the rates were rounded. Frames without a loan type hold annuity loans. The results
+        are validated here, once per calculation, so that the per-rerun methods can
+        skip validation.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            a full or compact scenario frame
+        house_price_step : int
+            the step between the house prices in df
+
+        Raises
+        ------
+        ValueError
+            if the step or the values in df are out of range
+        """
+        house_prices = scenario_column(df, "house_price")
+        interest_rates = scenario_column(df, "interest_rate")
+
+        ownership_fraq = scenario_column(df, "ownership_fraq")
+        try:
+            loan_types = scenario_column(df, "loan_type")
+        except KeyError:
+            loan_types = np.full(len(df), "annuity")
+        loan_type_codes = pd.Categorical(loan_types, categories=LOAN_TYPES).codes
+
+        if house_price_step <= 0:
+            raise ValueError("house_price_step must be positive")
+        if len(df) > 0:
+            if house_prices.min() < 0:
+                raise ValueError("House prices must be non-negative")
+            if interest_rates.min() < 0 or interest_rates.max() > 1:
+                raise ValueError("Interest rates must be between 0 and 1")
+            if ownership_fraq.min() < 0 or ownership_fraq.max() > 1:
+                raise ValueError("Ownership fractions must be between 0 and 1")
+            if loan_type_codes.min() < 0:
+                raise ValueError(f"Loan types must be one of {LOAN_TYPES}")
+
+        self.df = df
+        self.house_price_step = house_price_step
+        self.house_prices = np.unique(house_prices)
+        self.interest_rates = np.unique(interest_rates)
+        self.loan_types = tuple(LOAN_TYPES[code] for code in np.unique(loan_type_codes))
+
+        coordinates = np.column_stack(
+            (
+                np.rint(house_prices / house_price_step),
+                np.rint(interest_rates * BASIS_POINTS_PER_UNIT),
+                loan_type_codes,
+            )
+        ).astype(np.int64)
+        keys, first_rows = np.unique(coordinates, axis=0, return_index=True)
+        self.scenario_index = dict(zip(map(tuple, keys.tolist()), first_rows.tolist()))
+
+    def grid_key(
+        self, house_price: float|int, interest_rate: float|int, loan_type: str = "annuity"
+    ) -> tuple[int, int, int]:
+        """
+        Returns the integer grid coordinates of a house price, interest rate and loan type.
+        """
+        return (
+            int(round(house_price / self.house_price_step)),
+            int(round(interest_rate * BASIS_POINTS_PER_UNIT)),
+            LOAN_TYPES.index(loan_type),
+        )
+
+    def select(
+        self, house_price: float|int, interest_rate: float|int, loan_type: str = "annuity"
+    ) -> pd.DataFrame:
+        """
+        Returns the scenario row for a house price, interest rate and loan type.
+
+        Parameters
+        ----------
+        house_price : float
+            the price of the house
+        interest_rate : float
+            the interest rate as a decimal
+        loan_type : str
+            one of LOAN_TYPES
+
+        Returns
+        -------
+        pd.DataFrame
+            a one-row frame with all scenario columns
+
+        Raises
+        ------
+        KeyError
+            if the combination is not part of the stored results
+        """
+        if self.scenario_index is None:
+            raise KeyError("No scenario results have been stored")
+
+        row = self.scenario_index[self.grid_key(house_price, interest_rate, loan_type)]
+        return expand_scenario_frame(self.df.iloc[[row]])
+
+    def schedules(
+        self,
+        loan_amounts: list[float|int],
+        interest_rate: float|int,
+        ammortisation_periods: int,
+        loan_type: str = "annuity",
+    ) -> list[pd.DataFrame]:
+        """
+        Returns the amortization schedules of loans, using the schedule cache.
+
+        Schedules are cached on (loan, rate, term, loan type) and the least recently used
+        schedule is dropped once the cache holds SCHEDULE_CACHE_SIZE schedules. The
+        loans that are not cached are calculated together in one batched pass.
+
+        Parameters
+        ----------
+        loan_amounts : list[float]
+            the loan amounts
+        interest_rate : float
+            the annual interest rate as a decimal
+        ammortisation_periods : int
+            the number of periods over which the loans are amortized
+        loan_type : str
+            one of LOAN_TYPES
+
+        Returns
+        -------
+        list[pd.DataFrame]
+            the amortization schedule of each loan, which must not be modified
+        """
+        keys = [
+            (float(loan), float(interest_rate), int(ammortisation_periods), loan_type)
+            for loan in loan_amounts
+        ]
+        missing = list(dict.fromkeys(key for key in keys if key not in self._schedule_cache))
+
+        if missing:
+            batch = calculate_amortization_schedules_batched(
+                np.array([key[0] for key in missing]),
+                interest_rate,
+                int(ammortisation_periods),
+                loan_type,
+            )
+            for i, key in enumerate(missing):
+                self._schedule_cache[key] = batch.to_frame(i)
+
+        self.schedule_cache_misses += len(missing)
+        self.schedule_cache_hits += len(keys) - len(missing)
+
+        result = []
+        for key in keys:
+            self._schedule_cache.move_to_end(key)
+            result.append(self._schedule_cache[key])
+
+        while len(self._schedule_cache) > SCHEDULE_CACHE_SIZE:
+            self._schedule_cache.popitem(last=False)
+
+        return result
+
+    def update(
+        self,
+        filtered_df: pd.DataFrame,
+        selected_house_price: float|int,
+        ek: float|int,
+        ammortisation_periods: int|float,
+    ):
+        """
+        Updates the state of the scenario based on new data.
+
+        The shared costs are allocated to the owners in ownership_shares by the
+        allocation matrix of split_rules. Without ownership_shares, person A owns the
+        ownership fraction of the scenario and person B the rest, each with the fixed
+        costs of the scenario. The totals, loan amounts and schedules of the first two
+        owners are also kept in the attributes for person A and person B.
+
+        Parameters
+        ----------
+        filtered_df : pd.DataFrame
+            a pandas DataFrame containing data related to the scenario
+        selected_house_price : float
+            the price of the selected house
+        ek : float
+            the down payment for the loan
+        ammortisation_periods : int
+            the number of periods over which the loan will be amortized
+        """
+
+        if self.selected_interest_rate is None:
+            raise ValueError("Interest rate must be provided to update the scenario")
+
+        # One row extraction instead of one Series per column
+        row = filtered_df.iloc[0]
+        if "loan_type" in row.index:
+            self.selected_loan_type = row["loan_type"]
+
+        self.total_loan = selected_house_price - ek
+        self.monthly_payment = row["monthly_loan_payment"]
+        if self.selected_loan_type == "serial":
+            # Interest on a linearly falling balance, the first payment is the largest
+            self.total_interest = (
+                self.total_loan * self.selected_interest_rate / 12
+                * (ammortisation_periods + 1) / 2
+            )
+        else:
+            self.total_interest = (
+                self.monthly_payment * ammortisation_periods - self.total_loan
+            )
+        self.loan_to_value = (self.total_loan / selected_house_price) * 100
+        self.loan_amount = selected_house_price - ek
+        self.ownership_fraq = row["ownership_fraq"]
+
+        if self.ownership_shares is None:
+            shares = two_owner_shares(self.ownership_fraq)
+            fixed_costs = np.array([row["person_a_fixed_costs"], row["person_b_fixed_costs"]])
+        else:
+            shares = self.ownership_shares
+            fixed_costs = 0.0 if self.owner_fixed_costs is None else self.owner_fixed_costs
+
+        # One matrix product allocates the loan, electricity and house costs to the owners
+        allocation = allocation_matrix(shares, self.split_rules)
+        self.total_costs = allocate_costs(
+            np.array([row[name] for name in SHARED_COSTS], dtype=float), allocation, fixed_costs
+        )
+        self.loan_amounts = self.loan_amount * allocation[0]
+
+        # Reruns with an unchanged selection are served from the schedule cache
+        self.owner_schedules = self.schedules(
+            self.loan_amounts.tolist(),
+            self.selected_interest_rate,
+            int(ammortisation_periods),
+            self.selected_loan_type,
+        )
+
+        # Person A and person B are the first two owners, a sole owner has no person B
+        padded = len(self.owner_schedules) < 2
+        self.total_cost_a = self.total_costs[0]
+        self.total_cost_b = 0 if padded else self.total_costs[1]
+        self.loan_amount_a = self.loan_amounts[0]
+        self.loan_amount_b = 0 if padded else self.loan_amounts[1]
+        self.schedule_a = self.owner_schedules[0]
+        self.schedule_b = None if padded else self.owner_schedules[1]
+        self.calculation_done = True
+
+
+class ScenarioState(_ScenarioStateMethods, BaseModel):
     """
     A class used to represent the state of the scenario builder page.
 
@@ -24,14 +298,27 @@ class ScenarioState(BaseModel):
     ----------
     df : Optional[pd.DataFrame]
         a pandas DataFrame containing data related to the scenario
+    house_prices : Optional[np.ndarray]
+        the sorted house prices in df
+    interest_rates : Optional[np.ndarray]
+        the sorted interest rates in df
+    loan_types : Optional[tuple]
+        the loan types in df, in the order of LOAN_TYPES
+    house_price_step : int
+        the house price step used for the integer grid coordinates
+    scenario_index : Optional[dict]
+        the first row position in df of each (house price step, rate in basis points,
+        loan type position)
     selected_house_price : Optional[Union[float, int, np.floating, np.integer]]
         the price of the selected house
     selected_interest_rate : Optional[Union[float, int, np.floating, np.integer]]
         the interest rate for the loan
+    selected_loan_type : str
+        the loan type, one of LOAN_TYPES
     total_loan : Union[float, int, np.floating, np.integer]
         the total amount of the loan
     monthly_payment : Union[float, int, np.floating, np.integer]
-        the monthly payment for the loan
+        the monthly payment for the loan, the first payment for serial loans
     total_interest : Union[float, int, np.floating, np.integer]
         the total interest paid over the life of the loan
     loan_to_value : Union[float, int, np.floating, np.integer]
@@ -52,11 +339,34 @@ class ScenarioState(BaseModel):
         the amortization schedule for scenario A
     schedule_b : Optional[pd.DataFrame]
         the amortization schedule for scenario B
+    ownership_shares : Optional[np.ndarray]
+        the ownership share of every owner, by default None for person A and person B
+        split by the ownership fraction of the scenario
+    owner_fixed_costs : Optional[np.ndarray]
+        the fixed costs of every owner in ownership_shares
+    split_rules : Optional[dict]
+        the split rule of each shared cost type, see allocation_matrix
+    total_costs : Optional[np.ndarray]
+        the total monthly cost of every owner
+    loan_amounts : Optional[np.ndarray]
+        the amount of the loan of every owner
+    owner_schedules : Optional[list]
+        the amortization schedule of every owner
     calculation_done : bool
         a flag indicating whether the calculations have been done
+    schedule_cache_hits : int
+        the number of schedules served from the schedule cache
+    schedule_cache_misses : int
+        the number of schedules that had to be calculated
 
     Methods
     -------
+    set_results(df, house_price_step)
+        Stores new scenario results and indexes them by grid coordinates
+    select(house_price, interest_rate, loan_type)
+        Returns the scenario row for a house price, interest rate and loan type
+    schedules(loan_amounts, interest_rate, ammortisation_periods, loan_type)
+        Returns the amortization schedules of loans, using the schedule cache
     update(filtered_df, selected_house_price, ek, ammortisation_periods)
         Updates the state of the scenario based on new data
     """
@@ -65,12 +375,18 @@ class ScenarioState(BaseModel):
         arbitrary_types_allowed = True
 
     df: Optional[pd.DataFrame] = None
+    house_prices: Optional[np.ndarray] = None
+    interest_rates: Optional[np.ndarray] = None
+    loan_types: Optional[tuple[str, ...]] = None
+    house_price_step: int = Field(HOUSE_PRICE_STEP, gt=0)
+    scenario_index: Optional[dict[tuple[int, int, int], int]] = None
     selected_house_price: Optional[Union[float, int, np.floating, np.integer]] = Field(
         None, ge=0
     )
     selected_interest_rate: Optional[Union[float, int, np.floating, np.integer]] = (
         Field(None, ge=0, le=1)
     )
+    selected_loan_type: Literal["annuity", "serial"] = "annuity"
     total_loan: Union[float, int, np.floating, np.integer] = Field(0, ge=0)
     monthly_payment: Union[float, int, np.floating, np.integer] = Field(0, ge=0)
     total_interest: Union[float, int, np.floating, np.integer] = Field(0, ge=0)
@@ -83,7 +399,16 @@ class ScenarioState(BaseModel):
     loan_amount_b: Union[float, int, np.floating, np.integer] = Field(0, ge=0)
     schedule_a: Optional[pd.DataFrame] = None
     schedule_b: Optional[pd.DataFrame] = None
+    ownership_shares: Optional[np.ndarray] = None
+    owner_fixed_costs: Optional[np.ndarray] = None
+    split_rules: Optional[dict] = None
+    total_costs: Optional[np.ndarray] = None
+    loan_amounts: Optional[np.ndarray] = None
+    owner_schedules: Optional[list] = None
     calculation_done: bool = False
+    schedule_cache_hits: int = 0
+    schedule_cache_misses: int = 0
+    _schedule_cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
 
     @validate_call(config=dict(arbitrary_types_allowed=True))
     def update(
@@ -96,39 +421,51 @@ class ScenarioState(BaseModel):
         """
         Updates the state of the scenario based on new data.
 
-        Parameters
-        ----------
-        filtered_df : pd.DataFrame
-            a pandas DataFrame containing data related to the scenario
-        selected_house_price : float
-            the price of the selected house
-        ek : float
-            the down payment for the loan
-        ammortisation_periods : int
-            the number of periods over which the loan will be amortized
+        The arguments are validated by pydantic on every call.
         """
+        _ScenarioStateMethods.update(
+            self, filtered_df, selected_house_price, ek, ammortisation_periods
+        )
 
-        if not self.selected_interest_rate:
-            raise ValueError("Interest rate must be provided to update the scenario")
 
-        self.total_loan = selected_house_price - ek
-        self.monthly_payment = filtered_df["monthly_loan_payment"].iloc[0]
-        self.total_interest = (
-            self.monthly_payment * ammortisation_periods - self.total_loan
-        )
-        self.loan_to_value = (self.total_loan / selected_house_price) * 100
-        self.total_cost_a = filtered_df["a_total"].iloc[0]
-        self.total_cost_b = filtered_df["b_total"].iloc[0]
-        self.loan_amount = selected_house_price - ek
-        self.ownership_fraq = filtered_df["ownership_fraq"].iloc[0]
-        self.loan_amount_a = self.loan_amount * self.ownership_fraq
-        self.loan_amount_b = self.loan_amount * (1 - self.ownership_fraq)
+@dataclass(slots=True)
+class LightScenarioState(_ScenarioStateMethods):
+    """
+    A slotted dataclass with the same attributes and methods as ScenarioState.
 
-        # Assume calculate_amortization_schedule is imported or defined elsewhere
-        self.schedule_a = calculate_amortization_schedule(
-            self.loan_amount_a, self.selected_interest_rate, ammortisation_periods
-        )
-        self.schedule_b = calculate_amortization_schedule(
-            self.loan_amount_b, self.selected_interest_rate, ammortisation_periods
-        )
-        self.calculation_done = True
+    The scenario results are validated once in set_results, after which update is
+    plain attribute assignment. This avoids the pydantic validation that
+    ScenarioState.update runs on every Streamlit rerun.
+    """
+
+    df: Optional[pd.DataFrame] = None
+    house_prices: Optional[np.ndarray] = None
+    interest_rates: Optional[np.ndarray] = None
+    loan_types: Optional[tuple[str, ...]] = None
+    house_price_step: int = HOUSE_PRICE_STEP
+    scenario_index: Optional[dict[tuple[int, int, int], int]] = None
+    selected_house_price: Optional[Union[float, int, np.floating, np.integer]] = None
+    selected_interest_rate: Optional[Union[float, int, np.floating, np.integer]] = None
+    selected_loan_type: str = "annuity"
+    total_loan: Union[float, int, np.floating, np.integer] = 0
+    monthly_payment: Union[float, int, np.floating, np.integer] = 0
+    total_interest: Union[float, int, np.floating, np.integer] = 0
+    loan_to_value: Union[float, int, np.floating, np.integer] = 0
+    total_cost_a: Union[float, int, np.floating, np.integer] = 0
+    total_cost_b: Union[float, int, np.floating, np.integer] = 0
+    loan_amount: Union[float, int, np.floating, np.integer] = 0
+    ownership_fraq: Union[float, int, np.floating, np.integer] = 0
+    loan_amount_a: Union[float, int, np.floating, np.integer] = 0
+    loan_amount_b: Union[float, int, np.floating, np.integer] = 0
+    schedule_a: Optional[pd.DataFrame] = None
+    schedule_b: Optional[pd.DataFrame] = None
+    ownership_shares: Optional[np.ndarray] = None
+    owner_fixed_costs: Optional[np.ndarray] = None
+    split_rules: Optional[dict] = None
+    total_costs: Optional[np.ndarray] = None
+    loan_amounts: Optional[np.ndarray] = None
+    owner_schedules: Optional[list] = None
+    calculation_done: bool = False
+    schedule_cache_hits: int = 0
+    schedule_cache_misses: int = 0
+    _schedule_cache: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False)
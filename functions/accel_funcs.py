@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Optional compiled kernels for the largest batch calculations.
+
+The NumPy versions of the amortization schedules and the electricity cost grid in
+calc_funcs build a full-size temporary array for almost every operation: balances,
+payments times months, their differences, two roundings, the support masks. The loops
+here compute each output element in a single pass instead. They are compiled with
+Numba when it is installed, and calc_funcs then uses them automatically for large
+batches. Without Numba everything runs on the NumPy code in calc_funcs, which stays
+the reference implementation.
+
+The kernels give bit-for-bit the same results as the NumPy code. They only use the
+basic arithmetic of the reference in the same order, which Numba compiles without
+reassociation or fused multiply-adds. Logarithms and exponentials are the exception,
+since NumPy may evaluate them with SIMD routines that round differently from the C
+library used by compiled code. They are computed with NumPy once per distinct rate and
+passed to the loops.
+
+The backend is picked by the LEVEKOSTNAD_KERNEL_BACKEND environment variable, or by
+the backend argument of the calc_funcs functions that support it.
+"""
+
+import os
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+# Environment variable that picks the backend, e.g. numpy to turn the kernels off
+KERNEL_BACKEND_ENV = "LEVEKOSTNAD_KERNEL_BACKEND"
+
+# numba runs the compiled loops, numpy the reference code in calc_funcs and python the
+# loops without compiling them, which is slow and only meant for tests and debugging
+BACKENDS = ("numba", "numpy", "python")
+
+# Below this number of output elements the automatic choice stays with NumPy, whose
+# temporaries are cheap for small arrays
+ACCELERATED_MIN_SIZE = 4096
+
+
+def resolve_backend(backend: str | None = None, size: int | None = None) -> str:
+    """
+    Pick the backend of one calculation.
+
+    Parameters
+    ----------
+    backend : str, optional
+        One of BACKENDS, by default None which uses the KERNEL_BACKEND_ENV environment
+        variable or, if that is unset, numba when it is installed and numpy otherwise.
+    size : int, optional
+        The number of output elements. When the backend is picked automatically,
+        calculations smaller than ACCELERATED_MIN_SIZE stay with numpy.
+
+    Returns
+    -------
+    str
+        The backend to use.
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown, or is numba and Numba is not installed.
+    """
+    if backend is None:
+        backend = os.environ.get(KERNEL_BACKEND_ENV) or None
+    if backend is None:
+        if not NUMBA_AVAILABLE or (size is not None and size < ACCELERATED_MIN_SIZE):
+            return "numpy"
+        return "numba"
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "numba" and not NUMBA_AVAILABLE:
+        raise ValueError("The numba backend needs Numba, which is not installed")
+    return backend
+
+
+def _schedule_loops(
+    loan, monthly_rates, rate_index, growth_m1, serial, loan_term_months,
+    principal, interest, remaining_balance, total_paid,
+):
+    """
+    Fill the cumulative schedules of every loan, month by month.
+
+    Mirrors calculate_amortization_schedules_batched operation by operation. Row j of
+    growth_m1 holds (1 + r)^k - 1 for the monthly rate r = monthly_rates[j].
+    """
+    n = loan_term_months
+    for i in range(loan.shape[0]):
+        amount = loan[i]
+        j = rate_index[i]
+        rate = monthly_rates[j]
+        term_growth_m1 = growth_m1[j, n]
+        if rate == 0:
+            payment = amount / n
+        else:
+            payment = amount * rate * (term_growth_m1 + 1) / term_growth_m1
+
+        for k in range(n + 1):
+            if serial[i]:
+                # Linear balance, and the interest on it summed over k months
+                balance = amount * (n - k) / n
+                paid_interest = np.rint(rate * amount * k * (2 * n - k + 1) / (2 * n))
+            else:
+                if k == 0:
+                    balance = amount
+                elif rate == 0:
+                    balance = amount * (n - k) / n
+                else:
+                    balance = amount * (term_growth_m1 - growth_m1[j, k]) / term_growth_m1
+                paid_interest = np.rint(payment * k - (amount - balance))
+
+            paid_principal = np.rint(amount - balance)
+            principal[i, k] = paid_principal
+            interest[i, k] = paid_interest
+            remaining_balance[i, k] = amount - paid_principal
+            total_paid[i, k] = paid_principal + paid_interest
+
+
+def _electricity_loops(
+    kwh_usage, kwh_price_incl_vat_nok, markup_nok, fixed_cost_nok, govt_support_limit_nok,
+    total_cost,
+):
+    """
+    Fill the electricity cost of every element of broadcast input arrays.
+
+    Mirrors calculate_electricity_costs_array operation by operation.
+    """
+    for index in np.ndindex(total_cost.shape):
+        usage = kwh_usage[index]
+        price = kwh_price_incl_vat_nok[index]
+        costs = fixed_cost_nok[index] + (usage * (price + markup_nok[index]))
+        if price <= govt_support_limit_nok:
+            total_cost[index] = costs
+        else:
+            support = (usage * (price - govt_support_limit_nok)) * 0.9 if usage <= 5000 else 0.0
+            total_cost[index] = costs - support
+
+
+if NUMBA_AVAILABLE:
+    _KERNELS = {
+        "numba": (
+            numba.njit(cache=True)(_schedule_loops),
+            numba.njit(cache=True)(_electricity_loops),
+        ),
+    }
+else:
+    _KERNELS = {}
+_KERNELS["python"] = (_schedule_loops, _electricity_loops)
+
+
+def amortization_schedule_arrays(
+    loan_amounts: np.ndarray | float,
+    annual_interest_rates: np.ndarray | float,
+    loan_term_months: int,
+    serial: np.ndarray | bool,
+    backend: str = "numba",
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate cumulative amortization schedules with a compiled kernel.
+
+    Parameters
+    ----------
+    loan_amounts : np.ndarray or float
+        The initial amount(s) of the loans.
+    annual_interest_rates : np.ndarray or float
+        The annual interest rate(s), expressed as decimals.
+    loan_term_months : int
+        The total number of months for the loan term.
+    serial : np.ndarray or bool
+        True for serial loans and False for annuity loans.
+    backend : str, optional
+        numba or python, by default numba.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        Cumulative principal, cumulative interest, remaining balance and total paid,
+        each of shape (*batch_shape, loan_term_months + 1), as the fields of
+        calculate_amortization_schedules_batched.
+    """
+    schedule_kernel, _ = _KERNELS[backend]
+    loan, rates, serial = np.broadcast_arrays(
+        np.asarray(loan_amounts, dtype=float),
+        np.asarray(annual_interest_rates, dtype=float),
+        np.asarray(serial, dtype=bool),
+    )
+    batch_shape = loan.shape
+
+    # Transcendentals from NumPy, once per distinct rate, exactly as in annuity_kernel
+    monthly_rates, rate_index = np.unique(rates.ravel() / 12, return_inverse=True)
+    months = np.arange(loan_term_months + 1)
+    growth_m1 = np.expm1(months * np.log1p(monthly_rates)[:, np.newaxis])
+
+    outputs = tuple(np.empty((loan.size, loan_term_months + 1)) for _ in range(4))
+    schedule_kernel(
+        np.ascontiguousarray(loan.ravel()),
+        monthly_rates,
+        rate_index.ravel().astype(np.int64),
+        growth_m1,
+        np.ascontiguousarray(serial.ravel()),
+        int(loan_term_months),
+        *outputs,
+    )
+    return tuple(output.reshape(*batch_shape, loan_term_months + 1) for output in outputs)
+
+
+def electricity_cost_array(
+    kwh_usage: np.ndarray | float,
+    kwh_price_incl_vat_nok: np.ndarray | float,
+    markup_nok: np.ndarray | float,
+    fixed_cost_nok: np.ndarray | float,
+    govt_support_limit_nok: float,
+    backend: str = "numba",
+) -> np.ndarray:
+    """
+    Calculate the total cost of electricity on broadcast inputs with a compiled kernel.
+
+    The inputs are broadcast as views, so a usage column and a price row are read in
+    place without materializing the full grid for every input.
+
+    Returns
+    -------
+    np.ndarray
+        The total cost of electricity in NOK, as calculate_electricity_costs_array.
+    """
+    _, electricity_kernel = _KERNELS[backend]
+    inputs = np.broadcast_arrays(
+        *(
+            np.asarray(value, dtype=float)
+            for value in (kwh_usage, kwh_price_incl_vat_nok, markup_nok, fixed_cost_nok)
+        )
+    )
+    total_cost = np.empty(inputs[0].shape)
+    electricity_kernel(*inputs, float(govt_support_limit_nok), total_cost)
+    return total_cost
@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Inverse solvers for the scenario calculations.
+
+monthly_price_calculator answers what a house costs per month. The functions here
+answer the inverse: given a monthly budget per person, what is the highest house
+price, or the highest interest rate, that fits. The loan payment is linear in the loan,
+so the highest price follows from the annuity factor in closed form. The annuity
+factor has no closed-form inverse in the rate, so the break-even rate is found with a
+safeguarded Newton iteration that runs on whole arrays at once.
+"""
+
+from pathlib import Path
+import sys
+import pandas as pd
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.annuity_table import annuity_factor_derivatives, annuity_factors  # noqa: E402
+from functions.calc_funcs import first_payment_factors, serial_loans  # noqa: E402
+
+# Upper end of the break-even rate search, as an annual rate
+BREAK_EVEN_RATE_MAX = 1.0
+
+
+def max_loan_payment(
+    budget_a: np.ndarray | float,
+    budget_b: np.ndarray | float | None = None,
+    ownership_fraq: np.ndarray | float = 1.0,
+    fixed_cost_house: np.ndarray | float = 0.0,
+    el_cost: np.ndarray | float = 0.0,
+    person_a_fixed_costs: np.ndarray | float = 0.0,
+    person_b_fixed_costs: np.ndarray | float = 0.0,
+) -> np.ndarray:
+    """
+    Calculate the largest monthly loan payment that fits the budgets of both persons.
+
+    This inverts the cost split of monthly_price_calculator_scenarios: person A pays
+    ownership_fraq of the loan payment, person B the rest, and both pay half of the
+    electricity and fixed house costs on top of their own fixed costs.
+
+    Parameters
+    ----------
+    budget_a : np.ndarray or float
+        The total monthly budget of person A.
+    budget_b : np.ndarray or float, optional
+        The total monthly budget of person B. None for a single borrower, or when the
+        budget of person B does not limit the loan.
+    ownership_fraq : np.ndarray or float, optional
+        The share of the loan payment paid by person A, by default 1.
+    fixed_cost_house : np.ndarray or float, optional
+        Fixed monthly costs of the house, by default 0.
+    el_cost : np.ndarray or float, optional
+        Monthly electricity cost, by default 0.
+    person_a_fixed_costs : np.ndarray or float, optional
+        Other fixed monthly costs of person A, by default 0.
+    person_b_fixed_costs : np.ndarray or float, optional
+        Other fixed monthly costs of person B, by default 0.
+
+    Returns
+    -------
+    np.ndarray
+        The largest loan payment with the broadcast shape of the inputs. It is negative
+        where the budgets do not even cover the other costs, and infinite where no
+        budget limits the loan.
+
+    Examples
+    --------
+    >>> float(max_loan_payment(30000, 25000, 0.5, 5000, 1000, 10000, 10000))
+    24000.0
+    """
+    ownership_fraq = np.asarray(ownership_fraq, dtype=float)
+    shared_costs = np.asarray(el_cost) / 2 + np.asarray(fixed_cost_house) / 2
+
+    def person_limit(budget, fixed_costs, share):
+        residual = np.asarray(budget, dtype=float) - shared_costs - fixed_costs
+        # A person without a share of the loan only limits it if the budget falls short
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                share > 0, residual / np.where(share > 0, share, 1.0),
+                np.where(residual >= 0, np.inf, -np.inf),
+            )
+
+    limit = person_limit(budget_a, person_a_fixed_costs, ownership_fraq)
+    if budget_b is not None:
+        limit = np.minimum(limit, person_limit(budget_b, person_b_fixed_costs, 1 - ownership_fraq))
+    return limit
+
+
+def max_house_price(
+    budget_a: np.ndarray | float,
+    budget_b: np.ndarray | float | None,
+    interest_rate: np.ndarray | float,
+    ammortisation_periods: np.ndarray | int,
+    ek: np.ndarray | float,
+    transaction_costs: np.ndarray | float = 0.0,
+    ownership_fraq: np.ndarray | float = 1.0,
+    fixed_cost_house: np.ndarray | float = 0.0,
+    el_cost: np.ndarray | float = 0.0,
+    person_a_fixed_costs: np.ndarray | float = 0.0,
+    person_b_fixed_costs: np.ndarray | float = 0.0,
+    loan_type: str | np.ndarray = "annuity",
+    max_loan_limit: np.ndarray | float | None = None,
+) -> np.ndarray:
+    """
+    Calculate the highest house price that fits the monthly budgets.
+
+    The loan payment is the loan times the first payment factor, so the largest loan
+    is the largest affordable payment divided by that factor, and the price adds the
+    equity left after transaction costs. All inputs are broadcast against each other.
+
+    Parameters
+    ----------
+    budget_a : np.ndarray or float
+        The total monthly budget of person A.
+    budget_b : np.ndarray or float or None
+        The total monthly budget of person B, or None, see max_loan_payment.
+    interest_rate : np.ndarray or float
+        The annual interest rate(s), as decimals.
+    ammortisation_periods : np.ndarray or int
+        The number of months over which the loan is amortized.
+    ek : np.ndarray or float
+        The equity.
+    transaction_costs : np.ndarray or float, optional
+        The costs of the purchase that are paid from the equity, by default 0.
+    ownership_fraq : np.ndarray or float, optional
+        The share of the loan payment paid by person A, by default 1.
+    fixed_cost_house : np.ndarray or float, optional
+        Fixed monthly costs of the house, by default 0.
+    el_cost : np.ndarray or float, optional
+        Monthly electricity cost, by default 0.
+    person_a_fixed_costs : np.ndarray or float, optional
+        Other fixed monthly costs of person A, by default 0.
+    person_b_fixed_costs : np.ndarray or float, optional
+        Other fixed monthly costs of person B, by default 0.
+    loan_type : str or np.ndarray, optional
+        One of LOAN_TYPES, by default 'annuity'. Serial loans are limited by their
+        first and largest payment.
+    max_loan_limit : np.ndarray or float, optional
+        The largest loan the bank offers, by default no limit.
+
+    Returns
+    -------
+    np.ndarray
+        The highest house price, NaN where the budgets do not cover the other costs.
+
+    Examples
+    --------
+    >>> round(float(max_house_price(20000, None, 0.05, 360, 1000000)))
+    4725632
+    """
+    payment = max_loan_payment(
+        budget_a,
+        budget_b,
+        ownership_fraq,
+        fixed_cost_house,
+        el_cost,
+        person_a_fixed_costs,
+        person_b_fixed_costs,
+    )
+    loan = payment / first_payment_factors(interest_rate, ammortisation_periods, loan_type)
+    if max_loan_limit is not None:
+        loan = np.minimum(loan, max_loan_limit)
+
+    eff_ek = np.asarray(ek) - np.asarray(transaction_costs)
+    return np.where(payment >= 0, loan + eff_ek, np.nan)
+
+
+def break_even_rate(
+    budget_a: np.ndarray | float,
+    budget_b: np.ndarray | float | None,
+    house_price: np.ndarray | float,
+    ammortisation_periods: np.ndarray | int,
+    ek: np.ndarray | float,
+    transaction_costs: np.ndarray | float = 0.0,
+    ownership_fraq: np.ndarray | float = 1.0,
+    fixed_cost_house: np.ndarray | float = 0.0,
+    el_cost: np.ndarray | float = 0.0,
+    person_a_fixed_costs: np.ndarray | float = 0.0,
+    person_b_fixed_costs: np.ndarray | float = 0.0,
+    loan_type: str | np.ndarray = "annuity",
+    max_rate: float = BREAK_EVEN_RATE_MAX,
+    tol: float = 1e-12,
+    max_iter: int = 50,
+) -> np.ndarray:
+    """
+    Calculate the highest interest rate at which the monthly budgets still hold.
+
+    For serial loans the first payment is linear in the rate and the rate is solved in
+    closed form. For annuity loans every element runs a Newton iteration on the annuity
+    factor, kept inside a bisection bracket on [0, max_rate]: a Newton step that leaves
+    the bracket is replaced by the midpoint. The factor is convex and increasing in the
+    rate, so the iteration converges in a handful of steps for all elements together.
+
+    Parameters
+    ----------
+    budget_a : np.ndarray or float
+        The total monthly budget of person A.
+    budget_b : np.ndarray or float or None
+        The total monthly budget of person B, or None, see max_loan_payment.
+    house_price : np.ndarray or float
+        The price of the house.
+    ammortisation_periods : np.ndarray or int
+        The number of months over which the loan is amortized.
+    ek : np.ndarray or float
+        The equity.
+    transaction_costs : np.ndarray or float, optional
+        The costs of the purchase that are paid from the equity, by default 0.
+    ownership_fraq : np.ndarray or float, optional
+        The share of the loan payment paid by person A, by default 1.
+    fixed_cost_house : np.ndarray or float, optional
+        Fixed monthly costs of the house, by default 0.
+    el_cost : np.ndarray or float, optional
+        Monthly electricity cost, by default 0.
+    person_a_fixed_costs : np.ndarray or float, optional
+        Other fixed monthly costs of person A, by default 0.
+    person_b_fixed_costs : np.ndarray or float, optional
+        Other fixed monthly costs of person B, by default 0.
+    loan_type : str or np.ndarray, optional
+        One of LOAN_TYPES, by default 'annuity'.
+    max_rate : float, optional
+        The highest annual rate searched, by default 1 (100%).
+    tol : float, optional
+        The tolerance on the rate at which the iteration stops, by default 1e-12.
+    max_iter : int, optional
+        The largest number of iterations, by default 50.
+
+    Returns
+    -------
+    np.ndarray
+        The break-even annual rate. NaN where the budgets do not hold even at a zero
+        rate, and inf where they hold at every rate up to max_rate.
+
+    Examples
+    --------
+    >>> rate = break_even_rate(20000, None, 4725632, 360, 1000000)
+    >>> round(float(rate), 6)
+    0.05
+    """
+    payment = max_loan_payment(
+        budget_a,
+        budget_b,
+        ownership_fraq,
+        fixed_cost_house,
+        el_cost,
+        person_a_fixed_costs,
+        person_b_fixed_costs,
+    )
+    loan = np.asarray(house_price) - (np.asarray(ek) - np.asarray(transaction_costs))
+    months = np.asarray(ammortisation_periods, dtype=float)
+    serial = serial_loans(loan_type)
+    payment, loan, months, serial = np.broadcast_arrays(payment, loan, months, serial)
+
+    # Payment per krone of loan that the budgets allow
+    with np.errstate(divide="ignore", invalid="ignore"):
+        target = np.where(loan > 0, payment / np.where(loan > 0, loan, 1.0), np.inf)
+
+    # Bracket the root of A(r) - target on [0, max_rate]
+    lower = np.zeros(target.shape)
+    upper = np.full(target.shape, float(max_rate))
+    rate = np.clip((target - 1 / months) * 24 * months / (months + 1), lower, upper)
+    active = np.isfinite(target) & ~serial
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        excess = annuity_factors(rate, months) - target
+        lower = np.where(excess < 0, rate, lower)
+        upper = np.where(excess >= 0, rate, upper)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = rate - excess / annuity_factor_derivatives(rate, months)[0]
+        outside = ~((newton > lower) & (newton < upper))
+        step = np.where(outside, (lower + upper) / 2, newton)
+
+        active &= np.abs(step - rate) > tol
+        rate = np.where(active, step, rate)
+
+    # Serial loans pay 1 / n + r / 12 per krone in the first month
+    rate = np.where(serial, 12 * (target - 1 / months), rate)
+
+    # Unaffordable even without interest, or affordable at every rate searched
+    cap = np.where(serial, 1 / months + max_rate / 12, annuity_factors(max_rate, months))
+    rate = np.where(target >= cap, np.inf, rate)
+    return np.where(target < 1 / months, np.nan, rate)
+
+
+def affordability_table(
+    budget_range: list,
+    interest_rate_range: list,
+    ek_range: list,
+    ammortisation_periods_range: list,
+    ownership_fraq_range: list,
+    transaction_costs: float = 0.0,
+    fixed_cost_house: float = 0.0,
+    el_cost: float = 0.0,
+    person_a_fixed_costs: float = 0.0,
+    person_b_fixed_costs: float = 0.0,
+    loan_type: str = "annuity",
+) -> pd.DataFrame:
+    """
+    Tabulate the highest house price over a grid of budgets and loan parameters.
+
+    Both persons are given the same budget. Every range is one axis of the grid, which
+    is evaluated with one broadcast call to max_house_price and flattened in the row
+    order of itertools.product over the ranges.
+
+    Parameters
+    ----------
+    budget_range : list
+        Monthly budgets per person.
+    interest_rate_range : list
+        Annual interest rates, as decimals.
+    ek_range : list
+        Equity amounts.
+    ammortisation_periods_range : list
+        Loan terms in months.
+    ownership_fraq_range : list
+        Shares of the loan payment paid by person A.
+    transaction_costs : float, optional
+        The costs of the purchase that are paid from the equity, by default 0.
+    fixed_cost_house : float, optional
+        Fixed monthly costs of the house, by default 0.
+    el_cost : float, optional
+        Monthly electricity cost, by default 0.
+    person_a_fixed_costs : float, optional
+        Other fixed monthly costs of person A, by default 0.
+    person_b_fixed_costs : float, optional
+        Other fixed monthly costs of person B, by default 0.
+    loan_type : str, optional
+        One of LOAN_TYPES, by default 'annuity'.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per combination with the columns budget, interest_rate, ek,
+        ammortisation_periods, ownership_fraq and max_house_price.
+
+    Examples
+    --------
+    >>> table = affordability_table([20000, 30000], [0.03, 0.05], [1000000], [360], [0.5])
+    >>> len(table)
+    4
+    """
+    names = ("budget", "interest_rate", "ek", "ammortisation_periods", "ownership_fraq")
+    ranges = (
+        budget_range,
+        interest_rate_range,
+        ek_range,
+        ammortisation_periods_range,
+        ownership_fraq_range,
+    )
+    grids = np.meshgrid(*(np.asarray(values) for values in ranges), indexing="ij", sparse=True)
+    axes = dict(zip(names, grids))
+    shape = np.broadcast_shapes(*(axis.shape for axis in axes.values()))
+
+    price = max_house_price(
+        axes["budget"],
+        axes["budget"],
+        axes["interest_rate"],
+        axes["ammortisation_periods"],
+        axes["ek"],
+        transaction_costs,
+        axes["ownership_fraq"],
+        fixed_cost_house,
+        el_cost,
+        person_a_fixed_costs,
+        person_b_fixed_costs,
+        loan_type,
+    )
+
+    return pd.DataFrame(
+        {
+            **{name: np.broadcast_to(axis, shape).ravel() for name, axis in axes.items()},
+            "max_house_price": np.broadcast_to(price, shape).ravel(),
+        }
+    )
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Allocation of shared housing costs between any number of owners.
+
+The shared monthly costs of a home, the loan payment, electricity and the fixed costs
+of the house, are split between the owners by an allocation matrix with one row per
+cost type in SHARED_COSTS and one column per owner. Every row sums to one and follows
+a split rule: by ownership share, equally, or by fixed weights. Each owner's share of
+the costs is then one matrix product of the cost vector with the allocation matrix,
+which broadcasts over scenario grids. With two owners and the default rules this is
+the split the app has always used: the loan by ownership fraction and electricity and
+fixed house costs in half.
+"""
+
+import string
+import numpy as np
+
+# Shared cost types, in the row order of allocation matrices
+SHARED_COSTS = ("monthly_loan_payment", "el_cost", "fixed_cost_house")
+
+# Rules for splitting one cost type, besides a sequence of weights per owner
+SPLIT_RULES = ("ownership", "equal")
+
+DEFAULT_SPLIT_RULES = {
+    "monthly_loan_payment": "ownership",
+    "el_cost": "equal",
+    "fixed_cost_house": "equal",
+}
+
+# Owners are labelled A, B, C, ... as person A and person B in the app
+OWNER_LABELS = tuple(string.ascii_uppercase)
+
+# Largest deviation from one accepted for the sum of ownership shares
+SHARE_SUM_TOLERANCE = 1e-9
+
+
+def owner_labels(n_owners: int) -> tuple[str, ...]:
+    """
+    Returns the labels of the first n_owners owners.
+
+    Raises
+    ------
+    ValueError
+        If there are no owners or more owners than labels.
+    """
+    if not 1 <= n_owners <= len(OWNER_LABELS):
+        raise ValueError(f"The number of owners must be between 1 and {len(OWNER_LABELS)}")
+    return OWNER_LABELS[:n_owners]
+
+
+def owner_total_column(label: str) -> str:
+    """
+    Returns the name of the total cost column of an owner, a_total for owner A.
+    """
+    return f"{label.lower()}_total"
+
+
+def two_owner_shares(ownership_fraq: np.ndarray | float) -> np.ndarray:
+    """
+    Stack the ownership fraction of person A and the rest for person B on a last axis.
+
+    Examples
+    --------
+    >>> two_owner_shares(np.array([0.25, 0.5]))
+    array([[0.25, 0.75],
+           [0.5 , 0.5 ]])
+    """
+    ownership_fraq = np.asarray(ownership_fraq, dtype=float)
+    return np.stack([ownership_fraq, 1 - ownership_fraq], axis=-1)
+
+
+def allocation_matrix(
+    ownership_shares: np.ndarray | list,
+    split_rules: dict | None = None,
+) -> np.ndarray:
+    """
+    Build the matrix that allocates the shared costs to the owners.
+
+    Parameters
+    ----------
+    ownership_shares : np.ndarray or list
+        The ownership share of every owner along the last axis, summing to one. Leading
+        axes, for example one per ownership scenario, are kept.
+    split_rules : dict, optional
+        Mapping from cost types in SHARED_COSTS to a rule in SPLIT_RULES or to one
+        non-negative weight per owner, by default DEFAULT_SPLIT_RULES. Cost types that
+        are left out follow the default rule.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (..., len(SHARED_COSTS), n_owners) whose rows sum to one.
+
+    Raises
+    ------
+    ValueError
+        If the shares are negative or do not sum to one, or a split rule is unknown or
+        has the wrong number of weights.
+
+    Examples
+    --------
+    >>> allocation_matrix([0.5, 0.3, 0.2], {"el_cost": [2, 1, 1]})
+    array([[0.5       , 0.3       , 0.2       ],
+           [0.5       , 0.25      , 0.25      ],
+           [0.33333333, 0.33333333, 0.33333333]])
+    """
+    shares = np.asarray(ownership_shares, dtype=float)
+    if shares.ndim == 0:
+        raise ValueError("ownership_shares needs one share per owner on its last axis")
+    n_owners = shares.shape[-1]
+    owner_labels(n_owners)
+    if (shares < 0).any():
+        raise ValueError("Ownership shares must be non-negative")
+    if (np.abs(shares.sum(axis=-1) - 1) > SHARE_SUM_TOLERANCE).any():
+        raise ValueError("Ownership shares must sum to one")
+
+    rules = dict(DEFAULT_SPLIT_RULES)
+    if split_rules:
+        unknown = set(split_rules) - set(SHARED_COSTS)
+        if unknown:
+            raise ValueError(f"Unknown cost types {sorted(unknown)}, expected {SHARED_COSTS}")
+        rules.update(split_rules)
+
+    rows = []
+    for cost in SHARED_COSTS:
+        rule = rules[cost]
+        if isinstance(rule, str):
+            if rule not in SPLIT_RULES:
+                raise ValueError(f"Unknown split rule {rule!r}, expected one of {SPLIT_RULES}")
+            row = shares if rule == "ownership" else np.full(n_owners, 1 / n_owners)
+        else:
+            weights = np.asarray(rule, dtype=float)
+            if weights.shape != (n_owners,) or (weights < 0).any() or weights.sum() <= 0:
+                raise ValueError(
+                    f"The split of {cost} needs {n_owners} non-negative weights"
+                )
+            row = weights / weights.sum()
+        rows.append(np.broadcast_to(row, shares.shape))
+
+    return np.stack(rows, axis=-2)
+
+
+def allocate_costs(
+    shared_costs: np.ndarray,
+    allocation: np.ndarray,
+    personal_costs: np.ndarray | float = 0.0,
+) -> np.ndarray:
+    """
+    Allocate shared costs to the owners and add their personal costs.
+
+    The allocation is one matrix product per grid point over the cost types. The sum
+    runs over the cost types in the order of SHARED_COSTS, so two owners get exactly
+    the totals of the per-person formulas this replaces.
+
+    Parameters
+    ----------
+    shared_costs : np.ndarray
+        The costs in the order of SHARED_COSTS along the last axis.
+    allocation : np.ndarray
+        The allocation matrix or matrices from allocation_matrix, broadcast against
+        shared_costs.
+    personal_costs : np.ndarray or float, optional
+        The personal monthly costs of every owner along the last axis, by default 0.
+
+    Returns
+    -------
+    np.ndarray
+        The total monthly cost of every owner along the last axis.
+
+    Examples
+    --------
+    >>> allocate_costs(np.array([10000, 1500, 3000]), allocation_matrix([0.6, 0.4]), [8000, 9000])
+    array([16250., 15250.])
+    """
+    shared_costs = np.asarray(shared_costs, dtype=float)
+    return np.einsum("...k,...ko->...o", shared_costs, allocation) + personal_costs
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Precomputed annuity factors for the interest rates and loan terms offered in the UI.
+
+The annuity factor r / (1 - (1 + r)^-n) only takes a finite set of values for the
+rate slider (0-20% in steps of 0.25pp) and the term input (1-480 months), see
+variables.toml. The factors are stored as a .npy file that is memory-mapped on first
+use, so an interactive payment calculation becomes a gather plus a multiply.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+
+# Table domain, matching the rate step of the scenario page and the limits in variables.toml
+ANNUITY_TABLE_RATE_STEP = 0.0025
+ANNUITY_TABLE_RATE_MAX = 0.20
+ANNUITY_TABLE_MONTHS_MAX = 480
+ANNUITY_TABLE_PATH = project_root.joinpath("data", "annuity_factors.npy")
+
+
+def annuity_table_rates() -> np.ndarray:
+    """
+    Return the annual interest rates along the first axis of the annuity table.
+
+    Returns
+    -------
+    np.ndarray
+        Rates from 0 to ANNUITY_TABLE_RATE_MAX in steps of ANNUITY_TABLE_RATE_STEP,
+        rounded to the nearest float of their decimal value.
+    """
+    n_rates = int(round(ANNUITY_TABLE_RATE_MAX / ANNUITY_TABLE_RATE_STEP)) + 1
+    return np.round(np.arange(n_rates) * ANNUITY_TABLE_RATE_STEP, 4)
+
+
+_TABLE_RATES = annuity_table_rates()
+
+
+def build_annuity_factor_table() -> np.ndarray:
+    """
+    Calculate the annuity factor for every rate and month count in the table domain.
+
+    The factors are calculated with the same arithmetic as loan_calc, so a table lookup
+    returns exactly the same value as the direct calculation. At zero rate the factor
+    is the limit 1 / months.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_rates, ANNUITY_TABLE_MONTHS_MAX), where element [i, m - 1] is
+        the monthly payment per krone borrowed at rate i over m months.
+    """
+    table = np.empty((_TABLE_RATES.size, ANNUITY_TABLE_MONTHS_MAX))
+
+    # Filled one term at a time with a scalar exponent, the way loan_calc calls the
+    # formula, so that lookups agree with the direct calculation to the last bit
+    for months in range(1, ANNUITY_TABLE_MONTHS_MAX + 1):
+        table[:, months - 1] = _direct_annuity_factors(_TABLE_RATES, months)
+
+    return table
+
+
+def save_annuity_factor_table(path: Path = ANNUITY_TABLE_PATH) -> Path:
+    """
+    Build the annuity factor table and persist it as a .npy file.
+
+    Parameters
+    ----------
+    path : Path, optional
+        Where to write the table, by default ANNUITY_TABLE_PATH.
+
+    Returns
+    -------
+    Path
+        The path the table was written to.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, build_annuity_factor_table())
+    return path
+
+
+@lru_cache(maxsize=1)
+def load_annuity_factor_table(path: Path = ANNUITY_TABLE_PATH) -> np.ndarray:
+    """
+    Memory-map the annuity factor table, building it if the file is missing or stale.
+
+    Parameters
+    ----------
+    path : Path, optional
+        The .npy file to load, by default ANNUITY_TABLE_PATH.
+
+    Returns
+    -------
+    np.ndarray
+        The read-only annuity factor table.
+    """
+    expected_shape = (_TABLE_RATES.size, ANNUITY_TABLE_MONTHS_MAX)
+    try:
+        table = np.load(path, mmap_mode="r")
+        if table.shape == expected_shape:
+            # Plain ndarray view of the mapping, avoids np.memmap overhead on every gather
+            return np.asarray(table)
+    except (OSError, ValueError):
+        pass
+
+    # Fall back to an in-memory table if the file cannot be used
+    table = build_annuity_factor_table()
+    table.setflags(write=False)
+    return table
+
+
+def _annuity_formula(monthly_rate: np.ndarray, months: np.ndarray | int) -> np.ndarray:
+    """
+    Evaluate the loan_calc annuity formula for non-zero monthly rates.
+    """
+    numerator = monthly_rate * (1 + monthly_rate) ** months
+    denominator = (1 + monthly_rate) ** months - 1
+    return numerator / denominator
+
+
+def _direct_annuity_factors(
+    rate: np.ndarray | float, months: np.ndarray | int
+) -> np.ndarray:
+    """
+    Calculate annuity factors with the loan_calc formula, using 1 / months at zero rate.
+    """
+    monthly_rate = rate / 12
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(
+            monthly_rate == 0,
+            np.divide(1.0, months),
+            _annuity_formula(monthly_rate, months),
+        )
+
+
+def _scalar_annuity_factor(rate: float, months: int) -> float | None:
+    """
+    Look up a single annuity factor, or return None if it is outside the table.
+    """
+    if not 1 <= months <= ANNUITY_TABLE_MONTHS_MAX or months != int(months):
+        return None
+
+    rate_index = round(rate / ANNUITY_TABLE_RATE_STEP)
+    if not 0 <= rate_index < _TABLE_RATES.size or rate != _TABLE_RATES[rate_index]:
+        return None
+
+    return float(load_annuity_factor_table()[rate_index, int(months) - 1])
+
+
+def annuity_factors(rate: np.ndarray | float, months: np.ndarray | int) -> np.ndarray | float:
+    """
+    Return the annuity factors for the given rates and terms.
+
+    A single rate and term that lie on the table grid are gathered from the
+    precomputed table. Everything else is calculated directly with the same formula
+    the table was built from, so both paths return identical values. Arrays are not
+    gathered because the index and mask arithmetic costs as much under NumPy as the
+    two power operations it would replace.
+
+    Parameters
+    ----------
+    rate : np.ndarray or float
+        The annual interest rate(s).
+    months : np.ndarray or int
+        The number(s) of months over which the loans are amortized.
+
+    Returns
+    -------
+    np.ndarray or float
+        The monthly payment per krone borrowed, with the broadcast shape of the inputs.
+        A float is returned for scalar inputs.
+
+    Examples
+    --------
+    >>> round(annuity_factors(0.03, 360), 6)
+    0.004216
+    >>> annuity_factors(np.array([0.03, 0.0326]), 360).round(6)
+    array([0.004216, 0.004358])
+    """
+    # Scalar lookups from the UI are a gather instead of two power operations
+    if np.ndim(rate) == 0 and np.ndim(months) == 0:
+        factor = _scalar_annuity_factor(float(rate), months)
+        if factor is not None:
+            return factor
+
+        if rate == 0:
+            return 1 / months
+
+        # 0-d arrays take NumPy's scalar math path, which can differ in the last bit
+        # from the array loops, so scalars are calculated as one-element arrays
+        return float(_annuity_formula(np.array([rate], dtype=float) / 12, months)[0])
+
+    return _direct_annuity_factors(np.asarray(rate, dtype=float), months)
+
+
+# Monthly rates below this use the series expansion of the rate derivatives around zero
+_SERIES_RATE_LIMIT = 1e-7
+
+
+def annuity_factor_derivatives(
+    rate: np.ndarray | float, months: np.ndarray | float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the first and second derivatives of the annuity factor.
+
+    With i = rate / 12, g = 1 + i and D = 1 - g^-n, the factor is A = i / D. Then
+    dA/di = (D - i n g^(-n-1)) / D^2 and dA/dn = -i ln(g) g^-n / D^2, with the term n
+    treated as continuous. Near a zero rate, where the closed forms cancel, the series
+    A = 1/n + i (n + 1) / 2n + i^2 (n^2 - 1) / 12n is used instead.
+
+    Parameters
+    ----------
+    rate : np.ndarray or float
+        The annual interest rate(s).
+    months : np.ndarray or float
+        The number(s) of months over which the loans are amortized.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        dA/drate, d2A/drate2, dA/dmonths and d2A/dmonths2, with the rate as an annual
+        rate, in the broadcast shape of the inputs.
+
+    Examples
+    --------
+    >>> d_rate, d2_rate, d_months, d2_months = annuity_factor_derivatives(0.0, 360)
+    >>> round(float(d_rate), 6), round(float(d_months * 360**2), 6)
+    (0.041782, -1.0)
+    """
+    monthly_rate = np.asarray(rate, dtype=float) / 12
+    months = np.asarray(months, dtype=float)
+
+    log_growth = np.log1p(monthly_rate)
+    discount = np.exp(-months * log_growth)
+    denominator = -np.expm1(-months * log_growth)
+    small = monthly_rate < _SERIES_RATE_LIMIT
+    safe = np.where(small, 1.0, denominator)
+    growth = 1 + monthly_rate
+
+    # Derivatives with respect to the monthly rate
+    d_denominator = months * discount / growth
+    d_rate = (denominator - monthly_rate * d_denominator) / safe**2
+    d2_rate = (
+        monthly_rate * months * (months + 1) * discount / growth**2 / safe**2
+        - 2 * d_denominator * d_rate / safe
+    )
+    d_rate = np.where(small, (months + 1) / (2 * months), d_rate)
+    d2_rate = np.where(small, (months**2 - 1) / (6 * months), d2_rate)
+
+    # Derivatives with respect to the term, 1 / n at a zero rate
+    zero = monthly_rate == 0
+    safe = np.where(zero, 1.0, denominator)
+    d_months = np.where(
+        zero, -1 / months**2, -monthly_rate * log_growth * discount / safe**2
+    )
+    d2_months = np.where(
+        zero,
+        2 / months**3,
+        monthly_rate * log_growth**2 * discount * (1 + discount) / safe**3,
+    )
+
+    # Chain rule from the monthly to the annual rate
+    return d_rate / 12, d2_rate / 144, d_months, d2_months
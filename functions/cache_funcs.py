@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Persistent cache for calculation results.
+
+st.cache_data lives in the memory of one process and is lost on every restart. The
+cache here stores result frames as Arrow IPC files in a directory that can be shared by
+several worker processes and survive redeploys. Files are named by a hash of the
+function, its arguments and the code and data files the results depend on, written to a temporary file and moved into place, so
+readers never see a partial file. The least recently used files are removed once the
+directory holds more than a byte budget.
+
+The cache is off unless a directory is set with the LEVEKOSTNAD_CACHE_DIR environment
+variable or with configure_cache.
+"""
+
+from pathlib import Path
+import functools
+import hashlib
+import inspect
+import os
+import tempfile
+import time
+import pandas as pd
+import numpy as np
+
+# Environment variables that configure the cache of the app
+CACHE_DIR_ENV = "LEVEKOSTNAD_CACHE_DIR"
+CACHE_MAX_BYTES_ENV = "LEVEKOSTNAD_CACHE_MAX_BYTES"
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 2**20
+
+# Bump to invalidate every entry, e.g. after upgrading a library that changes the results
+CACHE_VERSION = 1
+
+# Files whose contents are part of every key, relative to the project root, so that a
+# redeploy with changed calculations or tables does not serve results of the old code
+CACHE_SOURCE_PATTERNS = ("functions/*.py", "data/*")
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+CACHE_SUFFIX = ".arrow"
+
+# Temporary files older than this were left by a writer that died, in seconds
+STALE_WRITE_SECONDS = 3600
+
+
+class ResultCache:
+    """
+    Content-addressed store of DataFrames on disk with least-recently-used eviction.
+
+    Every entry is one Arrow IPC file. Arrow keeps the dtypes of the frames, including
+    the categorical columns and attrs of compact scenario frames, which Parquet does not.
+    Reading an entry marks it as used by touching its modification time, so the
+    modification times order the entries from least to most recently used across all
+    processes sharing the directory. All file operations are atomic renames or removals,
+    so no lock is needed: a reader either sees a complete file or a miss.
+
+    Parameters
+    ----------
+    directory : str or Path
+        The directory holding the entries. It is created if missing.
+    max_bytes : int, optional
+        The total size of the entries above which the least recently used ones are
+        removed, by default DEFAULT_CACHE_MAX_BYTES.
+
+    Attributes
+    ----------
+    hits : int
+        The number of lookups served from disk by this instance.
+    misses : int
+        The number of lookups not found by this instance.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> Path:
+        """
+        Returns the file of an entry.
+        """
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        """
+        Returns the frame stored under key, or None if there is none.
+
+        Unreadable files, for example from a full disk, are removed and count as misses.
+        """
+        # pyarrow comes with streamlit, but is only needed when the cache is on
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        path = self.path(key)
+        try:
+            table = feather.read_table(path, memory_map=False)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (pa.ArrowInvalid, OSError):
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        # Mark as recently used, the entry may have been evicted in the meantime
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return table.to_pandas()
+
+    def put(self, key: str, df: pd.DataFrame) -> bool:
+        """
+        Stores a frame under key and evicts entries above the byte budget.
+
+        Returns False if the frame could not be written, in which case the cache is
+        left unchanged. A result that cannot be cached is not an error for the caller.
+        """
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        try:
+            fd, temporary = tempfile.mkstemp(
+                dir=self.directory, prefix=f".{key}.", suffix=".tmp"
+            )
+        except OSError:
+            return False
+        os.close(fd)
+        try:
+            feather.write_feather(df, temporary)
+            os.replace(temporary, self.path(key))
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            # Full disk, or columns Arrow cannot store such as mixed object columns
+            return False
+        finally:
+            Path(temporary).unlink(missing_ok=True)
+
+        self.evict()
+        return True
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        """
+        Returns the modification time, size and path of every entry, oldest first.
+        """
+        entries = []
+        for path in self.directory.glob(f"*{CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def total_bytes(self) -> int:
+        """
+        Returns the total size of the entries.
+        """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the total size fits max_bytes.
+
+        Temporary files of writers that died are removed as well. Several processes may
+        evict at once, so entries that are already gone are skipped.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+        stale = time.time() - STALE_WRITE_SECONDS
+        for path in self.directory.glob(".*.tmp"):
+            try:
+                if path.stat().st_mtime < stale:
+                    path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        for _, _, path in self.entries():
+            path.unlink(missing_ok=True)
+
+
+def _update_hash(hasher, value) -> None:
+    """
+    Feed a canonical encoding of value to hasher.
+
+    Arrays, lists, tuples and scalars with the same values hash the same, with integers
+    widened to int64 and floats to float64. Values that are not numbers, strings, None,
+    dicts or sequences of them raise TypeError.
+    """
+    if value is None:
+        hasher.update(b"N")
+    elif isinstance(value, str):
+        encoded = value.encode("utf-8")
+        hasher.update(b"S%d:" % len(encoded) + encoded)
+    elif isinstance(value, dict):
+        hasher.update(b"D%d:" % len(value))
+        for item_key in sorted(value, key=str):
+            _update_hash(hasher, str(item_key))
+            _update_hash(hasher, value[item_key])
+    else:
+        try:
+            array = np.asarray(value)
+        except ValueError:
+            array = np.empty(0, dtype=object)
+
+        if array.dtype.kind in "biu":
+            array = array.astype(np.int64)
+        elif array.dtype.kind == "f":
+            array = array.astype(np.float64)
+        elif isinstance(value, (list, tuple)):
+            # Sequences of strings, or ragged and mixed ones, are hashed element by element
+            hasher.update(b"L%d:" % len(value))
+            for item in value:
+                _update_hash(hasher, item)
+            return
+        elif array.dtype.kind in "UO" and array.ndim > 0:
+            _update_hash(hasher, array.tolist())
+            return
+        else:
+            raise TypeError(f"Cannot hash a value of type {type(value).__name__}")
+
+        hasher.update(f"{array.dtype.kind}{array.shape}:".encode())
+        hasher.update(np.ascontiguousarray(array).tobytes())
+
+
+@functools.lru_cache(maxsize=None)
+def _source_digest() -> str:
+    """
+    Hash of the files in CACHE_SOURCE_PATTERNS, so editing any calculation module or data
+    file invalidates every entry. Computed once per process.
+    """
+    hasher = hashlib.sha256()
+    paths = sorted(
+        path
+        for pattern in CACHE_SOURCE_PATTERNS
+        for path in PROJECT_ROOT.glob(pattern)
+        if path.is_file()
+    )
+    for path in paths:
+        _update_hash(hasher, path.relative_to(PROJECT_ROOT).as_posix())
+        hasher.update(hashlib.sha256(path.read_bytes()).digest())
+    return hasher.hexdigest()
+
+
+def cache_key(func, arguments: dict) -> str:
+    """
+    Calculate the cache key of a call from the function and its bound arguments.
+
+    The key also covers the contents of the files in CACHE_SOURCE_PATTERNS.
+
+    Parameters
+    ----------
+    func : callable
+        The cached function.
+    arguments : dict
+        The arguments by parameter name, with defaults applied.
+
+    Returns
+    -------
+    str
+        A hex digest that is the same for equal arguments in every process.
+
+    Raises
+    ------
+    TypeError
+        If an argument cannot be hashed.
+
+    Examples
+    --------
+    >>> cache_key(cache_key, {"x": [1, 2]}) == cache_key(cache_key, {"x": np.array([1, 2])})
+    True
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"{CACHE_VERSION}:{func.__module__}.{func.__qualname__}:".encode())
+    hasher.update(_source_digest().encode())
+    _update_hash(hasher, arguments)
+    return hasher.hexdigest()
+
+
+_active_cache: ResultCache | None = None
+_configured = False
+
+
+def configure_cache(
+    directory: str | Path | None = None, max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+) -> ResultCache | None:
+    """
+    Turn the persistent cache on in a directory, or off with None.
+
+    Parameters
+    ----------
+    directory : str or Path, optional
+        The cache directory, by default None which turns the cache off.
+    max_bytes : int, optional
+        The byte budget of the cache, by default DEFAULT_CACHE_MAX_BYTES.
+
+    Returns
+    -------
+    ResultCache or None
+        The active cache.
+    """
+    global _active_cache, _configured
+    _active_cache = ResultCache(directory, max_bytes) if directory is not None else None
+    _configured = True
+    return _active_cache
+
+
+def active_cache() -> ResultCache | None:
+    """
+    Returns the active cache, configured from the environment on first use.
+    """
+    if not _configured:
+        directory = os.environ.get(CACHE_DIR_ENV) or None
+        max_bytes = int(os.environ.get(CACHE_MAX_BYTES_ENV, DEFAULT_CACHE_MAX_BYTES))
+        configure_cache(directory, max_bytes)
+    return _active_cache
+
+
+def persistent_cache(func):
+    """
+    Decorator that serves the DataFrame results of func from the active cache.
+
+    Without an active cache, or with arguments that cannot be hashed, func is called
+    directly. Results that are not DataFrames are returned without being stored.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache = active_cache()
+        if cache is None:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            key = cache_key(func, bound.arguments)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        result = cache.get(key)
+        if result is None:
+            result = func(*args, **kwargs)
+            if isinstance(result, pd.DataFrame):
+                cache.put(key, result)
+        return result
+
+    return wrapper
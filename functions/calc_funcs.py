@@ -6,18 +6,42 @@ Created on Mon Sep  2 2024
 """
 
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
 import sys
+import threading
 import pandas as pd
 import numpy as np
-import numpy_financial as npf
 from itertools import product
+from typing import NamedTuple
 
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
+from functions.allocation_funcs import (  # noqa: E402
+    SHARED_COSTS,
+    allocate_costs,
+    allocation_matrix,
+    owner_labels,
+    owner_total_column,
+    two_owner_shares,
+)
+from functions.accel_funcs import (  # noqa: E402
+    amortization_schedule_arrays,
+    electricity_cost_array,
+    resolve_backend,
+)
+from functions.annuity_table import annuity_factors  # noqa: E402
+from functions.cache_funcs import persistent_cache  # noqa: E402
+
 
 def calculate_amortization_schedule(
-    loan_amount: int | float, annual_interest_rate: int | float, loan_term_months: int
+    loan_amount: int | float,
+    annual_interest_rate: int | float,
+    loan_term_months: int,
+    loan_type: str = "annuity",
 ):
     """
     Calculate the amortization schedule for a loan, including the initial state.
@@ -33,6 +57,8 @@ def calculate_amortization_schedule(
         The annual interest rate of the loan, expressed as a decimal (e.g., 0.05 for 5%).
     loan_term_months : int
         The total number of months for the loan term.
+    loan_type : str, optional
+        One of LOAN_TYPES, by default 'annuity'.
 
     Returns
     -------
@@ -46,7 +72,7 @@ def calculate_amortization_schedule(
 
     Notes
     -----
-    - The function uses NumPy financial functions (npf) for calculations.
+    - The function uses the closed-form annuity_kernel or serial_kernel for calculations.
     - All monetary values in the returned DataFrame are rounded to the nearest whole number.
     - The initial state (t=0) is included, where no payments have been made.
 
@@ -64,31 +90,584 @@ def calculate_amortization_schedule(
     3      3       838      2495            199162        3333
     4      4      1119      3324            198881        4443
     """
-    monthly_interest_rate = annual_interest_rate / 12
-    per = np.arange(loan_term_months) + 1
-    
-    # Calculates interest and principal per period
-    interest_pmt = npf.ipmt(monthly_interest_rate, per, loan_term_months, loan_amount) * -1
-    principal_pmt = npf.ppmt(monthly_interest_rate, per, loan_term_months, loan_amount) * -1
-    
-    # Prepend zeros for the initial state
-    cumulative_interest = np.insert(interest_pmt.cumsum(), 0, 0).round(0)
-    cumulative_principal = np.insert(principal_pmt.cumsum(), 0, 0).round(0)
-    cumulative_total = cumulative_principal + cumulative_interest
-    
-    # Calculate remaining balance including initial state
-    remaining_balance = np.insert(np.repeat(loan_amount, loan_term_months) - cumulative_principal[1:], 0, loan_amount)
-    
-    df = pd.DataFrame(
-        {
-            "Month": np.arange(loan_term_months + 1),
-            "Principal": cumulative_principal,
-            "Interest": cumulative_interest,
-            "Remaining Balance": remaining_balance,
-            "Total Paid": cumulative_total,
-        }
+    schedules = calculate_amortization_schedules_batched(
+        loan_amount, annual_interest_rate, loan_term_months, loan_type
+    )
+    return schedules.to_frame(())
+
+
+# Supported repayment profiles. Annuity loans (annuitetslån) have a constant payment,
+# serial loans (serielån) a constant principal and a payment that falls over time.
+LOAN_TYPES = ("annuity", "serial")
+
+
+def serial_loans(loan_type: str | np.ndarray) -> np.ndarray:
+    """
+    Check loan types against LOAN_TYPES and mark the serial loans.
+
+    Parameters
+    ----------
+    loan_type : str or np.ndarray
+        One loan type, or an array of loan types.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array with the shape of loan_type, True for serial loans.
+
+    Raises
+    ------
+    ValueError
+        If a loan type is not in LOAN_TYPES.
+    """
+    if isinstance(loan_type, str):
+        # Single loan types come from the row loops, where np.isin dominates the cost
+        if loan_type not in LOAN_TYPES:
+            raise ValueError(f"Unknown loan type {loan_type!r}, expected one of {LOAN_TYPES}")
+        return np.asarray(loan_type == "serial")
+
+    loan_type = np.asarray(loan_type)
+    unknown = ~np.isin(loan_type, LOAN_TYPES)
+    if unknown.any():
+        raise ValueError(
+            f"Unknown loan type {loan_type[unknown].ravel()[0]!r}, expected one of {LOAN_TYPES}"
+        )
+    return loan_type == "serial"
+
+
+def annuity_kernel(
+    loan_amounts: np.ndarray | float,
+    annual_interest_rates: np.ndarray | float,
+    loan_term_months: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the monthly payment and the remaining balance path of annuity loans in closed form.
+
+    The payment is computed once per loan, and the balance after k payments follows from
+    the geometric recurrence of the annuity,
+
+        B_k = L * ((1 + r)^n - (1 + r)^k) / ((1 + r)^n - 1),
+
+    evaluated with expm1/log1p so that small monthly rates keep full precision. Loans
+    with a zero rate are amortized linearly, B_k = L * (n - k) / n.
+
+    Parameters
+    ----------
+    loan_amounts : np.ndarray or float
+        The initial amount(s) of the loans.
+    annual_interest_rates : np.ndarray or float
+        The annual interest rate(s), expressed as decimals (e.g., 0.05 for 5%).
+    loan_term_months : int
+        The total number of months for the loan term.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The monthly payment with the broadcast shape of the inputs, and the remaining
+        balance with shape (*batch_shape, loan_term_months + 1), starting at t=0.
+
+    Examples
+    --------
+    >>> payment, balance = annuity_kernel(200000, 0.05, 360)
+    >>> round(float(payment), 2), balance[[0, 1, 360]].round(0)
+    (1073.64, array([200000., 199760.,      0.]))
+    """
+    loan_amounts, annual_interest_rates = np.broadcast_arrays(
+        np.asarray(loan_amounts, dtype=float), np.asarray(annual_interest_rates, dtype=float)
+    )
+    loan = loan_amounts[..., np.newaxis]
+    monthly_rate = annual_interest_rates[..., np.newaxis] / 12
+    months = np.arange(loan_term_months + 1)
+
+    zero_rate = monthly_rate == 0
+    log_growth = np.log1p(monthly_rate)
+
+    # (1 + r)^k - 1 for every month, and (1 + r)^n - 1 for the full term
+    growth_m1 = np.expm1(months * log_growth)
+    term_growth_m1 = growth_m1[..., -1:]
+    safe_term_growth_m1 = np.where(zero_rate, 1.0, term_growth_m1)
+
+    remaining_balance = np.where(
+        zero_rate,
+        loan * (loan_term_months - months) / loan_term_months,
+        loan * (term_growth_m1 - growth_m1) / safe_term_growth_m1,
+    )
+    payment = np.where(
+        zero_rate,
+        loan / loan_term_months,
+        loan * monthly_rate * (term_growth_m1 + 1) / safe_term_growth_m1,
+    )
+    # Pin the initial state to the loan amount itself rather than L * E_n / E_n
+    remaining_balance[..., 0] = loan_amounts
+
+    return payment[..., 0], remaining_balance
+
+
+def serial_kernel(
+    loan_amounts: np.ndarray | float,
+    annual_interest_rates: np.ndarray | float,
+    loan_term_months: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the monthly payments and the remaining balance path of serial loans in closed form.
+
+    A serial loan repays the same principal L / n every month, so the balance falls
+    linearly, B_k = L * (n - k) / n, and the payment of month k is the principal plus
+    the interest on the balance after the previous month,
+
+        P_k = L / n + r * L * (n - k + 1) / n.
+
+    Parameters
+    ----------
+    loan_amounts : np.ndarray or float
+        The initial amount(s) of the loans.
+    annual_interest_rates : np.ndarray or float
+        The annual interest rate(s), expressed as decimals (e.g., 0.05 for 5%).
+    loan_term_months : int
+        The total number of months for the loan term.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The payment of every month with shape (*batch_shape, loan_term_months), and the
+        remaining balance with shape (*batch_shape, loan_term_months + 1), starting at t=0.
+
+    Examples
+    --------
+    >>> payments, balance = serial_kernel(240000, 0.05, 240)
+    >>> payments[[0, 1, 239]].round(2), balance[[0, 1, 240]]
+    (array([2000.  , 1995.83, 1004.17]), array([240000., 239000.,      0.]))
+    """
+    loan_amounts, annual_interest_rates = np.broadcast_arrays(
+        np.asarray(loan_amounts, dtype=float), np.asarray(annual_interest_rates, dtype=float)
+    )
+    loan = loan_amounts[..., np.newaxis]
+    monthly_rate = annual_interest_rates[..., np.newaxis] / 12
+    months = np.arange(loan_term_months + 1)
+
+    remaining_balance = loan * (loan_term_months - months) / loan_term_months
+    payments = loan / loan_term_months + monthly_rate * remaining_balance[..., :-1]
+
+    return payments, remaining_balance
+
+
+class AmortizationSchedules(NamedTuple):
+    """
+    Dense amortization schedules for a batch of loans.
+
+    Every field except month has shape (*batch_shape, loan_term_months + 1), where the
+    last axis is the month number starting at the initial state (t=0). Row i of a
+    one-dimensional batch holds the same values as the corresponding columns of
+    calculate_amortization_schedule.
+
+    Attributes
+    ----------
+    month : np.ndarray
+        The month numbers, 0 to loan_term_months.
+    principal : np.ndarray
+        Cumulative principal paid up to each month.
+    interest : np.ndarray
+        Cumulative interest paid up to each month.
+    remaining_balance : np.ndarray
+        The remaining loan balance after each month's payment.
+    total_paid : np.ndarray
+        The total amount paid (principal + interest) up to each month.
+    """
+
+    month: np.ndarray
+    principal: np.ndarray
+    interest: np.ndarray
+    remaining_balance: np.ndarray
+    total_paid: np.ndarray
+
+    def to_frame(self, index: int | tuple = 0) -> pd.DataFrame:
+        """
+        Extract the schedule of one loan in the format of calculate_amortization_schedule.
+
+        Parameters
+        ----------
+        index : int or tuple, optional
+            Position of the loan in the batch, by default 0.
+
+        Returns
+        -------
+        pd.DataFrame
+            The amortization schedule of the selected loan.
+        """
+        return pd.DataFrame(
+            {
+                "Month": self.month,
+                "Principal": self.principal[index],
+                "Interest": self.interest[index],
+                "Remaining Balance": self.remaining_balance[index],
+                "Total Paid": self.total_paid[index],
+            }
+        )
+
+
+def calculate_amortization_schedules_batched(
+    loan_amounts: np.ndarray | float,
+    annual_interest_rates: np.ndarray | float,
+    loan_term_months: int,
+    loan_type: str | np.ndarray = "annuity",
+    backend: str | None = None,
+) -> AmortizationSchedules:
+    """
+    Calculate amortization schedules for many loans and interest rates in one vectorized pass.
+
+    Loan amounts and rates are broadcast against each other, so passing house prices as
+    a column and rates as a row gives the schedules of the whole grid. The values match
+    calculate_amortization_schedule for every loan in the batch. The loan type may be
+    an array as well, which is broadcast against the loan amounts and rates like they
+    are against each other. To compare both types for every loan, give the types their
+    own axis, e.g. loan_type=np.array(LOAN_TYPES)[:, np.newaxis] with a row of loans.
+
+    Large batches run on the compiled kernel of accel_funcs when Numba is installed,
+    with bit-for-bit the same results as the NumPy code here.
+
+    Parameters
+    ----------
+    loan_amounts : np.ndarray or float
+        The initial amount(s) of the loans.
+    annual_interest_rates : np.ndarray or float
+        The annual interest rate(s), expressed as decimals (e.g., 0.05 for 5%).
+    loan_term_months : int
+        The total number of months for the loan term.
+    loan_type : str or np.ndarray, optional
+        One of LOAN_TYPES, or an array of them, by default 'annuity'.
+    backend : str, optional
+        One of accel_funcs.BACKENDS, by default None which picks one with
+        resolve_backend.
+
+    Returns
+    -------
+    AmortizationSchedules
+        Cumulative principal, interest, total paid and remaining balance, each of shape
+        (*batch_shape, loan_term_months + 1).
+
+    Examples
+    --------
+    >>> schedules = calculate_amortization_schedules_batched(
+    ...     np.array([200000, 100000]), 0.05, 360
+    ... )
+    >>> schedules.remaining_balance.shape
+    (2, 361)
+    >>> schedules.interest[:, 1]
+    array([833., 417.])
+    >>> calculate_amortization_schedules_batched(
+    ...     200000, 0.05, 360, np.array(["annuity", "serial"])
+    ... ).interest[:, -1]
+    array([186512., 150417.])
+    """
+    serial = serial_loans(loan_type)
+    batch_size = np.broadcast(
+        np.asarray(loan_amounts), np.asarray(annual_interest_rates), serial
+    ).size
+    backend = resolve_backend(backend, batch_size * (loan_term_months + 1))
+    if backend != "numpy":
+        return AmortizationSchedules(
+            np.arange(loan_term_months + 1),
+            *amortization_schedule_arrays(
+                loan_amounts, annual_interest_rates, loan_term_months, serial, backend
+            ),
+        )
+
+    if serial.any() and not serial.all():
+        # Mixed loan types, evaluate both repayment profiles and pick one per loan
+        annuity_schedules = calculate_amortization_schedules_batched(
+            loan_amounts, annual_interest_rates, loan_term_months, "annuity", "numpy"
+        )
+        serial_schedules = calculate_amortization_schedules_batched(
+            loan_amounts, annual_interest_rates, loan_term_months, "serial", "numpy"
+        )
+        return AmortizationSchedules(
+            annuity_schedules.month,
+            *(
+                np.where(serial[..., np.newaxis], serial_field, annuity_field)
+                for annuity_field, serial_field in zip(
+                    annuity_schedules[1:], serial_schedules[1:]
+                )
+            ),
+        )
+
+    months = np.arange(loan_term_months + 1)
+    if serial.any():
+        _, remaining_balance = serial_kernel(
+            loan_amounts, annual_interest_rates, loan_term_months
+        )
+        batch_shape = remaining_balance.shape[:-1]
+        loan = np.broadcast_to(np.asarray(loan_amounts), batch_shape)[..., np.newaxis]
+        monthly_rate = np.asarray(annual_interest_rates)[..., np.newaxis] / 12
+
+        # Interest is charged on a linearly falling balance, which sums to
+        # r * L * k * (2n - k + 1) / 2n after k months
+        cumulative_interest = (
+            monthly_rate * loan * months * (2 * loan_term_months - months + 1)
+            / (2 * loan_term_months)
+        ).round(0)
+    else:
+        payment, remaining_balance = annuity_kernel(
+            loan_amounts, annual_interest_rates, loan_term_months
+        )
+        batch_shape = payment.shape
+        loan = np.broadcast_to(np.asarray(loan_amounts), batch_shape)[..., np.newaxis]
+
+        # Cumulative interest is what has been paid in total minus the reduction in balance
+        cumulative_interest = (
+            payment[..., np.newaxis] * months - (loan - remaining_balance)
+        ).round(0)
+
+    # Cumulative principal is the reduction in balance
+    cumulative_principal = (loan - remaining_balance).round(0)
+
+    # An array of one loan type adds its own axes to the batch
+    if serial.ndim > 0:
+        shape = (*np.broadcast_shapes(batch_shape, serial.shape), loan_term_months + 1)
+        cumulative_principal = np.broadcast_to(cumulative_principal, shape).copy()
+        cumulative_interest = np.broadcast_to(cumulative_interest, shape).copy()
+        loan = np.broadcast_to(loan, shape)
+
+    return AmortizationSchedules(
+        month=months,
+        principal=cumulative_principal,
+        interest=cumulative_interest,
+        remaining_balance=loan - cumulative_principal,
+        total_paid=cumulative_principal + cumulative_interest,
+    )
+
+
+def stack_rate_paths(paths: list[tuple[list, list]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Stack piecewise rate paths with different numbers of rate changes into arrays.
+
+    Shorter paths are padded by repeating their last change, which adds empty
+    segments and leaves the schedules unchanged.
+
+    Parameters
+    ----------
+    paths : list[tuple[list, list]]
+        One (change_months, rates) pair per path, see piecewise_annuity_kernel.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The change months and rates, both of shape (len(paths), most changes).
+
+    Examples
+    --------
+    >>> change_months, rates = stack_rate_paths([([0], [0.05]), ([0, 24], [0.05, 0.04])])
+    >>> change_months
+    array([[ 0,  0],
+           [ 0, 24]])
+    """
+    n_changes = max(len(change_months) for change_months, _ in paths)
+    change_months = np.empty((len(paths), n_changes), dtype=np.int64)
+    rates = np.empty((len(paths), n_changes))
+    for i, (path_months, path_rates) in enumerate(paths):
+        pad = n_changes - len(path_months)
+        change_months[i] = np.r_[path_months, np.repeat(path_months[-1], pad)]
+        rates[i] = np.r_[path_rates, np.repeat(path_rates[-1], pad)]
+    return change_months, rates
+
+
+def piecewise_annuity_kernel(
+    loan_amounts: np.ndarray | float,
+    change_months: np.ndarray,
+    annual_interest_rates: np.ndarray,
+    loan_term_months: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the payments and balances of annuity loans whose rate changes over time.
+
+    At every rate change the payment is recalculated as the annuity of the remaining
+    balance over the remaining term, as banks do for floating-rate loans. Between
+    changes the closed form of annuity_kernel applies, so only the opening balance of
+    each segment is carried forward step by step, and all months are then evaluated
+    in one vectorized pass, with no loop over months. Loans and rate
+    paths are broadcast against each other, e.g. loans of shape (L, 1) and paths of
+    shape (P, K) give schedules for every loan on every path.
+
+    Parameters
+    ----------
+    loan_amounts : np.ndarray or float
+        The initial amount(s) of the loans.
+    change_months : np.ndarray
+        Array of shape (..., K) with the months at which each rate takes effect, in
+        non-decreasing order. The first change must be at month 0. A rate that takes
+        effect at month s applies to the payments from month s + 1 on.
+    annual_interest_rates : np.ndarray
+        Array of shape (..., K) with the annual rate from each change month, as decimals.
+    loan_term_months : int
+        The total number of months for the loan term.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        The payment of every month with shape (*batch_shape, loan_term_months), and the
+        remaining balance and cumulative amount paid with shape
+        (*batch_shape, loan_term_months + 1), starting at t=0.
+
+    Raises
+    ------
+    ValueError
+        If the first change is not at month 0 or the change months decrease.
+
+    Examples
+    --------
+    >>> payment, balance, paid = piecewise_annuity_kernel(
+    ...     3000000, np.array([0, 24]), np.array([0.05, 0.04]), 360
+    ... )
+    >>> payment[[0, 23, 24]].round(2)
+    array([16104.65, 16104.65, 14406.78])
+    """
+    change_months = np.asarray(change_months, dtype=np.int64)
+    annual_interest_rates = np.asarray(annual_interest_rates, dtype=float)
+    if change_months.ndim == 0 or change_months.shape[-1] == 0:
+        raise ValueError("Rate paths need at least one change month")
+    if (change_months[..., 0] != 0).any() or (np.diff(change_months, axis=-1) < 0).any():
+        raise ValueError("Change months must start at 0 and be non-decreasing")
+
+    loan_amounts = np.asarray(loan_amounts, dtype=float)
+    batch_shape = np.broadcast_shapes(
+        loan_amounts.shape, change_months.shape[:-1], annual_interest_rates.shape[:-1]
+    )
+    n_changes = change_months.shape[-1]
+    batch_size = int(np.prod(batch_shape))
+    starts = np.minimum(change_months, loan_term_months)
+    starts = np.broadcast_to(starts, (*batch_shape, n_changes)).reshape(batch_size, n_changes)
+    monthly_rates = np.broadcast_to(
+        annual_interest_rates / 12, (*batch_shape, n_changes)
+    ).reshape(batch_size, n_changes)
+    ends = np.concatenate([starts[:, 1:], np.full((batch_size, 1), loan_term_months)], axis=1)
+
+    # Annuity terms of every segment, over the term remaining at its start
+    zero_rate = monthly_rates == 0
+    log_growth = np.log1p(monthly_rates)
+    remaining_terms = loan_term_months - starts
+    term_growth_m1 = np.expm1(remaining_terms * log_growth)
+    safe_term_growth_m1 = np.where(zero_rate | (remaining_terms == 0), 1.0, term_growth_m1)
+    safe_terms = np.maximum(remaining_terms, 1)
+    segment_months = ends - starts
+    end_growth_m1 = np.expm1(segment_months * log_growth)
+
+    # Carry the balance and amount paid from one segment to the next, one step per change
+    opening_balance = np.empty((batch_size, n_changes))
+    opening_paid = np.empty((batch_size, n_changes))
+    segment_payment = np.empty((batch_size, n_changes))
+    balance = np.broadcast_to(loan_amounts, batch_shape).reshape(batch_size)
+    paid = np.zeros(batch_size)
+    for j in range(n_changes):
+        opening_balance[:, j] = balance
+        opening_paid[:, j] = paid
+        segment_payment[:, j] = np.where(
+            zero_rate[:, j],
+            balance / safe_terms[:, j],
+            balance * monthly_rates[:, j] * (term_growth_m1[:, j] + 1) / safe_term_growth_m1[:, j],
+        )
+        paid = paid + segment_payment[:, j] * segment_months[:, j]
+        balance = np.where(
+            zero_rate[:, j],
+            balance * (remaining_terms[:, j] - segment_months[:, j]) / safe_terms[:, j],
+            balance * (term_growth_m1[:, j] - end_growth_m1[:, j]) / safe_term_growth_m1[:, j],
+        )
+
+    # Segment of every month: the last change before it, counted with one bincount
+    months = np.arange(1, loan_term_months + 1)
+    change_counts = np.bincount(
+        (np.arange(batch_size)[:, np.newaxis] * (loan_term_months + 1) + starts).ravel(),
+        minlength=batch_size * (loan_term_months + 1),
+    ).reshape(batch_size, loan_term_months + 1)
+    segment = np.cumsum(change_counts[:, :-1], axis=1) - 1
+    segment += np.arange(batch_size)[:, np.newaxis] * n_changes
+
+    def per_month(values: np.ndarray) -> np.ndarray:
+        return values.ravel()[segment]
+
+    # Closed-form balance within each month's segment, from the segment's opening balance
+    elapsed = months - per_month(starts)
+    growth_m1 = np.expm1(elapsed * per_month(log_growth))
+    balance = per_month(opening_balance)
+    payments = per_month(segment_payment)
+
+    remaining_balance = np.empty((batch_size, loan_term_months + 1))
+    cumulative_paid = np.empty((batch_size, loan_term_months + 1))
+    remaining_balance[:, 0] = np.broadcast_to(loan_amounts, batch_shape).reshape(batch_size)
+    cumulative_paid[:, 0] = 0
+    remaining_balance[:, 1:] = np.where(
+        per_month(zero_rate),
+        balance * (per_month(remaining_terms) - elapsed) / per_month(safe_terms),
+        balance * (per_month(term_growth_m1) - growth_m1) / per_month(safe_term_growth_m1),
+    )
+    cumulative_paid[:, 1:] = per_month(opening_paid) + payments * elapsed
+
+    return (
+        payments.reshape(*batch_shape, loan_term_months),
+        remaining_balance.reshape(*batch_shape, loan_term_months + 1),
+        cumulative_paid.reshape(*batch_shape, loan_term_months + 1),
+    )
+
+
+def calculate_piecewise_rate_schedules(
+    loan_amounts: np.ndarray | float,
+    change_months: np.ndarray,
+    annual_interest_rates: np.ndarray,
+    loan_term_months: int,
+) -> AmortizationSchedules:
+    """
+    Calculate amortization schedules for loans whose rate changes at given months.
+
+    The payment is re-annuitized at every rate change, see piecewise_annuity_kernel.
+    With a single rate the schedules equal calculate_amortization_schedules_batched.
+
+    Parameters
+    ----------
+    loan_amounts : np.ndarray or float
+        The initial amount(s) of the loans.
+    change_months : np.ndarray
+        Array of shape (..., K) with the months at which each rate takes effect,
+        starting at 0.
+    annual_interest_rates : np.ndarray
+        Array of shape (..., K) with the annual rate from each change month, as decimals.
+    loan_term_months : int
+        The total number of months for the loan term.
+
+    Returns
+    -------
+    AmortizationSchedules
+        Cumulative principal, interest, total paid and remaining balance, each of shape
+        (*batch_shape, loan_term_months + 1).
+
+    Examples
+    --------
+    Compare a 1pp rate cut after two years with a 1pp rise for two house prices:
+
+    >>> change_months, rates = stack_rate_paths(
+    ...     [([0, 24], [0.05, 0.04]), ([0, 24], [0.05, 0.06])]
+    ... )
+    >>> schedules = calculate_piecewise_rate_schedules(
+    ...     np.array([[2000000], [3000000]]), change_months, rates, 360
+    ... )
+    >>> schedules.interest[..., -1]
+    array([[1484794., 2266215.],
+           [2227191., 3399323.]])
+    """
+    _, remaining_balance, cumulative_paid = piecewise_annuity_kernel(
+        loan_amounts, change_months, annual_interest_rates, loan_term_months
+    )
+    loan = np.broadcast_to(
+        np.asarray(loan_amounts, dtype=float), remaining_balance.shape[:-1]
+    )[..., np.newaxis]
+
+    cumulative_principal = (loan - remaining_balance).round(0)
+    cumulative_interest = (cumulative_paid - (loan - remaining_balance)).round(0)
+
+    return AmortizationSchedules(
+        month=np.arange(loan_term_months + 1),
+        principal=cumulative_principal,
+        interest=cumulative_interest,
+        remaining_balance=loan - cumulative_principal,
+        total_paid=cumulative_principal + cumulative_interest,
     )
-    return df
 
 
 def calculate_govt_support(
@@ -177,6 +756,117 @@ def calculate_electricity_costs(
     return costs - govt_support_amount
 
 
+def calculate_govt_support_array(
+    kwh_usage: np.ndarray | float,
+    kwh_price_incl_vat_nok: np.ndarray | float,
+    govt_support_limit_nok: float = 0.9125,
+) -> np.ndarray:
+    """
+    Calculate the government support for arrays of electricity usages and prices.
+
+    Array version of calculate_govt_support. Usage and price may have any shapes that
+    broadcast against each other, and the 5000 kWh cap is applied as a mask.
+
+    Parameters
+    ----------
+    kwh_usage : np.ndarray or float
+        The electricity usage(s) in kWh.
+    kwh_price_incl_vat_nok : np.ndarray or float
+        The price(s) of electricity per kWh, including VAT, in NOK.
+    govt_support_limit_nok : float, optional
+        The government support limit price per kWh in NOK, by default 0.9125.
+
+    Returns
+    -------
+    np.ndarray
+        The government support in NOK, with the broadcast shape of the inputs.
+
+    Examples
+    --------
+    >>> calculate_govt_support_array(np.array([100, 6000]), 1.5)
+    array([52.875,  0.   ])
+    """
+    kwh_usage = np.asarray(kwh_usage)
+    kwh_price_incl_vat_nok = np.asarray(kwh_price_incl_vat_nok)
+
+    return np.where(
+        kwh_usage <= 5000,
+        (kwh_usage * (kwh_price_incl_vat_nok - govt_support_limit_nok)) * 0.9,
+        0.0,
+    )
+
+
+def calculate_electricity_costs_array(
+    kwh_usage: np.ndarray | float,
+    kwh_price_incl_vat_nok: np.ndarray | float,
+    markup_nok: np.ndarray | float,
+    fixed_cost_nok: np.ndarray | float,
+    govt_support_limit_nok: float = 0.9125,
+    backend: str | None = None,
+) -> np.ndarray:
+    """
+    Calculate the total cost of electricity for arrays of usages and prices.
+
+    Array version of calculate_electricity_costs. All inputs are broadcast against each
+    other, so passing usage as a column and price as a row returns the full cost grid.
+    Support is only deducted where the price exceeds the support limit. Large grids run
+    on the compiled kernel of accel_funcs when Numba is installed.
+
+    Parameters
+    ----------
+    kwh_usage : np.ndarray or float
+        The electricity usage(s) in kWh.
+    kwh_price_incl_vat_nok : np.ndarray or float
+        The price(s) of electricity per kWh, including VAT, in NOK.
+    markup_nok : np.ndarray or float
+        The additional markup cost per kWh in NOK.
+    fixed_cost_nok : np.ndarray or float
+        The fixed cost of electricity in NOK.
+    govt_support_limit_nok : float, optional
+        The government support limit price per kWh in NOK, by default 0.9125.
+    backend : str, optional
+        One of accel_funcs.BACKENDS, by default None which picks one with
+        resolve_backend.
+
+    Returns
+    -------
+    np.ndarray
+        The total cost of electricity in NOK, with the broadcast shape of the inputs.
+
+    Examples
+    --------
+    >>> calculate_electricity_costs_array(np.array([[1000], [6000]]), np.array([0.5, 1.5]), 0.1, 100)
+    array([[ 700.  , 1171.25],
+           [3700.  , 9700.  ]])
+    """
+    kwh_usage = np.asarray(kwh_usage)
+    kwh_price_incl_vat_nok = np.asarray(kwh_price_incl_vat_nok)
+
+    size = np.broadcast(
+        kwh_usage, kwh_price_incl_vat_nok, np.asarray(markup_nok), np.asarray(fixed_cost_nok)
+    ).size
+    backend = resolve_backend(backend, size)
+    if backend != "numpy":
+        return electricity_cost_array(
+            kwh_usage, kwh_price_incl_vat_nok, markup_nok, fixed_cost_nok,
+            govt_support_limit_nok, backend,
+        )
+
+    # Calculates cost without any govt support
+    costs = fixed_cost_nok + (kwh_usage * (kwh_price_incl_vat_nok + markup_nok))
+
+    govt_support_amount = calculate_govt_support_array(
+        kwh_usage, kwh_price_incl_vat_nok, govt_support_limit_nok
+    )
+
+    return np.where(
+        kwh_price_incl_vat_nok <= govt_support_limit_nok,
+        costs,
+        costs - govt_support_amount,
+    )
+
+
+@persistent_cache
 def scenario_analysis_electricity_costs(
     kwh_usage_range: np.ndarray,
     kwh_price_range: np.ndarray,
@@ -205,36 +895,82 @@ def scenario_analysis_electricity_costs(
     pd.DataFrame
         A DataFrame with columns for kWh usage, kWh price, and the total cost of electricity.
     """
-    # Prepare the result list
-    scenarios = []
+    kwh_usage_range = np.asarray(kwh_usage_range)
+    kwh_price_range = np.asarray(kwh_price_range)
+
+    # Evaluate the whole usage x price grid in one kernel call, usage along the rows
+    total_cost = calculate_electricity_costs_array(
+        kwh_usage_range[:, np.newaxis],
+        kwh_price_range[np.newaxis, :],
+        markup_nok,
+        fixed_cost_nok,
+        govt_support_limit_nok,
+    )
+
+    # Flatten in row-major order so usage is the outer and price the inner loop
+    return pd.DataFrame(
+        {
+            "kWh Usage": np.repeat(kwh_usage_range, kwh_price_range.size),
+            "kWh Price (NOK)": np.tile(kwh_price_range, kwh_usage_range.size),
+            "Total Cost (NOK)": total_cost.ravel(),
+        }
+    )
 
-    # Iterate over all combinations of kWh usage and kWh price
-    for kwh_usage in kwh_usage_range:
-        for kwh_price in kwh_price_range:
-            # Calculate total cost using the function
-            total_cost = calculate_electricity_costs(
-                kwh_usage, kwh_price, markup_nok, fixed_cost_nok, govt_support_limit_nok
-            )
-            # Append each scenario's result to the list
-            scenarios.append(
-                {
-                    "kWh Usage": kwh_usage,
-                    "kWh Price (NOK)": kwh_price,
-                    "Total Cost (NOK)": total_cost,
-                }
-            )
 
-    # Convert the list of dictionaries to a DataFrame for easier analysis and visualization
-    return pd.DataFrame(scenarios)
+def first_payment_factors(
+    rate: np.ndarray | float,
+    months: np.ndarray | int,
+    loan_type: str | np.ndarray = "annuity",
+) -> np.ndarray | float:
+    """
+    Calculate the first monthly payment per krone of loan.
+
+    For annuity loans this is the annuity factor, which applies to every month. Serial
+    loans pay the principal 1 / months plus a month of interest on the full loan, so
+    their first payment is also their largest. All inputs are broadcast against each
+    other, so loan types can be one more axis of a grid.
+
+    Parameters
+    ----------
+    rate : np.ndarray or float
+        The annual interest rate(s).
+    months : np.ndarray or int
+        The number of months over which the loan(s) will be amortized.
+    loan_type : str or np.ndarray, optional
+        One of LOAN_TYPES, or an array of them, by default 'annuity'.
+
+    Returns
+    -------
+    np.ndarray or float
+        The payment factors with the broadcast shape of the inputs.
+
+    Examples
+    --------
+    >>> first_payment_factors(0.06, 240, np.array(["annuity", "serial"])).round(5)
+    array([0.00716, 0.00917])
+    """
+    serial = serial_loans(loan_type)
+    factors = annuity_factors(rate, months)
+    if serial.any():
+        factors = np.where(serial, 1 / np.asarray(months) + np.asarray(rate) / 12, factors)
+    return factors
 
 
 def loan_calc(
-    loan: np.ndarray | float, rate: np.ndarray | float, months: int
+    loan: np.ndarray | float,
+    rate: np.ndarray | float,
+    months: int,
+    loan_type: str = "annuity",
 ) -> np.ndarray | float:
     """
     Calculate the monthly payment for given loan amounts with given interest rates over a specified number of months.
     Supports broadcasting between loan amounts and interest rates.
 
+    A single rate on the 0.25pp grid between 0 and 20% with a term of 1-480 months is
+    read from the precomputed annuity factor table, other inputs are calculated directly.
+    A zero rate gives the linear payment loan / months. For serial loans the payment
+    falls every month, and the first and largest payment is returned.
+
     Parameters
     ----------
     loan : np.ndarray or float
@@ -243,6 +979,8 @@ def loan_calc(
         The annual interest rate(s).
     months : int
         The number of months over which the loan(s) will be amortized.
+    loan_type : str, optional
+        One of LOAN_TYPES, by default 'annuity'.
 
     Returns
     -------
@@ -258,15 +996,14 @@ def loan_calc(
            [897.28, 954.83]])
     >>> loan_calc(np.array([100000, 200000, 300000]), 0.035, 360)
     array([448.64, 897.28, 1345.92])
+    >>> loan_calc(360000, 0.035, 360, loan_type="serial")
+    2050.0
     """
+    # Precomputed annuity factors are gathered for rates and terms offered in the UI
+    annuity_factor = np.atleast_1d(first_payment_factors(rate, months, loan_type))[np.newaxis, :]
     loan = np.atleast_1d(loan)[:, np.newaxis]
-    rate = np.atleast_1d(rate)[np.newaxis, :]
 
-    monthly_rate = rate / 12
-    numerator = monthly_rate * (1 + monthly_rate) ** months
-    denominator = (1 + monthly_rate) ** months - 1
-
-    result = (numerator / denominator) * loan
+    result = annuity_factor * loan
 
     # If both inputs were scalars, return a scalar
     if result.size == 1:
@@ -279,6 +1016,7 @@ def loan_calc(
     return result
 
 
+@persistent_cache
 def interest_rate_sensitivity(
     houseprice_nok: int, interest_rate_range: np.ndarray, ammortisation_periods: int
 ) -> pd.DataFrame:
@@ -332,12 +1070,17 @@ def monthly_price_calculator(
     ek: float = 2280000,
     ownership_fraq: float = 0.33,
     max_loan_limit: float = None,
+    ownership_shares: list[float] | None = None,
+    owner_fixed_costs: list[float] | None = None,
+    split_rules: dict | None = None,
 ) -> pd.DataFrame:
     """
     Calculate the monthly cost of owning a house for two people, given the house price, interest rate, fixed costs,
     electricity price, amortization periods, and other optional parameters.
 
-    The function assumes a 50/50 split in electricity costs between person_a and person_b.
+    By default the loan is split by ownership fraction and the electricity and fixed house costs 50/50 between
+    person_a and person_b. With ownership_shares the costs are split between any number of owners A, B, C, ...
+    instead, following split_rules.
 
     Parameters
     ----------
@@ -363,11 +1106,27 @@ def monthly_price_calculator(
         The fraction of ownership for person A, by default 0.33.
     max_loan_limit : float, optional
         The maximum loan limit, by default None.
+    ownership_shares : list[float], optional
+        The ownership share of every owner, summing to one. By default None, which gives person A ownership_fraq
+        and person B the rest.
+    owner_fixed_costs : list[float], optional
+        The fixed costs of every owner in ownership_shares, by default none. Ignored without ownership_shares,
+        where person_a_fixed_costs and person_b_fixed_costs apply.
+    split_rules : dict, optional
+        The split rule of each shared cost type, see allocation_matrix, by default DEFAULT_SPLIT_RULES.
 
     Returns
     -------
     pd.DataFrame
-        A dataframe containing the monthly costs for person A and person B.
+        A dataframe containing the monthly costs for every owner, in columns a_beløp_hus, a_total and
+        person_a_eierandel for person A and likewise for the other owners.
+
+    Raises
+    ------
+    ValueError
+        If owner_fixed_costs does not have one value per owner in ownership_shares, or
+        the ownership shares are negative or do not sum to one. Ownership fractions
+        outside [0, 1] therefore raise instead of giving person B a negative share.
 
     Examples
     --------
@@ -376,8 +1135,19 @@ def monthly_price_calculator(
     0  8877.280741  0.015    1500    3000      13377.28  4611.640371  5674.860370  16951.64  17674.86
     """
 
-    # Antar eierfraksjon basert på excel data
-    rest_fraq = 1 - ownership_fraq
+    # Antar eierfraksjon basert på excel data, med person B som eier resten
+    if ownership_shares is None:
+        ownership_shares = two_owner_shares(ownership_fraq)
+        owner_fixed_costs = [person_a_fixed_costs, person_b_fixed_costs]
+    elif owner_fixed_costs is None:
+        owner_fixed_costs = np.zeros(len(ownership_shares))
+    elif len(owner_fixed_costs) != len(ownership_shares):
+        raise ValueError(
+            f"Got {len(owner_fixed_costs)} owner fixed costs for {len(ownership_shares)} ownership shares"
+        )
+    allocation = allocation_matrix(ownership_shares, split_rules)
+    labels = owner_labels(allocation.shape[-1])
+    ownership_shares = np.asarray(ownership_shares, dtype=float)
 
     # trekk fra omkostninger ved boligkjøp
     eff_ek = ek - transaction_costs
@@ -405,19 +1175,18 @@ def monthly_price_calculator(
     # Regn ut totalbeløp på lån + elpris og felleskosnader
     df["fk_hus"] = fixed_cost_house
     df["total_beløp"] = df["lån_total"] + df["elpris"] + df["fk_hus"]
-    df["a_beløp_hus"] = (
-        (df["lån_total"] * ownership_fraq) + (df["elpris"] / 2) + (df["fk_hus"] / 2)
-    )
-    df["b_beløp_hus"] = (
-        (df["lån_total"] * rest_fraq) + (df["elpris"] / 2) + (df["fk_hus"] / 2)
-    )
+
+    # Fordel lån, strøm og felleskostnader på eierne i ett matriseprodukt
+    house_shares = allocate_costs(df[["lån_total", "elpris", "fk_hus"]].to_numpy(), allocation)
+    for i, label in enumerate(labels):
+        df[f"{label.lower()}_beløp_hus"] = house_shares[:, i]
 
     # Legg til faste månedlige kostnader
-    df["a_total"] = df["a_beløp_hus"] + person_a_fixed_costs
-    df["b_total"] = df["b_beløp_hus"] + person_b_fixed_costs
+    for i, label in enumerate(labels):
+        df[owner_total_column(label)] = df[f"{label.lower()}_beløp_hus"] + owner_fixed_costs[i]
 
-    df["person_a_eierandel"] = ownership_fraq
-    df["person_b_eierandel"] = rest_fraq
+    for i, label in enumerate(labels):
+        df[f"person_{label.lower()}_eierandel"] = ownership_shares[i]
 
     return df
 
@@ -436,6 +1205,7 @@ def monthly_price_calculator_scenarios(
     transaction_costs_range: list,
     ek_range: list,
     ownership_fraq_range: list,
+    loan_type_range: list | None = None,
 ):
     """
     Generate scenarios for varying parameters of house ownership costs.
@@ -468,13 +1238,21 @@ def monthly_price_calculator_scenarios(
         Range of equity amounts to analyze.
     ownership_fraq_range : list
         Range of ownership fractions to analyze.
-    govt_support_limit_nok_range : list
-        Range of government support limit prices per kWh in NOK to analyze.
+    loan_type_range : list, optional
+        Loan types from LOAN_TYPES to analyze, by default None which analyzes annuity
+        loans and leaves the loan_type column out of the result. For serial loans the
+        monthly loan payment is the first and largest payment.
 
     Returns
     -------
     pd.DataFrame
         A DataFrame containing all the scenarios and their respective calculations.
+
+    Raises
+    ------
+    ValueError
+        If an ownership fraction is outside [0, 1], which would give an owner a negative
+        share of the costs.
     """
     # Generate all combinations of input parameters
     all_combinations = list(
@@ -492,9 +1270,16 @@ def monthly_price_calculator_scenarios(
             transaction_costs_range,
             ek_range,
             ownership_fraq_range,
+            _scenario_loan_types(loan_type_range),
         )
     )
 
+    # Allocation weights of person A and B, validated once per distinct ownership fraction
+    weights = {
+        fraq: allocation_matrix(two_owner_shares(fraq)).T.tolist()
+        for fraq in set(ownership_fraq_range)
+    }
+
     results = []
 
     # Process each combination of parameters
@@ -512,6 +1297,7 @@ def monthly_price_calculator_scenarios(
         transaction_costs,
         ek,
         ownership_fraq,
+        loan_type,
     ) in all_combinations:
         # Calculate effective equity after transaction costs
         eff_ek = ek - transaction_costs
@@ -519,24 +1305,19 @@ def monthly_price_calculator_scenarios(
         loan = house_price - eff_ek
 
         # Calculate monthly loan payment using loan_calc function
-        monthly_loan_payment = loan_calc(loan, interest_rate, ammortisation_periods)
+        monthly_loan_payment = loan_calc(
+            loan, interest_rate, ammortisation_periods, loan_type
+        )
 
         # Calculate electricity costs using calculate_electricity_costs function
         el_cost = calculate_electricity_costs(
             kwh_usage, kwh_price, markup_nok, fixed_cost_electricity
         )
 
-        # Calculate ownership shares
-        a_share = (
-            (monthly_loan_payment * ownership_fraq)
-            + (el_cost / 2)
-            + (fixed_cost_house / 2)
-        )
-        b_share = (
-            (monthly_loan_payment * (1 - ownership_fraq))
-            + (el_cost / 2)
-            + (fixed_cost_house / 2)
-        )
+        # Split the housing costs by ownership, in the cost order of the allocation matrix
+        (a_loan, a_el, a_house), (b_loan, b_el, b_house) = weights[ownership_fraq]
+        a_share = monthly_loan_payment * a_loan + el_cost * a_el + fixed_cost_house * a_house
+        b_share = monthly_loan_payment * b_loan + el_cost * b_el + fixed_cost_house * b_house
 
         # Sum up total costs per person
         a_total = a_share + person_a_fixed_costs
@@ -559,6 +1340,7 @@ def monthly_price_calculator_scenarios(
                 "transaction_costs": transaction_costs,
                 "ek": ek,
                 "ownership_fraq": ownership_fraq,
+                "loan_type": loan_type,
                 "monthly_loan_payment": monthly_loan_payment,
                 "a_total": a_total,
                 "b_total": b_total,
@@ -567,4 +1349,1169 @@ def monthly_price_calculator_scenarios(
 
     # Convert the list of dictionaries to a DataFrame
     results_df = pd.DataFrame(results)
+    if loan_type_range is None and "loan_type" in results_df:
+        results_df = results_df.drop(columns="loan_type")
     return results_df
+
+
+# Order of the parameter axes in the scenario grid. This is also the order used by
+# itertools.product in monthly_price_calculator_scenarios, so raveling a C-ordered
+# grid over these axes reproduces the same row order.
+SCENARIO_AXES = (
+    "house_price",
+    "interest_rate",
+    "fixed_cost_house",
+    "kwh_usage",
+    "kwh_price",
+    "markup_nok",
+    "fixed_cost_electricity",
+    "ammortisation_periods",
+    "person_a_fixed_costs",
+    "person_b_fixed_costs",
+    "transaction_costs",
+    "ek",
+    "ownership_fraq",
+    "loan_type",
+)
+
+# Column order of the DataFrame returned by the scenario calculators
+SCENARIO_COLUMNS = (
+    "house_price",
+    "interest_rate",
+    "fixed_cost_house",
+    "kwh_usage",
+    "kwh_price",
+    "markup_nok",
+    "fixed_cost_electricity",
+    "el_cost",
+    "ammortisation_periods",
+    "person_a_fixed_costs",
+    "person_b_fixed_costs",
+    "transaction_costs",
+    "ek",
+    "ownership_fraq",
+    "loan_type",
+    "monthly_loan_payment",
+    "a_total",
+    "b_total",
+)
+
+
+def _scenario_loan_types(loan_type_range: list | None) -> list:
+    """
+    Returns the loan types of a scenario grid, annuity loans if none were requested.
+    """
+    return list(LOAN_TYPES[:1]) if loan_type_range is None else loan_type_range
+
+
+def _scenario_output_columns(loan_type_range: list | None) -> tuple[str, ...]:
+    """
+    Returns the columns of a scenario frame. The loan_type column is only included when
+    the caller asked for loan types, so frames of calls without them keep their columns.
+    """
+    if loan_type_range is None:
+        return tuple(name for name in SCENARIO_COLUMNS if name != "loan_type")
+    return SCENARIO_COLUMNS
+
+
+def _scenario_grid_axes(ranges: tuple) -> dict[str, np.ndarray]:
+    """
+    Reshape each parameter range into its own axis of an N-dimensional grid.
+
+    Parameters
+    ----------
+    ranges : tuple
+        One range (list or array) per name in SCENARIO_AXES, in the same order.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        Mapping from axis name to an array of shape (1, ..., len(range), ..., 1) that
+        broadcasts against the other axes.
+    """
+    n_axes = len(SCENARIO_AXES)
+    axes = {}
+    for i, (name, values) in enumerate(zip(SCENARIO_AXES, ranges)):
+        shape = [1] * n_axes
+        shape[i] = -1
+        axes[name] = np.asarray(values).reshape(shape)
+    return axes
+
+
+def _person_totals(
+    monthly_loan_payment: np.ndarray,
+    el_cost: np.ndarray,
+    fixed_cost_house: np.ndarray,
+    ownership_fraq: np.ndarray,
+    person_a_fixed_costs: np.ndarray,
+    person_b_fixed_costs: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split the housing costs between person A and person B and add their fixed costs.
+
+    The costs are allocated with the default split rules of allocation_matrix, as one
+    matrix product over the broadcast grid.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The total monthly cost of person A and person B.
+    """
+    shared_costs = np.stack(
+        np.broadcast_arrays(monthly_loan_payment, el_cost, fixed_cost_house), axis=-1
+    )
+    personal_costs = np.stack(
+        np.broadcast_arrays(person_a_fixed_costs, person_b_fixed_costs), axis=-1
+    )
+    totals = allocate_costs(
+        shared_costs, allocation_matrix(two_owner_shares(ownership_fraq)), personal_costs
+    )
+    return totals[..., 0], totals[..., 1]
+
+
+def _evaluate_scenario_grid(axes: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Evaluate the scenario formulas on broadcastable parameter arrays.
+
+    The arithmetic mirrors monthly_price_calculator_scenarios operation by operation,
+    so the results are identical to the row-by-row calculation.
+
+    Parameters
+    ----------
+    axes : dict[str, np.ndarray]
+        Mapping from the names in SCENARIO_AXES to mutually broadcastable arrays.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        Mapping from the derived column names (el_cost, monthly_loan_payment, a_total
+        and b_total) to broadcast arrays.
+    """
+    # Loan payment only depends on six of the axes, so it is evaluated on their
+    # reduced broadcast shape before being combined with the rest of the grid
+    eff_ek = axes["ek"] - axes["transaction_costs"]
+    loan = axes["house_price"] - eff_ek
+
+    monthly_loan_payment = (
+        first_payment_factors(
+            axes["interest_rate"], axes["ammortisation_periods"], axes["loan_type"]
+        )
+        * loan
+    )
+
+    el_cost = calculate_electricity_costs_array(
+        axes["kwh_usage"],
+        axes["kwh_price"],
+        axes["markup_nok"],
+        axes["fixed_cost_electricity"],
+    )
+
+    a_total, b_total = _person_totals(
+        monthly_loan_payment,
+        el_cost,
+        axes["fixed_cost_house"],
+        axes["ownership_fraq"],
+        axes["person_a_fixed_costs"],
+        axes["person_b_fixed_costs"],
+    )
+
+    return {
+        "el_cost": el_cost,
+        "monthly_loan_payment": monthly_loan_payment,
+        "a_total": a_total,
+        "b_total": b_total,
+    }
+
+
+# Key in DataFrame.attrs holding the columns that compact frames store only once
+SCENARIO_CONSTANTS_ATTR = "scenario_constants"
+
+# Largest rounding error in NOK accepted when storing a money column as float32
+COMPACT_FLOAT_TOLERANCE = 0.005
+
+# Columns that compact frames do not store, since expand_scenario_frame recomputes them
+_RECOMPUTED_COLUMNS = ("a_total", "b_total")
+
+
+def _compact_values(values: np.ndarray, float_tolerance: float) -> np.ndarray:
+    """
+    Downcast a column to int32 or float32 if that does not lose precision.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The column values.
+    float_tolerance : float
+        The largest absolute rounding error allowed for float32.
+
+    Returns
+    -------
+    np.ndarray
+        The values, downcast where possible.
+    """
+    if np.issubdtype(values.dtype, np.integer):
+        info = np.iinfo(np.int32)
+        if values.min() >= info.min and values.max() <= info.max:
+            return values.astype(np.int32)
+    elif np.issubdtype(values.dtype, np.floating) and values.dtype != np.float32:
+        downcast = values.astype(np.float32)
+        with np.errstate(invalid="ignore"):
+            error = np.abs(downcast.astype(values.dtype) - values)
+        if np.all((error <= float_tolerance) | np.isnan(values)):
+            return downcast
+    return values
+
+
+def _compact_scenario_columns(
+    columns: dict[str, np.ndarray],
+    shape: tuple,
+    float_tolerance: float = COMPACT_FLOAT_TOLERANCE,
+    names: tuple[str, ...] = SCENARIO_COLUMNS,
+) -> pd.DataFrame:
+    """
+    Build a compact scenario frame directly from broadcast grid columns.
+
+    Columns that do not vary over the grid are stored once in the frame attrs, grid
+    axes become categoricals whose codes are broadcast from the axis positions, the
+    per-person totals are left out and the other derived columns are downcast where
+    precision allows.
+
+    Parameters
+    ----------
+    columns : dict[str, np.ndarray]
+        Mapping from the names in SCENARIO_COLUMNS to arrays that broadcast to shape.
+    shape : tuple
+        The shape of the scenario grid.
+    float_tolerance : float, optional
+        The largest absolute rounding error allowed for float32 columns.
+    names : tuple[str, ...], optional
+        The columns of the frame, by default SCENARIO_COLUMNS.
+
+    Returns
+    -------
+    pd.DataFrame
+        The compact scenario frame.
+    """
+    constants = {}
+    data = {}
+    for name in names:
+        if name in _RECOMPUTED_COLUMNS:
+            continue
+        values = columns[name]
+        if values.size == 1:
+            constants[name] = values.item()
+        elif name in SCENARIO_AXES:
+            categories = values.ravel()
+            if pd.Index(categories).is_unique:
+                codes = np.arange(categories.size, dtype=np.min_scalar_type(-categories.size))
+                data[name] = pd.Categorical.from_codes(
+                    np.broadcast_to(codes.reshape(values.shape), shape).ravel(),
+                    categories=categories,
+                )
+            else:
+                data[name] = pd.Categorical(np.broadcast_to(values, shape).ravel())
+        else:
+            data[name] = _compact_values(
+                np.broadcast_to(values, shape).ravel(), float_tolerance
+            )
+
+    df = pd.DataFrame(data, index=pd.RangeIndex(int(np.prod(shape))))
+    df.attrs[SCENARIO_CONSTANTS_ATTR] = constants
+    return df
+
+
+def compact_scenario_frame(
+    df: pd.DataFrame, float_tolerance: float = COMPACT_FLOAT_TOLERANCE
+) -> pd.DataFrame:
+    """
+    Convert a scenario DataFrame to a compact columnar representation.
+
+    Columns that hold the same value on every row are dropped and stored once in
+    ``df.attrs["scenario_constants"]``. The varying parameter columns are encoded as
+    categoricals, which keeps their exact values while storing a small integer code
+    per row. Derived money columns are stored as float32 when the rounding error stays
+    within float_tolerance NOK, and integer columns as int32 when they fit. The
+    per-person totals are not stored at all, as they follow from the other columns.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A DataFrame returned by one of the scenario calculators.
+    float_tolerance : float, optional
+        The largest absolute rounding error allowed for float32 columns, by default
+        half an øre.
+
+    Returns
+    -------
+    pd.DataFrame
+        The compact scenario frame. Use expand_scenario_frame to get the full frame back.
+    """
+    constants = dict(df.attrs.get(SCENARIO_CONSTANTS_ATTR, {}))
+    data = {}
+    for name, column in df.items():
+        if name in _RECOMPUTED_COLUMNS:
+            continue
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            data[name] = column
+        elif len(column) > 0 and column.nunique(dropna=False) == 1:
+            value = column.iloc[0]
+            constants[name] = value.item() if isinstance(value, np.generic) else value
+        elif name in SCENARIO_AXES:
+            data[name] = column.astype("category")
+        else:
+            data[name] = _compact_values(column.to_numpy(), float_tolerance)
+
+    compact = pd.DataFrame(data, index=df.index)
+    compact.attrs[SCENARIO_CONSTANTS_ATTR] = constants
+    return compact
+
+
+def expand_scenario_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a compact scenario frame back to the full representation.
+
+    Constant columns are restored from the frame attrs, categoricals are decoded to
+    their values, downcast columns are cast back to 64-bit and the per-person totals
+    are recomputed. Full frames are returned with the same columns, so the function is
+    safe to call on either.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A compact or full scenario frame, or a row selection of one.
+
+    Returns
+    -------
+    pd.DataFrame
+        The scenario frame with all columns of SCENARIO_COLUMNS in order.
+    """
+    constants = df.attrs.get(SCENARIO_CONSTANTS_ATTR, {})
+    data = {}
+    for name in SCENARIO_COLUMNS:
+        if name in df.columns:
+            values = df[name].to_numpy()
+            if values.dtype == np.float32:
+                values = values.astype(np.float64)
+            elif values.dtype == np.int32:
+                values = values.astype(np.int64)
+            elif values.dtype == object:
+                # Decoded string categories, such as the loan type
+                values = values.astype(str)
+            data[name] = values
+        elif name in constants:
+            data[name] = np.full(len(df), constants[name])
+
+    total_inputs = (
+        "monthly_loan_payment",
+        "el_cost",
+        "fixed_cost_house",
+        "ownership_fraq",
+        "person_a_fixed_costs",
+        "person_b_fixed_costs",
+    )
+    if "a_total" not in data and all(name in data for name in total_inputs):
+        data["a_total"], data["b_total"] = _person_totals(
+            *(data[name] for name in total_inputs)
+        )
+
+    return pd.DataFrame(
+        {name: data[name] for name in SCENARIO_COLUMNS if name in data}, index=df.index
+    )
+
+
+def scenario_column(df: pd.DataFrame, name: str) -> np.ndarray:
+    """
+    Return the values of one column of a full or compact scenario frame.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A compact or full scenario frame.
+    name : str
+        The column name, which may be stored as a constant in a compact frame.
+
+    Returns
+    -------
+    np.ndarray
+        One value per row of the frame.
+
+    Raises
+    ------
+    KeyError
+        If the frame has no such column.
+    """
+    if name in df.columns:
+        return np.asarray(df[name])
+
+    constants = df.attrs.get(SCENARIO_CONSTANTS_ATTR, {})
+    if name in constants:
+        return np.full(len(df), constants[name])
+
+    raise KeyError(name)
+
+
+def allocate_scenario_costs(
+    df: pd.DataFrame,
+    ownership_shares: np.ndarray | list,
+    owner_fixed_costs: np.ndarray | list | float = 0.0,
+    split_rules: dict | None = None,
+) -> pd.DataFrame:
+    """
+    Calculate the total monthly cost of any number of owners for every scenario.
+
+    The shared costs of all rows are allocated in one matrix product, so the owners of
+    a scenario grid are not limited to the person A and person B of its a_total and
+    b_total columns.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A full or compact scenario frame.
+    ownership_shares : np.ndarray or list
+        The ownership share of every owner, summing to one, either one set for all
+        rows or one set per row with shape (len(df), n_owners).
+    owner_fixed_costs : np.ndarray, list or float, optional
+        The fixed costs of every owner, for all rows or per row, by default 0.
+    split_rules : dict, optional
+        The split rule of each shared cost type, see allocation_matrix, by default
+        DEFAULT_SPLIT_RULES.
+
+    Returns
+    -------
+    pd.DataFrame
+        One total column per owner, a_total, b_total, c_total, ..., with the index of df.
+
+    Examples
+    --------
+    >>> df = monthly_price_calculator_scenarios_vectorized(
+    ...     [4000000], [0.04], [6000], [1000], [1.2], [0.1], [39], [360],
+    ...     [10000], [10000], [200000], [1000000], [0.5],
+    ... )
+    >>> allocate_scenario_costs(df, [0.4, 0.4, 0.2], [8000, 8000, 5000]).round(0)
+       a_total  b_total  c_total
+    0  16471.0  16471.0  10416.0
+    """
+    shared_costs = np.column_stack(
+        [scenario_column(df, name) for name in SHARED_COSTS]
+    ).astype(float)
+    allocation = allocation_matrix(ownership_shares, split_rules)
+    totals = allocate_costs(shared_costs, allocation, owner_fixed_costs)
+    labels = owner_labels(allocation.shape[-1])
+    return pd.DataFrame(
+        {owner_total_column(label): totals[:, i] for i, label in enumerate(labels)},
+        index=df.index,
+    )
+
+
+@persistent_cache
+def monthly_price_calculator_scenarios_vectorized(
+    houseprice_range: list,
+    interest_rate_range: list,
+    fixed_cost_house_range: list,
+    kwh_usage_range: list,
+    kwh_price_range: list,
+    markup_nok_range: list,
+    fixed_cost_electricity_range: list,
+    ammortisation_periods_range: list,
+    person_a_fixed_costs_range: list,
+    person_b_fixed_costs_range: list,
+    transaction_costs_range: list,
+    ek_range: list,
+    ownership_fraq_range: list,
+    loan_type_range: list | None = None,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """
+    Generate scenarios for varying parameters of house ownership costs using NumPy broadcasting.
+
+    Every parameter range is treated as one axis of a 14-dimensional grid. The loan
+    payment, electricity cost and per-person totals are evaluated on the whole grid at
+    once and the output DataFrame is built column by column. The result is identical
+    to monthly_price_calculator_scenarios, including row order and column order.
+
+    Parameters
+    ----------
+    houseprice_range : list
+        Range of house prices to analyze.
+    interest_rate_range : list
+        Range of interest rates to analyze.
+    fixed_cost_house_range : list
+        Range of fixed costs for house to analyze.
+    kwh_usage_range : list
+        Range of electricity usages (kWh) to analyze.
+    kwh_price_range : list
+        Range of electricity prices (NOK per kWh) to analyze.
+    markup_nok_range : list
+        Range of additional markup costs per kWh in NOK to analyze.
+    fixed_cost_electricity_range : list
+        Range of fixed costs for electricity in NOK to analyze.
+    ammortisation_periods_range : list
+        Range of amortisation periods (months) to analyze.
+    person_a_fixed_costs_range : list
+        Range of fixed costs for person A to analyze.
+    person_b_fixed_costs_range : list
+        Range of fixed costs for person B to analyze.
+    transaction_costs_range : list
+        Range of transaction costs to analyze.
+    ek_range : list
+        Range of equity amounts to analyze.
+    ownership_fraq_range : list
+        Range of ownership fractions to analyze.
+    loan_type_range : list, optional
+        Loan types from LOAN_TYPES to analyze, by default None which analyzes annuity
+        loans and leaves the loan_type column out of the result.
+    compact : bool, optional
+        Return the compact representation described in compact_scenario_frame instead
+        of the full DataFrame, by default False.
+
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame containing all the scenarios and their respective calculations.
+
+    Raises
+    ------
+    ValueError
+        If an ownership fraction is outside [0, 1], which would give an owner a negative
+        share of the costs.
+
+    Examples
+    --------
+    >>> df = monthly_price_calculator_scenarios_vectorized(
+    ...     [2000000, 2500000], [0.02, 0.03], [3000], [1000], [1.0], [0.1], [100],
+    ...     [360], [12000], [12000], [200000], [500000], [0.5],
+    ... )
+    >>> len(df)
+    4
+    """
+    axes = _scenario_grid_axes(
+        (
+            houseprice_range,
+            interest_rate_range,
+            fixed_cost_house_range,
+            kwh_usage_range,
+            kwh_price_range,
+            markup_nok_range,
+            fixed_cost_electricity_range,
+            ammortisation_periods_range,
+            person_a_fixed_costs_range,
+            person_b_fixed_costs_range,
+            transaction_costs_range,
+            ek_range,
+            ownership_fraq_range,
+            _scenario_loan_types(loan_type_range),
+        )
+    )
+    shape = np.broadcast_shapes(*(axis.shape for axis in axes.values()))
+
+    # Mirror pd.DataFrame([]) returned by the loop implementation for an empty grid
+    if 0 in shape:
+        return pd.DataFrame()
+
+    return _scenario_grid_frame(
+        axes,
+        _evaluate_scenario_grid(axes),
+        shape,
+        compact,
+        _scenario_output_columns(loan_type_range),
+    )
+
+
+def _scenario_grid_frame(
+    axes: dict[str, np.ndarray],
+    derived: dict[str, np.ndarray],
+    shape: tuple,
+    compact: bool,
+    names: tuple[str, ...] = SCENARIO_COLUMNS,
+) -> pd.DataFrame:
+    """
+    Build the full or compact scenario frame with the columns in names from grid axes
+    and derived columns.
+    """
+    columns = {**axes, **derived}
+
+    if compact:
+        return _compact_scenario_columns(columns, shape, names=names)
+
+    return pd.DataFrame(
+        {name: np.broadcast_to(columns[name], shape).ravel() for name in names}
+    )
+
+
+# Total size of the grids kept in memory by monthly_price_calculator_scenarios_incremental.
+# They are shared by all sessions of the process, so the budget is in bytes, not grids.
+INCREMENTAL_GRID_CACHE_MAX_BYTES = 256 * 2**20
+
+_recent_grids: OrderedDict = OrderedDict()
+_recent_grids_lock = threading.Lock()
+
+
+class ScenarioGrid(NamedTuple):
+    """
+    A computed scenario grid, kept so that it can be extended along its first two axes.
+
+    Attributes
+    ----------
+    axes : dict[str, np.ndarray]
+        The grid axes as returned by _scenario_grid_axes.
+    derived : dict[str, np.ndarray]
+        The derived columns as returned by _evaluate_scenario_grid.
+    """
+
+    axes: dict[str, np.ndarray]
+    derived: dict[str, np.ndarray]
+
+    @property
+    def shape(self) -> tuple:
+        return np.broadcast_shapes(*(axis.shape for axis in self.axes.values()))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory held by the axes and derived columns.
+        """
+        return sum(values.nbytes for values in (*self.axes.values(), *self.derived.values()))
+
+    def to_frame(
+        self, compact: bool = False, names: tuple[str, ...] = SCENARIO_COLUMNS
+    ) -> pd.DataFrame:
+        """
+        Returns the grid as a full or compact scenario frame with the columns in names.
+        """
+        shape = self.shape
+        if 0 in shape:
+            return pd.DataFrame()
+        return _scenario_grid_frame(self.axes, self.derived, shape, compact, names)
+
+
+def _derived_dependence(axes: dict[str, np.ndarray]) -> dict[str, tuple[bool, bool]]:
+    """
+    Find which derived columns vary with the house price and with the interest rate.
+
+    The formulas are evaluated on a probe grid with two house prices, two rates and the
+    first value of every other axis, and a column varies with an axis if the evaluation
+    broadcasts it over that axis.
+    """
+    probe = {name: np.take(axis, [0], axis=i) for i, (name, axis) in enumerate(axes.items())}
+    probe["house_price"] = np.array([1.0, 2.0]).reshape((2,) + (1,) * (len(SCENARIO_AXES) - 1))
+    probe["interest_rate"] = np.array([0.01, 0.02]).reshape((1, 2) + (1,) * (len(SCENARIO_AXES) - 2))
+    return {
+        name: (values.shape[0] == 2, values.shape[1] == 2)
+        for name, values in _evaluate_scenario_grid(probe).items()
+    }
+
+
+def _merge_grid_slabs(
+    previous: np.ndarray,
+    new_prices: np.ndarray | None,
+    new_rates: np.ndarray | None,
+    price_index: np.ndarray,
+    rate_index: np.ndarray,
+    depends: tuple[bool, bool],
+) -> np.ndarray:
+    """
+    Assemble a derived column of an extended grid from the previous grid and new slabs.
+
+    price_index and rate_index give the position of every requested house price and rate
+    in the previous grid, or -1 for new values. new_prices holds the column for the new
+    house prices at every requested rate, and new_rates the column for the previous house
+    prices at the new rates. depends tells whether the column varies with the house price
+    and with the rate; along an axis it does not vary with, the column keeps length 1.
+    """
+    if not any(depends):
+        return previous
+
+    def slots(index, varies):
+        # Positions in the merged column and in the previous column of the known values
+        if not varies:
+            return np.zeros(1, dtype=np.intp), np.zeros(1, dtype=np.intp)
+        return np.flatnonzero(index >= 0), index[index >= 0]
+
+    row_slots, rows = slots(price_index, depends[0])
+    column_slots, columns = slots(rate_index, depends[1])
+
+    merged = np.empty(
+        (
+            price_index.size if depends[0] else 1,
+            rate_index.size if depends[1] else 1,
+            *previous.shape[2:],
+        ),
+        dtype=previous.dtype,
+    )
+    merged[row_slots[:, np.newaxis], column_slots] = previous[rows[:, np.newaxis], columns]
+
+    if new_rates is not None and depends[1]:
+        merged[row_slots[:, np.newaxis], np.flatnonzero(rate_index < 0)] = new_rates
+    if new_prices is not None:
+        if depends[0]:
+            merged[np.flatnonzero(price_index < 0)] = new_prices
+        else:
+            # Same for every house price, and it covers every requested rate
+            merged[:] = new_prices
+    return merged
+
+
+def extend_scenario_grid(previous: ScenarioGrid | None, ranges: tuple) -> ScenarioGrid:
+    """
+    Evaluate a scenario grid, reusing the cells of a previous grid.
+
+    If previous has the same values on every axis except the house prices and interest
+    rates, only the new house prices (at every requested rate) and the new rates (at the
+    previous house prices) are evaluated, and the other cells are copied from previous.
+    Otherwise the whole grid is evaluated. Either way the result is identical to
+    evaluating the whole grid, and the time spent on the formulas is proportional to the
+    number of new cells.
+
+    Parameters
+    ----------
+    previous : ScenarioGrid or None
+        A previously computed grid.
+    ranges : tuple
+        One range per name in SCENARIO_AXES, in the same order.
+
+    Returns
+    -------
+    ScenarioGrid
+        The requested grid.
+
+    Examples
+    --------
+    >>> ranges = ([3000000, 3100000], [0.02, 0.03], [5000], [500], [1.5], [0.1], [39],
+    ...           [360], [10000], [10000], [200000], [1500000], [0.5], ["annuity"])
+    >>> grid = extend_scenario_grid(None, ranges)
+    >>> wider = extend_scenario_grid(grid, ([3000000, 3100000, 3200000],) + ranges[1:])
+    >>> wider.shape[:2]
+    (3, 2)
+    """
+    axes = _scenario_grid_axes(ranges)
+    prices, rates = axes["house_price"].ravel(), axes["interest_rate"].ravel()
+
+    reusable = (
+        previous is not None
+        and 0 not in previous.shape
+        and all(np.array_equal(axes[name], previous.axes[name]) for name in SCENARIO_AXES[2:])
+        and all(
+            pd.Index(values.ravel()).is_unique
+            for values in (
+                prices, rates, previous.axes["house_price"], previous.axes["interest_rate"]
+            )
+        )
+    )
+    if not reusable:
+        return ScenarioGrid(axes, _evaluate_scenario_grid(axes))
+
+    price_index = pd.Index(previous.axes["house_price"].ravel()).get_indexer(prices)
+    rate_index = pd.Index(previous.axes["interest_rate"].ravel()).get_indexer(rates)
+
+    def evaluate_slab(slab_prices, slab_rates):
+        if slab_prices.size == 0 or slab_rates.size == 0:
+            return None
+        slab_axes = dict(axes)
+        slab_axes["house_price"] = slab_prices.reshape(
+            (-1,) + (1,) * (len(SCENARIO_AXES) - 1)
+        )
+        slab_axes["interest_rate"] = slab_rates.reshape(
+            (1, -1) + (1,) * (len(SCENARIO_AXES) - 2)
+        )
+        return _evaluate_scenario_grid(slab_axes)
+
+    new_prices = evaluate_slab(prices[price_index < 0], rates)
+    new_rates = evaluate_slab(prices[price_index >= 0], rates[rate_index < 0])
+
+    derived = {
+        name: _merge_grid_slabs(
+            previous.derived[name],
+            new_prices[name] if new_prices is not None else None,
+            new_rates[name] if new_rates is not None else None,
+            price_index,
+            rate_index,
+            depends,
+        )
+        for name, depends in _derived_dependence(axes).items()
+    }
+    return ScenarioGrid(axes, derived)
+
+
+@persistent_cache
+def monthly_price_calculator_scenarios_incremental(
+    houseprice_range: list,
+    interest_rate_range: list,
+    fixed_cost_house_range: list,
+    kwh_usage_range: list,
+    kwh_price_range: list,
+    markup_nok_range: list,
+    fixed_cost_electricity_range: list,
+    ammortisation_periods_range: list,
+    person_a_fixed_costs_range: list,
+    person_b_fixed_costs_range: list,
+    transaction_costs_range: list,
+    ek_range: list,
+    ownership_fraq_range: list,
+    loan_type_range: list | None = None,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """
+    Generate scenarios like monthly_price_calculator_scenarios_vectorized, extending the
+    most recent grid with the same fixed parameters.
+
+    The most recently used grids are kept in memory, up to INCREMENTAL_GRID_CACHE_MAX_BYTES,
+    by all parameters except the house prices and interest rates. When a slider range is
+    widened or shifted, only the new house prices and rates are evaluated, see
+    extend_scenario_grid. The result is identical to
+    monthly_price_calculator_scenarios_vectorized. Results are served from the persistent
+    cache of cache_funcs first when it is on, so only cache misses extend a grid.
+
+    Parameters
+    ----------
+    houseprice_range, ..., loan_type_range : list
+        The parameter ranges, as for monthly_price_calculator_scenarios_vectorized.
+    compact : bool, optional
+        Return the compact representation described in compact_scenario_frame instead
+        of the full DataFrame, by default False.
+
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame containing all the scenarios and their respective calculations.
+
+    Raises
+    ------
+    ValueError
+        If an ownership fraction is outside [0, 1], which would give an owner a negative
+        share of the costs.
+    """
+    ranges = (
+        houseprice_range,
+        interest_rate_range,
+        fixed_cost_house_range,
+        kwh_usage_range,
+        kwh_price_range,
+        markup_nok_range,
+        fixed_cost_electricity_range,
+        ammortisation_periods_range,
+        person_a_fixed_costs_range,
+        person_b_fixed_costs_range,
+        transaction_costs_range,
+        ek_range,
+        ownership_fraq_range,
+        _scenario_loan_types(loan_type_range),
+    )
+    fixed_key = tuple(tuple(np.asarray(values).ravel().tolist()) for values in ranges[2:])
+
+    with _recent_grids_lock:
+        previous = _recent_grids.get(fixed_key)
+    grid = extend_scenario_grid(previous, ranges)
+
+    with _recent_grids_lock:
+        _recent_grids.pop(fixed_key, None)
+        if grid.nbytes <= INCREMENTAL_GRID_CACHE_MAX_BYTES:
+            _recent_grids[fixed_key] = grid
+        # Drop the least recently used grids until the rest fit the budget
+        total = sum(kept.nbytes for kept in _recent_grids.values())
+        while total > INCREMENTAL_GRID_CACHE_MAX_BYTES:
+            total -= _recent_grids.popitem(last=False)[1].nbytes
+
+    return grid.to_frame(compact, _scenario_output_columns(loan_type_range))
+
+
+def iter_monthly_price_calculator_scenarios(
+    houseprice_range: list,
+    interest_rate_range: list,
+    fixed_cost_house_range: list,
+    kwh_usage_range: list,
+    kwh_price_range: list,
+    markup_nok_range: list,
+    fixed_cost_electricity_range: list,
+    ammortisation_periods_range: list,
+    person_a_fixed_costs_range: list,
+    person_b_fixed_costs_range: list,
+    transaction_costs_range: list,
+    ek_range: list,
+    ownership_fraq_range: list,
+    loan_type_range: list | None = None,
+    chunk_size: int = 1_000_000,
+    output: str = "dataframe",
+):
+    """
+    Walk the scenario grid in fixed-size chunks and yield the results one chunk at a time.
+
+    The grid is traversed in the same row order as monthly_price_calculator_scenarios,
+    and only the rows of the current chunk are materialized. Peak memory therefore
+    depends on chunk_size and not on the size of the grid, which makes it possible to
+    stream grids with tens of millions of combinations to disk.
+
+    Parameters
+    ----------
+    houseprice_range : list
+        Range of house prices to analyze.
+    interest_rate_range : list
+        Range of interest rates to analyze.
+    fixed_cost_house_range : list
+        Range of fixed costs for house to analyze.
+    kwh_usage_range : list
+        Range of electricity usages (kWh) to analyze.
+    kwh_price_range : list
+        Range of electricity prices (NOK per kWh) to analyze.
+    markup_nok_range : list
+        Range of additional markup costs per kWh in NOK to analyze.
+    fixed_cost_electricity_range : list
+        Range of fixed costs for electricity in NOK to analyze.
+    ammortisation_periods_range : list
+        Range of amortisation periods (months) to analyze.
+    person_a_fixed_costs_range : list
+        Range of fixed costs for person A to analyze.
+    person_b_fixed_costs_range : list
+        Range of fixed costs for person B to analyze.
+    transaction_costs_range : list
+        Range of transaction costs to analyze.
+    ek_range : list
+        Range of equity amounts to analyze.
+    ownership_fraq_range : list
+        Range of ownership fractions to analyze.
+    loan_type_range : list, optional
+        Loan types from LOAN_TYPES to analyze, by default None which analyzes annuity
+        loans and leaves the loan_type column out of the result.
+    chunk_size : int, optional
+        The maximum number of rows per chunk, by default 1 000 000.
+    output : str, optional
+        Either 'dataframe' to yield pandas DataFrames or 'arrow' to yield
+        pyarrow.RecordBatch objects, by default 'dataframe'.
+
+    Yields
+    ------
+    pd.DataFrame or pyarrow.RecordBatch
+        The scenarios of one chunk. DataFrames carry the global row numbers as index,
+        so concatenating all chunks gives the same result as the full calculation.
+
+    Raises
+    ------
+    ValueError
+        If chunk_size is not positive, output is unknown or an ownership fraction is
+        outside [0, 1].
+
+    Examples
+    --------
+    >>> chunks = iter_monthly_price_calculator_scenarios(
+    ...     [2000000, 2500000], [0.02, 0.03], [3000], [1000], [1.0], [0.1], [100],
+    ...     [360], [12000], [12000], [200000], [500000], [0.5], chunk_size=3,
+    ... )
+    >>> [len(chunk) for chunk in chunks]
+    [3, 1]
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    if output not in ("dataframe", "arrow"):
+        raise ValueError("output must be either 'dataframe' or 'arrow'")
+
+    if output == "arrow":
+        import pyarrow as pa
+
+    ranges = [
+        np.asarray(values).ravel()
+        for values in (
+            houseprice_range,
+            interest_rate_range,
+            fixed_cost_house_range,
+            kwh_usage_range,
+            kwh_price_range,
+            markup_nok_range,
+            fixed_cost_electricity_range,
+            ammortisation_periods_range,
+            person_a_fixed_costs_range,
+            person_b_fixed_costs_range,
+            transaction_costs_range,
+            ek_range,
+            ownership_fraq_range,
+            _scenario_loan_types(loan_type_range),
+        )
+    ]
+    shape = tuple(values.size for values in ranges)
+    n_rows = int(np.prod(shape))
+    names = _scenario_output_columns(loan_type_range)
+
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+
+        # Translate the flat row numbers of this chunk into one index per axis
+        grid_index = np.unravel_index(np.arange(start, stop), shape)
+        axes = {
+            name: values[index]
+            for name, values, index in zip(SCENARIO_AXES, ranges, grid_index)
+        }
+        columns = {**axes, **_evaluate_scenario_grid(axes)}
+
+        if output == "arrow":
+            yield pa.RecordBatch.from_pydict(
+                {name: columns[name] for name in names}
+            )
+        else:
+            yield pd.DataFrame(
+                {name: columns[name] for name in names},
+                index=pd.RangeIndex(start, stop),
+            )
+
+
+def _evaluate_scenario_shard(ranges: tuple) -> dict[str, np.ndarray]:
+    """
+    Evaluate the derived scenario columns for one shard of the parameter grid.
+
+    Runs in a worker process. The derived columns are materialized with the full shape
+    of the shard so the parent can concatenate shards along the split axis.
+
+    Parameters
+    ----------
+    ranges : tuple
+        One range per name in SCENARIO_AXES, where the split axis holds only the
+        values belonging to this shard.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        Mapping from the derived column names to arrays with the shape of the shard.
+    """
+    axes = _scenario_grid_axes(ranges)
+    shape = np.broadcast_shapes(*(axis.shape for axis in axes.values()))
+    return {
+        name: np.ascontiguousarray(np.broadcast_to(values, shape))
+        for name, values in _evaluate_scenario_grid(axes).items()
+    }
+
+
+def monthly_price_calculator_scenarios_parallel(
+    houseprice_range: list,
+    interest_rate_range: list,
+    fixed_cost_house_range: list,
+    kwh_usage_range: list,
+    kwh_price_range: list,
+    markup_nok_range: list,
+    fixed_cost_electricity_range: list,
+    ammortisation_periods_range: list,
+    person_a_fixed_costs_range: list,
+    person_b_fixed_costs_range: list,
+    transaction_costs_range: list,
+    ek_range: list,
+    ownership_fraq_range: list,
+    loan_type_range: list | None = None,
+    max_workers: int = None,
+    shard_size: int = None,
+) -> pd.DataFrame:
+    """
+    Generate scenarios for varying parameters of house ownership costs on several CPU cores.
+
+    The parameter grid is split along its largest axis into shards of shard_size values,
+    and each shard is evaluated with the broadcast engine in a ProcessPoolExecutor. The
+    shards are concatenated back along the split axis in their original order, so the
+    result is identical to monthly_price_calculator_scenarios_vectorized regardless of
+    worker count and shard size.
+
+    Because worker processes are spawned, callers on platforms without fork must guard
+    the call with ``if __name__ == "__main__":``.
+
+    Parameters
+    ----------
+    houseprice_range : list
+        Range of house prices to analyze.
+    interest_rate_range : list
+        Range of interest rates to analyze.
+    fixed_cost_house_range : list
+        Range of fixed costs for house to analyze.
+    kwh_usage_range : list
+        Range of electricity usages (kWh) to analyze.
+    kwh_price_range : list
+        Range of electricity prices (NOK per kWh) to analyze.
+    markup_nok_range : list
+        Range of additional markup costs per kWh in NOK to analyze.
+    fixed_cost_electricity_range : list
+        Range of fixed costs for electricity in NOK to analyze.
+    ammortisation_periods_range : list
+        Range of amortisation periods (months) to analyze.
+    person_a_fixed_costs_range : list
+        Range of fixed costs for person A to analyze.
+    person_b_fixed_costs_range : list
+        Range of fixed costs for person B to analyze.
+    transaction_costs_range : list
+        Range of transaction costs to analyze.
+    ek_range : list
+        Range of equity amounts to analyze.
+    ownership_fraq_range : list
+        Range of ownership fractions to analyze.
+    loan_type_range : list, optional
+        Loan types from LOAN_TYPES to analyze, by default None which analyzes annuity
+        loans and leaves the loan_type column out of the result.
+    max_workers : int, optional
+        The number of worker processes, by default the number of CPUs.
+    shard_size : int, optional
+        The number of values of the split axis per shard, by default the axis is
+        divided evenly between the workers.
+
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame containing all the scenarios and their respective calculations.
+
+    Raises
+    ------
+    ValueError
+        If max_workers or shard_size is not positive, or an ownership fraction is
+        outside [0, 1].
+    """
+    ranges = [
+        np.asarray(values).ravel()
+        for values in (
+            houseprice_range,
+            interest_rate_range,
+            fixed_cost_house_range,
+            kwh_usage_range,
+            kwh_price_range,
+            markup_nok_range,
+            fixed_cost_electricity_range,
+            ammortisation_periods_range,
+            person_a_fixed_costs_range,
+            person_b_fixed_costs_range,
+            transaction_costs_range,
+            ek_range,
+            ownership_fraq_range,
+            _scenario_loan_types(loan_type_range),
+        )
+    ]
+    shape = tuple(values.size for values in ranges)
+
+    if 0 in shape:
+        return pd.DataFrame()
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers < 1:
+        raise ValueError("max_workers must be a positive integer")
+
+    # Split along the largest axis
+    split_axis = int(np.argmax(shape))
+    split_length = shape[split_axis]
+    if shard_size is None:
+        shard_size = math.ceil(split_length / max_workers)
+    if shard_size < 1:
+        raise ValueError("shard_size must be a positive integer")
+
+    shards = []
+    for start in range(0, split_length, shard_size):
+        shard_ranges = list(ranges)
+        shard_ranges[split_axis] = ranges[split_axis][start : start + shard_size]
+        shards.append(tuple(shard_ranges))
+
+    if len(shards) == 1:
+        results = [_evaluate_scenario_shard(shards[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # map yields results in submission order, which keeps concatenation deterministic
+            results = list(executor.map(_evaluate_scenario_shard, shards))
+
+    axes = _scenario_grid_axes(ranges)
+    columns = {name: np.broadcast_to(values, shape) for name, values in axes.items()}
+    for name in results[0]:
+        columns[name] = np.concatenate(
+            [result[name] for result in results], axis=split_axis
+        )
+
+    return pd.DataFrame(
+        {name: columns[name].ravel() for name in _scenario_output_columns(loan_type_range)}
+    )
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Hour-by-hour electricity costs with the Norwegian government support scheme.
+
+The support covers 90% of the hourly spot price above the support limit, for
+consumption up to 5000 kWh per calendar month. The scalar functions in calc_funcs
+apply the rule to one average monthly price, which underestimates the support
+whenever prices vary within the month.
+"""
+
+from pathlib import Path
+from typing import BinaryIO
+import pandas as pd
+import numpy as np
+
+# Support scheme parameters, the limit is 73 øre per kWh plus VAT
+GOVT_SUPPORT_LIMIT_NOK = 0.9125
+GOVT_SUPPORT_RATE = 0.9
+GOVT_SUPPORT_MONTHLY_CAP_KWH = 5000
+
+# Calendar months of the support scheme follow Norwegian local time
+LOCAL_TIMEZONE = "Europe/Oslo"
+
+
+def load_hourly_series(
+    source: str | Path | BinaryIO,
+    value_column: str | None = None,
+    time_column: str | None = None,
+) -> pd.Series:
+    """
+    Read an hourly price or consumption series from a CSV or Parquet file.
+
+    Files on disk are memory-mapped while they are parsed, so multi-year series are
+    not copied into memory twice. Timezone-aware timestamps are converted to
+    Norwegian local time, which decides the calendar month of every hour.
+
+    Parameters
+    ----------
+    source : str, Path or file-like
+        The file to read. Parquet is detected from a .parquet or .pq suffix or, for
+        file-like objects, from the file's name attribute.
+    value_column : str, optional
+        The column with the hourly values, by default the first column that is not
+        the time column.
+    time_column : str, optional
+        The column with the start time of each hour, by default the first column.
+
+    Returns
+    -------
+    pd.Series
+        The hourly values as float64, indexed by a sorted DatetimeIndex.
+
+    Raises
+    ------
+    ValueError
+        If the file has fewer than two columns or duplicated timestamps.
+    """
+    name = str(getattr(source, "name", source))
+    is_path = isinstance(source, (str, Path))
+
+    if name.endswith((".parquet", ".pq")):
+        df = pd.read_parquet(source, memory_map=is_path)
+    else:
+        df = pd.read_csv(source, memory_map=is_path)
+
+    if df.shape[1] < 2:
+        raise ValueError("Hourly files need a time column and a value column")
+
+    time_column = time_column or df.columns[0]
+    value_column = value_column or next(c for c in df.columns if c != time_column)
+
+    index = pd.DatetimeIndex(pd.to_datetime(df[time_column]))
+    if index.tz is not None:
+        index = index.tz_convert(LOCAL_TIMEZONE)
+
+    series = pd.Series(
+        df[value_column].to_numpy(dtype=np.float64), index=index, name=value_column
+    ).sort_index()
+
+    if series.index.has_duplicates:
+        raise ValueError("Hourly files must have one row per hour")
+
+    return series
+
+
+def _month_groups(index: pd.DatetimeIndex) -> tuple[np.ndarray, pd.PeriodIndex]:
+    """
+    Number the calendar months of a sorted DatetimeIndex from 0.
+
+    Returns
+    -------
+    tuple[np.ndarray, pd.PeriodIndex]
+        The month number of every timestamp and the calendar month of every number.
+    """
+    # Months since 1970 of the local wall-clock time, cheaper than the year and
+    # month accessors on a timezone-aware index
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    month_codes = index.to_numpy().astype("datetime64[M]")
+
+    month_starts = np.flatnonzero(np.r_[True, month_codes[1:] != month_codes[:-1]])
+    group_ids = np.repeat(
+        np.arange(month_starts.size), np.diff(np.r_[month_starts, month_codes.size])
+    )
+    periods = pd.PeriodIndex(month_codes[month_starts], freq="M")
+    return group_ids, periods
+
+
+def flat_consumption_profile(index: pd.DatetimeIndex, monthly_kwh: float) -> pd.Series:
+    """
+    Spread a monthly consumption evenly over the hours of each month.
+
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+        The sorted hours to spread the consumption over, e.g. the index of a price
+        series.
+    monthly_kwh : float
+        The consumption per calendar month in kWh.
+
+    Returns
+    -------
+    pd.Series
+        The consumption of every hour in kWh.
+    """
+    month_ids, _ = _month_groups(index)
+    hours_per_month = np.bincount(month_ids)
+    return pd.Series(monthly_kwh / hours_per_month[month_ids], index=index, name="kWh")
+
+
+def hourly_govt_support(
+    kwh_usage: np.ndarray,
+    kwh_price_incl_vat_nok: np.ndarray,
+    month_ids: np.ndarray,
+    govt_support_limit_nok: float = GOVT_SUPPORT_LIMIT_NOK,
+    monthly_cap_kwh: float = GOVT_SUPPORT_MONTHLY_CAP_KWH,
+) -> np.ndarray:
+    """
+    Calculate the government support for every hour.
+
+    Each hour is supported for the part of its consumption that still fits under the
+    monthly cap, given the consumption of the earlier hours of the same month. The
+    hour in which the cap is reached is supported partially.
+
+    Parameters
+    ----------
+    kwh_usage : np.ndarray
+        The consumption of every hour in kWh, in chronological order.
+    kwh_price_incl_vat_nok : np.ndarray
+        The spot price of every hour in NOK per kWh including VAT.
+    month_ids : np.ndarray
+        A number per hour that identifies its calendar month. Hours of the same month
+        must be contiguous.
+    govt_support_limit_nok : float, optional
+        The price above which support is paid, by default GOVT_SUPPORT_LIMIT_NOK.
+    monthly_cap_kwh : float, optional
+        The supported consumption per month, by default GOVT_SUPPORT_MONTHLY_CAP_KWH.
+
+    Returns
+    -------
+    np.ndarray
+        The support of every hour in NOK.
+
+    Examples
+    --------
+    >>> hourly_govt_support(
+    ...     np.array([3000.0, 3000.0, 100.0]), np.array([1.9125, 1.9125, 1.9125]),
+    ...     np.array([0, 0, 1]),
+    ... ).round(2)
+    array([2700., 1800.,   90.])
+    """
+    kwh_usage = np.asarray(kwh_usage, dtype=np.float64)
+    month_ids = np.asarray(month_ids)
+
+    # Consumption of the month before each hour, from one cumulative sum over all hours
+    cumulative = np.cumsum(kwh_usage)
+    month_starts = np.flatnonzero(np.r_[True, month_ids[1:] != month_ids[:-1]])
+    month_offset = np.repeat(
+        cumulative[month_starts] - kwh_usage[month_starts],
+        np.diff(np.r_[month_starts, kwh_usage.size]),
+    )
+    used_before = cumulative - kwh_usage - month_offset
+
+    supported_kwh = np.clip(monthly_cap_kwh - used_before, 0.0, kwh_usage)
+    excess_price = np.maximum(
+        np.asarray(kwh_price_incl_vat_nok) - govt_support_limit_nok, 0.0
+    )
+
+    return supported_kwh * excess_price * GOVT_SUPPORT_RATE
+
+
+def hourly_electricity_costs(
+    kwh_usage: pd.Series,
+    kwh_price_incl_vat_nok: pd.Series,
+    markup_nok: float,
+    fixed_cost_nok: float,
+    govt_support_limit_nok: float = GOVT_SUPPORT_LIMIT_NOK,
+) -> pd.DataFrame:
+    """
+    Calculate monthly electricity costs from hourly consumption and spot prices.
+
+    Only hours present in both series are used. The energy cost, support and
+    consumption are summed per calendar month with bincount, so a year of hours is
+    handled in a couple of milliseconds.
+
+    Parameters
+    ----------
+    kwh_usage : pd.Series
+        Hourly consumption in kWh, indexed by timestamp.
+    kwh_price_incl_vat_nok : pd.Series
+        Hourly spot prices in NOK per kWh including VAT, indexed by timestamp.
+    markup_nok : float
+        The additional markup cost per kWh in NOK.
+    fixed_cost_nok : float
+        The fixed cost of electricity per month in NOK.
+    govt_support_limit_nok : float, optional
+        The price above which support is paid, by default GOVT_SUPPORT_LIMIT_NOK.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per calendar month with the columns Month, kWh Usage, Average Price
+        (NOK), Energy Cost (NOK), Govt Support (NOK), Fixed Cost (NOK) and
+        Total Cost (NOK). The average price is weighted by consumption.
+    """
+    usage, price = kwh_usage.sort_index().align(
+        kwh_price_incl_vat_nok.sort_index(), join="inner"
+    )
+
+    usage_values = usage.to_numpy(dtype=np.float64)
+    price_values = price.to_numpy(dtype=np.float64)
+    month_ids, months = _month_groups(pd.DatetimeIndex(usage.index))
+
+    support = hourly_govt_support(
+        usage_values, price_values, month_ids, govt_support_limit_nok
+    )
+
+    n_months = len(months)
+    monthly_usage = np.bincount(month_ids, usage_values, n_months)
+    monthly_spot_cost = np.bincount(month_ids, usage_values * price_values, n_months)
+    monthly_support = np.bincount(month_ids, support, n_months)
+    energy_cost = monthly_spot_cost + monthly_usage * markup_nok
+    fixed_cost = np.full(n_months, float(fixed_cost_nok))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average_price = monthly_spot_cost / monthly_usage
+
+    return pd.DataFrame(
+        {
+            "Month": months,
+            "kWh Usage": monthly_usage,
+            "Average Price (NOK)": average_price,
+            "Energy Cost (NOK)": energy_cost,
+            "Govt Support (NOK)": monthly_support,
+            "Fixed Cost (NOK)": fixed_cost,
+            "Total Cost (NOK)": fixed_cost + energy_cost - monthly_support,
+        }
+    )
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Serialization of scenario results for the data download on the scenario page.
+"""
+
+from pathlib import Path
+from io import BytesIO
+import sys
+from typing import BinaryIO, Iterator, NamedTuple
+import pandas as pd
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import expand_scenario_frame  # noqa: E402
+
+
+class ExportFormat(NamedTuple):
+    """
+    File extension and MIME type of a download format.
+    """
+
+    extension: str
+    mime: str
+
+
+EXPORT_FORMATS = {
+    "CSV": ExportFormat("csv", "text/csv"),
+    "Parquet": ExportFormat("parquet", "application/vnd.apache.parquet"),
+    "Arrow": ExportFormat("arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Rows expanded and serialized at a time, so the expanded frame is never built in full
+EXPORT_CHUNK_SIZE = 100_000
+
+
+def iter_export_chunks(
+    df: pd.DataFrame, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield a scenario frame in full layout, a block of rows at a time.
+
+    Compact frames are expanded one chunk at a time, so the full frame is never held
+    in memory. An empty frame yields a single empty chunk, which carries the columns.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A full or compact scenario frame.
+    chunk_size : int, optional
+        The maximum number of rows per chunk, by default EXPORT_CHUNK_SIZE.
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive row blocks of the expanded frame.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    for start in range(0, max(len(df), 1), chunk_size):
+        yield expand_scenario_frame(df.iloc[start : start + chunk_size])
+
+
+def write_scenario_export(
+    df: pd.DataFrame,
+    sink: BinaryIO,
+    data_format: str = "CSV",
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> None:
+    """
+    Write a scenario frame to a binary file-like object in the given format.
+
+    CSV is written chunk by chunk with the header in front of the first chunk only.
+    Parquet gets one row group per chunk and Arrow IPC one record batch per chunk. Only
+    the expansion and serialization are chunked, the memory use of the output depends
+    on the sink.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A full or compact scenario frame.
+    sink : BinaryIO
+        Where to write the file, e.g. an open file or io.BytesIO.
+    data_format : str, optional
+        One of the keys of EXPORT_FORMATS, by default 'CSV'.
+    chunk_size : int, optional
+        The maximum number of rows serialized at a time, by default EXPORT_CHUNK_SIZE.
+
+    Raises
+    ------
+    ValueError
+        If the data format is not supported.
+    """
+    if data_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"data_format must be one of {', '.join(EXPORT_FORMATS)}, got {data_format!r}"
+        )
+
+    chunks = iter_export_chunks(df, chunk_size)
+
+    if data_format == "CSV":
+        for i, chunk in enumerate(chunks):
+            sink.write(chunk.to_csv(index=False, header=i == 0).encode("utf-8"))
+        return
+
+    # pyarrow comes with streamlit, but is only needed for the columnar formats
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    first = pa.Table.from_pandas(next(chunks), preserve_index=False)
+    if data_format == "Parquet":
+        writer = pq.ParquetWriter(sink, first.schema)
+    else:
+        writer = pa.ipc.new_file(sink, first.schema)
+
+    with writer:
+        writer.write_table(first)
+        for chunk in chunks:
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=first.schema, preserve_index=False)
+            )
+
+
+def scenario_export_bytes(
+    df: pd.DataFrame, data_format: str = "CSV", chunk_size: int = EXPORT_CHUNK_SIZE
+) -> bytes:
+    """
+    Serialize a scenario frame for download.
+
+    The frame is written chunk by chunk with write_scenario_export, but into an
+    io.BytesIO, so the whole file is held in memory before it is returned.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A full or compact scenario frame.
+    data_format : str, optional
+        One of the keys of EXPORT_FORMATS, by default 'CSV'.
+    chunk_size : int, optional
+        The maximum number of rows serialized at a time, by default EXPORT_CHUNK_SIZE.
+
+    Returns
+    -------
+    bytes
+        The file contents.
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({"house_price": [3000000], "a_total": [15000.0]})
+    >>> scenario_export_bytes(df, "CSV")
+    b'house_price,a_total\\n3000000,15000.0\\n'
+    """
+    sink = BytesIO()
+    write_scenario_export(df, sink, data_format, chunk_size)
+    return sink.getvalue()
@@ -1,3 +1,11 @@
 def format_interest_rate(rate):
     """Format interest rate as percentage string."""
-    return f"{rate*100:.3f}%"
\ No newline at end of file
+    return f"{rate*100:.3f}%"
+
+# Display names of the loan types in LOAN_TYPES
+LOAN_TYPE_NAMES = {"annuity": "Annuitetslån", "serial": "Serielån"}
+
+
+def format_loan_type(loan_type):
+    """Format loan type as its Norwegian name."""
+    return LOAN_TYPE_NAMES.get(loan_type, loan_type)
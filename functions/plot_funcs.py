@@ -15,16 +15,154 @@ import sys
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
+from functions.allocation_funcs import allocation_matrix, owner_labels, two_owner_shares  # noqa: E402
 from functions.calc_funcs import loan_calc  # noqa: E402
 
 
 # Set the default theme for all charts
 template = 'seaborn'
 
-def create_interest_rate_sensitivity_chart(loan_amount: float, periods: int, interest_rate_range: tuple[float, float]) -> go.Figure:
+# Largest number of heatmap cells sent to the browser, about 200 x 200
+HEATMAP_MAX_CELLS = 40_000
+
+# Largest number of points per line chart trace sent to the browser
+LINE_CHART_MAX_POINTS = 150
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+   """
+   Select the points of a line to keep with the Largest-Triangle-Three-Buckets algorithm.
+
+   The first and last points are always kept. The points in between are split into
+   n_out - 2 buckets of equal count, and from each bucket the point is kept that forms
+   the largest triangle with the previously kept point and the mean of the next bucket.
+   This keeps peaks and bends that a plain stride would cut off.
+
+   Parameters
+   ----------
+   x : np.ndarray
+       The x values of the line, in increasing order.
+   y : np.ndarray
+       The y values of the line.
+   n_out : int
+       The number of points to keep, at least 3.
+
+   Returns
+   -------
+   np.ndarray
+       The sorted indices of the kept points. All indices if the line has at most n_out points.
+
+   Raises
+   ------
+   ValueError
+       If n_out is less than 3.
+
+   Examples
+   --------
+   >>> lttb_indices(np.arange(7), np.array([0, 1, 0, 5, 0, 1, 0]), 4)
+   array([0, 2, 3, 6])
+   """
+   if n_out < 3:
+       raise ValueError(f"Cannot decimate a line to {n_out} points, at least 3 are needed")
+   x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+   n = x.size
+   if n <= n_out:
+       return np.arange(n)
+
+   # Bucket i holds the points edges[i]:edges[i + 1], the first and last point stand alone
+   edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+   edges[-1] = n - 1
+
+   # Mean of every bucket, with the last point as the bucket after the last one
+   x_sums, y_sums = np.concatenate([[0], np.cumsum(x)]), np.concatenate([[0], np.cumsum(y)])
+   counts = np.diff(edges)
+   x_means = np.append((x_sums[edges[1:]] - x_sums[edges[:-1]]) / counts, x[-1])
+   y_means = np.append((y_sums[edges[1:]] - y_sums[edges[:-1]]) / counts, y[-1])
+
+   indices = np.empty(n_out, dtype=np.int64)
+   indices[0], indices[-1] = 0, n - 1
+   kept = 0
+   for bucket in range(n_out - 2):
+       start, stop = edges[bucket], edges[bucket + 1]
+       # Twice the triangle area, up to sign
+       area = np.abs(
+           (x[kept] - x_means[bucket + 1]) * (y[start:stop] - y[kept])
+           - (x[kept] - x[start:stop]) * (y_means[bucket + 1] - y[kept])
+       )
+       kept = start + int(np.argmax(area))
+       indices[bucket + 1] = kept
+   return indices
+
+
+def decimate_line(x: np.ndarray, y: np.ndarray, max_points: int | None = LINE_CHART_MAX_POINTS) -> tuple[np.ndarray, np.ndarray]:
+   """
+   Reduce a line to at most max_points points with lttb_indices.
+
+   Parameters
+   ----------
+   x : np.ndarray
+       The x values of the line, in increasing order.
+   y : np.ndarray
+       The y values of the line.
+   max_points : int or None, optional
+       The largest number of points to keep, by default LINE_CHART_MAX_POINTS. None keeps
+       every point.
+
+   Returns
+   -------
+   tuple[np.ndarray, np.ndarray]
+       The kept x and y values.
+   """
+   x, y = np.asarray(x), np.asarray(y)
+   if max_points is None:
+       return x, y
+   indices = lttb_indices(x, y, max_points)
+   return x[indices], y[indices]
+
+
+def decimate_lines(x: np.ndarray, ys: list[np.ndarray], max_points: int | None = LINE_CHART_MAX_POINTS) -> tuple[np.ndarray, list[np.ndarray]]:
+   """
+   Reduce several lines over the same x values to at most max_points shared points.
+
+   Every line picks max_points // len(ys) points with lttb_indices, and all lines keep
+   the union of the picked points. The traces of a chart therefore share their x values,
+   so a unified hover compares them at the same month.
+
+   Parameters
+   ----------
+   x : np.ndarray
+       The x values of the lines, in increasing order.
+   ys : list[np.ndarray]
+       The y values of every line.
+   max_points : int or None, optional
+       The largest number of points to keep, by default LINE_CHART_MAX_POINTS. None keeps
+       every point.
+
+   Returns
+   -------
+   tuple[np.ndarray, list[np.ndarray]]
+       The kept x values and the kept y values of every line.
+
+   Examples
+   --------
+   >>> x, (a, b) = decimate_lines(np.arange(9), [np.arange(9.0), np.arange(9.0) ** 2], 6)
+   >>> x.size == a.size == b.size
+   True
+   """
+   x, ys = np.asarray(x), [np.asarray(y) for y in ys]
+   if max_points is None:
+       return x, ys
+   budget = max(max_points // max(len(ys), 1), 3)
+   indices = np.unique(np.concatenate([lttb_indices(x, y, budget) for y in ys]))
+   return x[indices], [y[indices] for y in ys]
+
+
+def create_interest_rate_sensitivity_chart(loan_amount: float, periods: int, interest_rate_range: tuple[float, float], loan_type: str = "annuity", max_points: int | None = LINE_CHART_MAX_POINTS) -> go.Figure:
    """
    Create a line chart that shows the monthly payment for a loan based on a range of interest rates.
 
+   For serial loans the first monthly payment is shown, which is the largest.
+
    Parameters
    ----------
    loan_amount : float
@@ -33,6 +171,10 @@ def create_interest_rate_sensitivity_chart(loan_amount: float, periods: int, int
        The number of months the loan will be amortized over.
    interest_rate_range : tuple[float, float]
        The range of interest rates to include in the chart.
+   loan_type : str, optional
+       One of LOAN_TYPES, by default 'annuity'.
+   max_points : int or None, optional
+       The largest number of points drawn, see decimate_line, by default LINE_CHART_MAX_POINTS.
 
    Returns
    -------
@@ -40,7 +182,8 @@ def create_interest_rate_sensitivity_chart(loan_amount: float, periods: int, int
        A Plotly figure object representing the interest rate sensitivity chart.
    """
    interest_rates = np.arange(interest_rate_range[0], interest_rate_range[1] + 0.1, 0.25)
-   monthly_payments = loan_calc(loan_amount, interest_rates/100, periods)
+   monthly_payments = loan_calc(loan_amount, interest_rates/100, periods, loan_type)
+   interest_rates, monthly_payments = decimate_line(interest_rates, monthly_payments, max_points)
   
    fig = go.Figure()
    fig.add_trace(go.Scatter(
@@ -58,37 +201,56 @@ def create_interest_rate_sensitivity_chart(loan_amount: float, periods: int, int
    )
    return fig
 
-def create_cost_breakdown_sunburst(df: pd.DataFrame, person: str) -> go.Figure:
+def create_cost_breakdown_sunburst(df: pd.DataFrame, person: str, ownership_shares: list[float] | None = None, owner_fixed_costs: list[float] | None = None, split_rules: dict | None = None) -> go.Figure:
    """
    Create a Plotly Sunburst chart that shows the breakdown of monthly costs for a given person.
 
+   The shared costs are allocated with allocation_matrix. By default person A owns the
+   ownership fraction in df and person B the rest, with their fixed costs from df.
+
    Parameters
    ----------
    df : pd.DataFrame
        The DataFrame containing the relevant data for the cost breakdown.
    person : str
-       The person for whom the cost breakdown should be calculated ('A' or 'B').
+       The person for whom the cost breakdown should be calculated ('A', 'B', 'C', ...).
+   ownership_shares : list[float] or None, optional
+       The ownership share of every owner, by default None for the two owners in df.
+   owner_fixed_costs : list[float] or None, optional
+       The fixed costs of every owner in ownership_shares, by default None for no fixed costs.
+   split_rules : dict or None, optional
+       The split rule of each shared cost type, by default DEFAULT_SPLIT_RULES.
 
    Returns
    -------
    go.Figure
        A Plotly figure object representing the cost breakdown sunburst chart.
+
+   Raises
+   ------
+   ValueError
+       If person is not one of the owners.
    """
-   if person == 'A':
-       loan_payment = df['monthly_loan_payment'] * df['ownership_fraq']
-       fixed_costs = df['person_a_fixed_costs']
+   labels = owner_labels(2 if ownership_shares is None else len(ownership_shares))
+   if person not in labels:
+       raise ValueError(f"Person {person!r} is not one of the owners {', '.join(labels)}")
+   owner = labels.index(person)
+
+   if ownership_shares is None:
+       ownership_shares = two_owner_shares(df['ownership_fraq'].iloc[0])
+       fixed_costs = df[f'person_{person.lower()}_fixed_costs'].iloc[0]
    else:
-       loan_payment = df['monthly_loan_payment'] * (1 - df['ownership_fraq'])
-       fixed_costs = df['person_b_fixed_costs']
+       fixed_costs = 0 if owner_fixed_costs is None else owner_fixed_costs[owner]
+   loan_weight, el_weight, house_weight = allocation_matrix(ownership_shares, split_rules)[:, owner]
   
    sunburst_data = pd.DataFrame({
        'kategori': ['Boligkostnader', 'Boligkostnader', 'Boligkostnader', 'Personlige kostnader'],
        'underkategori': ['Lånebetaling', 'Faste boligkostnader', 'Strøm', 'Andre faste kostnader'],
        'verdi': [
-           loan_payment.iloc[0],
-           df['fixed_cost_house'].iloc[0] / 2,  # Assuming equal split
-           df['el_cost'].iloc[0] / 2,  # Assuming equal split
-           fixed_costs.iloc[0]
+           df['monthly_loan_payment'].iloc[0] * loan_weight,
+           df['fixed_cost_house'].iloc[0] * house_weight,
+           df['el_cost'].iloc[0] * el_weight,
+           fixed_costs
        ]
    })
   
@@ -117,7 +279,7 @@ def create_cost_breakdown_sunburst(df: pd.DataFrame, person: str) -> go.Figure:
    
    return fig
 
-def create_amortization_chart(schedule: pd.DataFrame, title: str) -> go.Figure:
+def create_amortization_chart(schedule: pd.DataFrame, title: str, max_points: int | None = LINE_CHART_MAX_POINTS) -> go.Figure:
    """
    Create a Plotly line chart that shows the amortization schedule for a loan.
 
@@ -127,6 +289,9 @@ def create_amortization_chart(schedule: pd.DataFrame, title: str) -> go.Figure:
        The DataFrame containing the amortization schedule data.
    title : str
        The title to be displayed on the chart.
+   max_points : int or None, optional
+       The largest number of months drawn, shared by all traces, see decimate_lines, by
+       default LINE_CHART_MAX_POINTS.
 
    Returns
    -------
@@ -136,19 +301,17 @@ def create_amortization_chart(schedule: pd.DataFrame, title: str) -> go.Figure:
    
    fig = go.Figure()
 
-   fig.add_trace(
-       go.Scatter(x=schedule['Month'], y=schedule['Remaining Balance'], name="Gjenstående saldo")
-   )
-   fig.add_trace(
-       go.Scatter(x=schedule['Month'], y=schedule['Principal'], name="Kumulativt avdrag")
-   )
-   fig.add_trace(
-       go.Scatter(x=schedule['Month'], y=schedule['Interest'], name="Kumulative renter")
-   )
-   
-   fig.add_trace(
-       go.Scatter(x=schedule['Month'], y=schedule['Total Paid'], name="Kumulativ total")
+   traces = {
+       'Remaining Balance': "Gjenstående saldo",
+       'Principal': "Kumulativt avdrag",
+       'Interest': "Kumulative renter",
+       'Total Paid': "Kumulativ total",
+   }
+   months, lines = decimate_lines(
+       schedule['Month'], [schedule[column] for column in traces], max_points
    )
+   for name, values in zip(traces.values(), lines):
+       fig.add_trace(go.Scatter(x=months, y=values, name=name))
 
    fig.update_layout(
        title=title,
@@ -160,24 +323,82 @@ def create_amortization_chart(schedule: pd.DataFrame, title: str) -> go.Figure:
 
    return fig
 
-def create_heatmap_divergent_hover(df: pd.DataFrame, x_column: str, y_column: str, z_column: str, 
-                                  title: str = 'Heatmap', 
-                                  x_axis_title: str = 'X Axis', 
-                                  y_axis_title: str = 'Y Axis', 
-                                  colorbar_title: str = 'Value') -> go.Figure:
+def decimate_grid(z: np.ndarray, x: np.ndarray, y: np.ndarray, max_cells: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
    """
-   Create a Plotly Heatmap chart with a divergent color scale and hover information.
+   Downsample a dense grid to at most max_cells cells by keeping evenly spaced rows and columns.
+
+   Both axes are thinned by the same factor and the first and last row and column are always
+   kept, so the displayed grid spans the full axes. The kept cells are taken from the grid
+   itself rather than averaged, so every displayed value is exact at its displayed axis values.
 
    Parameters
    ----------
-   df : pd.DataFrame
-       The DataFrame containing the data to be plotted.
-   x_column : str
-       The name of the column to be used for the x-axis.
-   y_column : str
-       The name of the column to be used for the y-axis.
-   z_column : str
-       The name of the column to be used for the z-axis (color scale).
+   z : np.ndarray
+       The grid values, with shape (len(y), len(x)).
+   x : np.ndarray
+       The axis values along the columns.
+   y : np.ndarray
+       The axis values along the rows.
+   max_cells : int
+       The largest number of cells to keep.
+
+   Returns
+   -------
+   tuple[np.ndarray, np.ndarray, np.ndarray]
+       The decimated z, x and y.
+
+   Examples
+   --------
+   >>> z, x, y = decimate_grid(np.arange(100.0).reshape(10, 10), np.arange(10), np.arange(10), 25)
+   >>> x, y
+   (array([0, 2, 4, 7, 9]), array([0, 2, 4, 7, 9]))
+   """
+   z, x, y = np.asarray(z), np.asarray(x), np.asarray(y)
+   if z.shape != (y.size, x.size):
+       raise ValueError(f"Grid of shape {z.shape} does not match axes of length {y.size} and {x.size}")
+   if z.size <= max_cells:
+       return z, x, y
+
+   scale = np.sqrt(max_cells / z.size)
+   n_rows, n_columns = int(y.size * scale), int(x.size * scale)
+
+   # An axis too short to thin keeps both its ends, and the other axis gets the rest of the cells
+   if n_columns < min(x.size, 2):
+       n_columns = min(x.size, 2)
+       n_rows = max_cells // n_columns
+   elif n_rows < min(y.size, 2):
+       n_rows = min(y.size, 2)
+       n_columns = max_cells // n_rows
+   n_rows = min(max(n_rows, 1), y.size)
+   n_columns = min(max(n_columns, 1), x.size)
+
+   rows = np.linspace(0, y.size - 1, n_rows).round().astype(int)
+   columns = np.linspace(0, x.size - 1, n_columns).round().astype(int)
+   return z[np.ix_(rows, columns)], x[columns], y[rows]
+
+
+def create_heatmap_from_grid(z: np.ndarray, x: np.ndarray, y: np.ndarray,
+                             title: str = 'Heatmap',
+                             x_axis_title: str = 'X Axis',
+                             y_axis_title: str = 'Y Axis',
+                             colorbar_title: str = 'Value',
+                             max_cells: int = HEATMAP_MAX_CELLS) -> go.Figure:
+   """
+   Create a Plotly Heatmap chart with a divergent color scale from a dense 2-D grid.
+
+   Grids larger than max_cells are thinned with decimate_grid before they are added to the
+   figure, which keeps the size of the figure sent to the browser bounded. The color scale
+   and its midpoint are computed from the full grid, so the colors do not depend on the
+   decimation.
+
+   Parameters
+   ----------
+   z : np.ndarray
+       The values to be plotted, with shape (len(y), len(x)).
+   x : np.ndarray
+       The axis values along the columns.
+   y : np.ndarray
+       The axis values along the rows.
    title : str, optional
        The title to be displayed on the chart, by default 'Heatmap'.
    x_axis_title : str, optional
@@ -186,28 +407,27 @@ def create_heatmap_divergent_hover(df: pd.DataFrame, x_column: str, y_column: st
        The title to be displayed on the y-axis, by default 'Y Axis'.
    colorbar_title : str, optional
        The title to be displayed on the color bar, by default 'Value'.
+   max_cells : int, optional
+       The largest number of cells sent to the figure, by default HEATMAP_MAX_CELLS.
 
    Returns
    -------
    go.Figure
        A Plotly figure object representing the heatmap chart.
    """
-   # Pivot the dataframe
-   pivot_df = df.pivot(index=y_column, columns=x_column, values=z_column)
-   
-   # Calculate the median for the divergent color scale
-   median_value = np.median(pivot_df.values)
-   
+   z = np.asarray(z)
+   z_shown, x_shown, y_shown = decimate_grid(z, x, y, max_cells)
+
    # Create the heatmap
    fig = go.Figure(data=go.Heatmap(
-       z=pivot_df.values,
-       x=pivot_df.columns,
-       y=pivot_df.index,
+       z=z_shown,
+       x=x_shown,
+       y=y_shown,
        colorscale='turbo',
        colorbar=dict(title=colorbar_title),
-       zmid=median_value,
-       zmin=df[z_column].min(),
-       zmax=df[z_column].max(),
+       zmid=np.median(z),
+       zmin=np.nanmin(z),
+       zmax=np.nanmax(z),
        hovertemplate=(
            f"<b>{x_axis_title}</b>: %{{x:.2f}}<br>"
            f"<b>{y_axis_title}</b>: %{{y}}<br>"
@@ -230,13 +450,67 @@ def create_heatmap_divergent_hover(df: pd.DataFrame, x_column: str, y_column: st
    return fig
 
 
-def create_amortization_chart_optimized(schedule: pd.DataFrame, title: str) -> go.Figure:
+def create_heatmap_divergent_hover(df: pd.DataFrame, x_column: str, y_column: str, z_column: str, 
+                                  title: str = 'Heatmap', 
+                                  x_axis_title: str = 'X Axis', 
+                                  y_axis_title: str = 'Y Axis', 
+                                  colorbar_title: str = 'Value',
+                                  max_cells: int = HEATMAP_MAX_CELLS) -> go.Figure:
+   """
+   Create a Plotly Heatmap chart with a divergent color scale and hover information.
+
+   The long DataFrame is pivoted to a grid and drawn with create_heatmap_from_grid. Grids
+   that are already dense arrays should be passed to create_heatmap_from_grid directly.
+
+   Parameters
+   ----------
+   df : pd.DataFrame
+       The DataFrame containing the data to be plotted.
+   x_column : str
+       The name of the column to be used for the x-axis.
+   y_column : str
+       The name of the column to be used for the y-axis.
+   z_column : str
+       The name of the column to be used for the z-axis (color scale).
+   title : str, optional
+       The title to be displayed on the chart, by default 'Heatmap'.
+   x_axis_title : str, optional
+       The title to be displayed on the x-axis, by default 'X Axis'.
+   y_axis_title : str, optional
+       The title to be displayed on the y-axis, by default 'Y Axis'.
+   colorbar_title : str, optional
+       The title to be displayed on the color bar, by default 'Value'.
+   max_cells : int, optional
+       The largest number of cells sent to the figure, by default HEATMAP_MAX_CELLS.
+
+   Returns
+   -------
+   go.Figure
+       A Plotly figure object representing the heatmap chart.
+   """
+   # Pivot the dataframe
+   pivot_df = df.pivot(index=y_column, columns=x_column, values=z_column)
+
+   return create_heatmap_from_grid(
+       pivot_df.to_numpy(),
+       pivot_df.columns.to_numpy(),
+       pivot_df.index.to_numpy(),
+       title=title,
+       x_axis_title=x_axis_title,
+       y_axis_title=y_axis_title,
+       colorbar_title=colorbar_title,
+       max_cells=max_cells,
+   )
+
+
+def create_amortization_chart_optimized(schedule: pd.DataFrame, title: str, max_points: int | None = LINE_CHART_MAX_POINTS) -> go.Figure:
     """
     Create an optimized amortization chart using Plotly.
 
     Args:
     schedule (Dict[str, Any]): A dictionary containing the amortization schedule data.
     title (str): The title of the chart.
+    max_points (int | None): The largest number of months drawn, shared by all traces, see decimate_lines.
 
     Returns:
     go.Figure: A Plotly figure object representing the amortization chart.
@@ -253,11 +527,13 @@ def create_amortization_chart_optimized(schedule: pd.DataFrame, title: str) -> g
 
     # Create figure with all traces at once
     fig = go.Figure()
-    fig.add_traces([
-        go.Scatter(x=months, y=remaining_balance, name="Gjenstående saldo"),
-        go.Scatter(x=months, y=cumulative_principal, name="Kumulativt avdrag"),
-        go.Scatter(x=months, y=cumulative_interest, name="Kumulative renter")
-    ])
+    traces = {
+        "Gjenstående saldo": remaining_balance,
+        "Kumulativt avdrag": cumulative_principal,
+        "Kumulative renter": cumulative_interest,
+    }
+    kept_months, lines = decimate_lines(months, list(traces.values()), max_points)
+    fig.add_traces([go.Scatter(x=kept_months, y=y, name=name) for name, y in zip(traces, lines)])
 
     # Set layout parameters all at once
     fig.update_layout(
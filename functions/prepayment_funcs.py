@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Amortization with extra payments (ekstra innbetaling).
+
+Extra payments go straight to the principal. The bank then either keeps the payment
+and shortens the loan (reduced term), or keeps the term and lowers the payment
+(reduced payment). Both cases are linear recurrences in the balance, which are solved
+in closed form with one cumulative sum over the months, so loans that are paid off
+at different times stay in the same vectorized batch. Months after the payoff are
+masked to zero.
+"""
+
+from pathlib import Path
+import sys
+from typing import NamedTuple
+import pandas as pd
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    AmortizationSchedules,
+    annuity_kernel,
+    scenario_column,
+    serial_loans,
+)
+
+# Reduced term keeps the payment, reduced payment keeps the term
+PREPAYMENT_MODES = ("reduce_term", "reduce_payment")
+
+# Balances below this many NOK count as paid off
+PAYOFF_TOLERANCE = 0.005
+
+
+class PrepaymentSchedules(NamedTuple):
+    """
+    Amortization schedules with extra payments, and the savings from them.
+
+    Attributes
+    ----------
+    schedules : AmortizationSchedules
+        Cumulative principal (including extra payments), interest, total paid and
+        remaining balance, each of shape (*batch_shape, loan_term_months + 1).
+    payments : np.ndarray
+        The total payment of every month including extra payments, with shape
+        (*batch_shape, loan_term_months). Months after the payoff are zero.
+    payoff_month : np.ndarray
+        The month in which each loan is paid off.
+    months_saved : np.ndarray
+        The number of months by which each loan is shortened.
+    interest_saved : np.ndarray
+        The interest saved compared to the loan without extra payments, in NOK.
+    """
+
+    schedules: AmortizationSchedules
+    payments: np.ndarray
+    payoff_month: np.ndarray
+    months_saved: np.ndarray
+    interest_saved: np.ndarray
+
+
+def _extra_payments(
+    batch_shape: tuple,
+    loan_term_months: int,
+    extra_monthly: np.ndarray,
+    lump_sums: dict | None,
+) -> np.ndarray:
+    """
+    Build the extra payment of every month from recurring and one-off payments.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (*batch_shape, loan_term_months).
+
+    Raises
+    ------
+    ValueError
+        If a lump sum falls outside the loan term or an extra payment is negative.
+    """
+    extras = np.zeros((*batch_shape, loan_term_months))
+    extras += extra_monthly[..., np.newaxis]
+    for month, amount in (lump_sums or {}).items():
+        if not 1 <= month <= loan_term_months:
+            raise ValueError(f"Lump sum in month {month} is outside the loan term")
+        extras[..., month - 1] += amount
+
+    if (extras < 0).any():
+        raise ValueError("Extra payments must be non-negative")
+    return extras
+
+
+def calculate_prepayment_schedules(
+    loan_amounts: np.ndarray | float,
+    annual_interest_rates: np.ndarray | float,
+    loan_term_months: int,
+    extra_monthly: np.ndarray | float = 0.0,
+    lump_sums: dict[int, np.ndarray | float] | None = None,
+    mode: str = "reduce_term",
+    loan_type: str | np.ndarray = "annuity",
+) -> PrepaymentSchedules:
+    """
+    Calculate amortization schedules with recurring and one-off extra payments.
+
+    With mode 'reduce_term' the regular payment is kept and the extra payments shorten
+    the loan. Annuity loans then follow B_k = g^k (L - sum_j (P + x_j) / g^j) with
+    g = 1 + r, and serial loans the same with g = 1 and P = L / n. With mode
+    'reduce_payment' the remaining balance is re-spread over the remaining term after
+    every month, which gives B_k = C_k (L - sum_j x_j / C_j), where C_k is the balance
+    fraction of the loan without extra payments. Loan amounts, rates, loan types and
+    the extra payments are broadcast against each other, so a whole grid of loans is
+    evaluated in one call.
+
+    Parameters
+    ----------
+    loan_amounts : np.ndarray or float
+        The initial amount(s) of the loans.
+    annual_interest_rates : np.ndarray or float
+        The annual interest rate(s), expressed as decimals (e.g., 0.05 for 5%).
+    loan_term_months : int
+        The total number of months for the loan term.
+    extra_monthly : np.ndarray or float, optional
+        Extra payment made every month, by default 0.
+    lump_sums : dict[int, np.ndarray or float], optional
+        One-off extra payments by month number, from 1 to loan_term_months.
+    mode : str, optional
+        One of PREPAYMENT_MODES, by default 'reduce_term'.
+    loan_type : str or np.ndarray, optional
+        One of LOAN_TYPES, or an array of them, by default 'annuity'.
+
+    Returns
+    -------
+    PrepaymentSchedules
+        The schedules, monthly payments, payoff months and savings.
+
+    Raises
+    ------
+    ValueError
+        If the mode is unknown, a lump sum is outside the term or an extra payment
+        is negative.
+
+    Examples
+    --------
+    >>> result = calculate_prepayment_schedules(
+    ...     3000000, 0.05, 360, extra_monthly=2000, lump_sums={12: 100000}
+    ... )
+    >>> int(result.months_saved), round(float(result.interest_saved))
+    (94, 889639)
+    """
+    if mode not in PREPAYMENT_MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {PREPAYMENT_MODES}")
+
+    serial = serial_loans(loan_type)
+    loan_amounts = np.asarray(loan_amounts, dtype=float)
+    annual_interest_rates = np.asarray(annual_interest_rates, dtype=float)
+    extra_monthly = np.asarray(extra_monthly, dtype=float)
+    batch_shape = np.broadcast_shapes(
+        loan_amounts.shape,
+        annual_interest_rates.shape,
+        serial.shape,
+        extra_monthly.shape,
+        *(np.shape(amount) for amount in (lump_sums or {}).values()),
+    )
+    extras = _extra_payments(batch_shape, loan_term_months, extra_monthly, lump_sums)
+
+    loan = np.broadcast_to(loan_amounts, batch_shape)[..., np.newaxis]
+    monthly_rate = np.broadcast_to(annual_interest_rates / 12, batch_shape)[..., np.newaxis]
+    serial = np.broadcast_to(serial, batch_shape)[..., np.newaxis]
+    months = np.arange(loan_term_months + 1)
+
+    # (1 + r)^k - 1 for every month
+    growth_m1 = np.expm1(months * np.log1p(monthly_rate))
+
+    if mode == "reduce_term":
+        payment, _ = annuity_kernel(loan[..., 0], monthly_rate[..., 0] * 12, loan_term_months)
+        regular_payment = np.where(serial, loan / loan_term_months, payment[..., np.newaxis])
+        growth = np.where(serial, 1.0, growth_m1[..., 1:] + 1)
+        discounted = np.cumsum((regular_payment + extras) / growth, axis=-1)
+        balance = growth * (loan - discounted)
+    else:
+        # Balance fraction C_k of the loan without extra payments, which is linear for
+        # serial loans and annuity loans without interest
+        term_growth_m1 = growth_m1[..., -1:]
+        linear = serial | (monthly_rate == 0)
+        fraction = np.where(
+            linear,
+            (loan_term_months - months) / loan_term_months,
+            (term_growth_m1 - growth_m1) / np.where(linear, 1.0, term_growth_m1),
+        )[..., 1:]
+
+        # The last month pays off the loan anyway, so extra payments there do not count
+        discounted = np.cumsum(
+            np.divide(extras, fraction, out=np.zeros_like(extras), where=fraction > 0),
+            axis=-1,
+        )
+        balance = fraction * (loan - discounted)
+
+    # The first month with no balance left, where the last payment is cut short
+    paid_off = balance <= PAYOFF_TOLERANCE
+    paid_off[..., -1] = True
+    payoff_month = np.argmax(paid_off, axis=-1) + 1
+
+    # Mask the months from the payoff on
+    balance = np.where(months[1:] >= payoff_month[..., np.newaxis], 0.0, balance)
+    remaining_balance = np.concatenate([loan, balance], axis=-1)
+
+    interest = monthly_rate * remaining_balance[..., :-1]
+    principal = remaining_balance[..., :-1] - balance
+    payments = principal + interest
+
+    zero = np.zeros((*batch_shape, 1))
+    cumulative_principal = np.concatenate([zero, np.cumsum(principal, axis=-1)], axis=-1)
+    cumulative_interest = np.concatenate([zero, np.cumsum(interest, axis=-1)], axis=-1)
+
+    # Interest of the same loan without extra payments
+    base_interest = np.where(
+        serial[..., 0],
+        monthly_rate[..., 0] * loan[..., 0] * (loan_term_months + 1) / 2,
+        annuity_kernel(loan[..., 0], monthly_rate[..., 0] * 12, loan_term_months)[0]
+        * loan_term_months
+        - loan[..., 0],
+    )
+
+    cumulative_principal = cumulative_principal.round(0)
+    cumulative_interest_rounded = cumulative_interest.round(0)
+    schedules = AmortizationSchedules(
+        month=months,
+        principal=cumulative_principal,
+        interest=cumulative_interest_rounded,
+        remaining_balance=loan - cumulative_principal,
+        total_paid=cumulative_principal + cumulative_interest_rounded,
+    )
+
+    return PrepaymentSchedules(
+        schedules=schedules,
+        payments=payments,
+        payoff_month=payoff_month,
+        months_saved=loan_term_months - payoff_month,
+        interest_saved=base_interest - cumulative_interest[..., -1],
+    )
+
+
+def scenario_prepayment_savings(
+    df: pd.DataFrame,
+    extra_monthly: float = 0.0,
+    lump_sums: dict[int, float] | None = None,
+    mode: str = "reduce_term",
+) -> pd.DataFrame:
+    """
+    Calculate the savings from extra payments for every row of a scenario frame.
+
+    Savings only depend on the loan, rate, term and loan type, so every distinct loan
+    in the grid is evaluated once, in one batched call per term, and the results are
+    scattered back to the rows.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A full or compact scenario frame.
+    extra_monthly : float, optional
+        Extra payment made every month, by default 0.
+    lump_sums : dict[int, float], optional
+        One-off extra payments by month number.
+    mode : str, optional
+        One of PREPAYMENT_MODES, by default 'reduce_term'.
+
+    Returns
+    -------
+    pd.DataFrame
+        The columns payoff_month, months_saved and interest_saved, with the index of df.
+    """
+    house_price = scenario_column(df, "house_price")
+    loan = house_price - (scenario_column(df, "ek") - scenario_column(df, "transaction_costs"))
+    rate = scenario_column(df, "interest_rate")
+    term = scenario_column(df, "ammortisation_periods")
+    try:
+        serial = serial_loans(scenario_column(df, "loan_type"))
+    except KeyError:
+        serial = np.zeros(len(df), dtype=bool)
+
+    loans, inverse = np.unique(
+        np.column_stack([loan, rate, term, serial]).astype(float), axis=0, return_inverse=True
+    )
+    payoff_month = np.empty(len(loans), dtype=np.int64)
+    interest_saved = np.empty(len(loans))
+    for loan_term_months in np.unique(loans[:, 2]):
+        in_term = loans[:, 2] == loan_term_months
+        result = calculate_prepayment_schedules(
+            loans[in_term, 0],
+            loans[in_term, 1],
+            int(loan_term_months),
+            extra_monthly,
+            lump_sums,
+            mode,
+            np.where(loans[in_term, 3] == 1, "serial", "annuity"),
+        )
+        payoff_month[in_term] = result.payoff_month
+        interest_saved[in_term] = result.interest_saved
+
+    inverse = inverse.ravel()
+    return pd.DataFrame(
+        {
+            "payoff_month": payoff_month[inverse],
+            "months_saved": term.astype(np.int64) - payoff_month[inverse],
+            "interest_saved": interest_saved[inverse],
+        },
+        index=df.index,
+    )
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+
+Closed-form sensitivities of loan payments and total interest.
+
+The interest rate sensitivity chart and interest_rate_sensitivity answer "what if the
+rate changes" by evaluating loan_calc on a dense range of rates. The functions here
+return the first and second derivatives of the monthly payment and of the total interest
+with respect to the rate, the loan amount and the term instead, for any broadcastable
+grid of loans. From these follow elasticities, the change in kroner per 0.25pp, and
+smooth sensitivity curves interpolated between a few evaluated rates.
+
+For annuity loans with A the annuity factor, the payment is P = L A and the total
+interest is I = L (n A - 1). For serial loans the payment is the first and largest one,
+P = L (1 / n + r / 12), and the interest on the linearly falling balance is
+I = L r (n + 1) / 24. Derivatives with respect to the term treat the number of months
+as continuous.
+"""
+
+from typing import NamedTuple
+from pathlib import Path
+import sys
+import pandas as pd
+import numpy as np
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.annuity_table import annuity_factor_derivatives  # noqa: E402
+from functions.calc_funcs import (  # noqa: E402
+    first_payment_factors,
+    scenario_column,
+    serial_loans,
+)
+
+# Rate change shown in the "kr per 0.25pp" figures, the step of the rate slider
+RATE_STEP = 0.0025
+
+
+class LoanSensitivities(NamedTuple):
+    """
+    Payments, total interest and their derivatives, each in the broadcast shape of the
+    inputs to loan_sensitivities. Rate derivatives are per unit of annual rate, so a
+    change of 0.25pp is 0.0025 times the first derivative.
+    """
+
+    payment: np.ndarray
+    payment_d_rate: np.ndarray
+    payment_d2_rate: np.ndarray
+    payment_d_loan: np.ndarray
+    payment_d_term: np.ndarray
+    payment_d2_term: np.ndarray
+    payment_rate_elasticity: np.ndarray
+    total_interest: np.ndarray
+    interest_d_rate: np.ndarray
+    interest_d2_rate: np.ndarray
+    interest_d_loan: np.ndarray
+    interest_d_term: np.ndarray
+    interest_d2_term: np.ndarray
+
+    def payment_change(self, rate_change: float | np.ndarray = RATE_STEP) -> np.ndarray:
+        """
+        Second-order estimate of the change in payment for a change in the annual rate.
+        """
+        return self.payment_d_rate * rate_change + 0.5 * self.payment_d2_rate * rate_change**2
+
+    def interest_change(self, rate_change: float | np.ndarray = RATE_STEP) -> np.ndarray:
+        """
+        Second-order estimate of the change in total interest for a change in the annual rate.
+        """
+        return self.interest_d_rate * rate_change + 0.5 * self.interest_d2_rate * rate_change**2
+
+
+def loan_sensitivities(
+    loan_amount: np.ndarray | float,
+    annual_interest_rate: np.ndarray | float,
+    loan_term_months: np.ndarray | int,
+    loan_type: str | np.ndarray = "annuity",
+) -> LoanSensitivities:
+    """
+    Calculate payments, total interest and their derivatives for a grid of loans.
+
+    All inputs are broadcast against each other. The payment is the one calculated by
+    loan_calc, the first payment for serial loans, and the derivatives are exact.
+
+    Parameters
+    ----------
+    loan_amount : np.ndarray or float
+        The loan amount(s).
+    annual_interest_rate : np.ndarray or float
+        The annual interest rate(s).
+    loan_term_months : np.ndarray or int
+        The number(s) of months over which the loans are amortized.
+    loan_type : str or np.ndarray, optional
+        One of LOAN_TYPES, or an array of them, by default 'annuity'.
+
+    Returns
+    -------
+    LoanSensitivities
+        The payments, total interest and their derivatives.
+
+    Examples
+    --------
+    >>> sens = loan_sensitivities(3000000, 0.05, 360)
+    >>> round(float(sens.payment)), round(float(sens.payment_change()))
+    (16105, 461)
+    >>> round(float(sens.payment_rate_elasticity), 2)
+    0.57
+    """
+    loan = np.asarray(loan_amount, dtype=float)
+    rate = np.asarray(annual_interest_rate, dtype=float)
+    months = np.asarray(loan_term_months, dtype=float)
+    serial = serial_loans(loan_type)
+
+    factor = first_payment_factors(rate, months, loan_type)
+    d_rate, d2_rate, d_months, d2_months = annuity_factor_derivatives(rate, months)
+
+    # Serial loans: the first payment is linear in the rate, the principal is L / n
+    d_rate = np.where(serial, 1 / 12, d_rate)
+    d2_rate = np.where(serial, 0.0, d2_rate)
+    d_months = np.where(serial, -1 / months**2, d_months)
+    d2_months = np.where(serial, 2 / months**3, d2_months)
+
+    payment = loan * factor
+    payment_d_rate = loan * d_rate
+    with np.errstate(invalid="ignore", divide="ignore"):
+        elasticity = np.where(payment != 0, payment_d_rate * rate / payment, 0.0)
+
+    # Total interest per krone of loan, n A - 1 for annuities and r (n + 1) / 24 for serial
+    interest_factor = np.where(serial, rate * (months + 1) / 24, months * factor - 1)
+    interest_d_rate = np.where(serial, (months + 1) / 24, months * d_rate)
+    interest_d2_rate = np.where(serial, 0.0, months * d2_rate)
+    interest_d_months = np.where(serial, rate / 24, factor + months * d_months)
+    interest_d2_months = np.where(serial, 0.0, 2 * d_months + months * d2_months)
+
+    return LoanSensitivities(
+        payment=payment,
+        payment_d_rate=payment_d_rate,
+        payment_d2_rate=loan * d2_rate,
+        payment_d_loan=np.broadcast_to(factor, np.broadcast(loan, factor).shape).copy(),
+        payment_d_term=loan * d_months,
+        payment_d2_term=loan * d2_months,
+        payment_rate_elasticity=elasticity,
+        total_interest=loan * interest_factor,
+        interest_d_rate=loan * interest_d_rate,
+        interest_d2_rate=loan * interest_d2_rate,
+        interest_d_loan=np.broadcast_to(
+            interest_factor, np.broadcast(loan, interest_factor).shape
+        ).copy(),
+        interest_d_term=loan * interest_d_months,
+        interest_d2_term=loan * interest_d2_months,
+    )
+
+
+def scenario_sensitivities(df: pd.DataFrame, rate_step: float = RATE_STEP) -> pd.DataFrame:
+    """
+    Calculate the loan sensitivities of every row of a scenario frame.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A full or compact scenario frame, as returned by the scenario calculators.
+    rate_step : float, optional
+        The rate change of the payment_per_step and interest_per_step columns, by
+        default RATE_STEP.
+
+    Returns
+    -------
+    pd.DataFrame
+        One column per field of LoanSensitivities, plus payment_per_step and
+        interest_per_step, with the index of df.
+    """
+    loan = scenario_column(df, "house_price") - (
+        scenario_column(df, "ek") - scenario_column(df, "transaction_costs")
+    )
+    try:
+        loan_type = scenario_column(df, "loan_type").astype(str)
+    except KeyError:
+        loan_type = "annuity"
+
+    sens = loan_sensitivities(
+        loan,
+        scenario_column(df, "interest_rate"),
+        scenario_column(df, "ammortisation_periods"),
+        loan_type,
+    )
+    result = pd.DataFrame(sens._asdict(), index=df.index)
+    result["payment_per_step"] = sens.payment_change(rate_step)
+    result["interest_per_step"] = sens.interest_change(rate_step)
+    return result
+
+
+def payment_curve(
+    loan_amount: float,
+    knot_rates: np.ndarray,
+    loan_term_months: int,
+    rates: np.ndarray,
+    loan_type: str = "annuity",
+) -> np.ndarray:
+    """
+    Interpolate the monthly payment over a range of rates from a few evaluated rates.
+
+    The payment and its rate derivative are evaluated at the knots only, and joined by
+    cubic Hermite polynomials. The error falls with the fourth power of the knot spacing:
+    for a 5 MNOK loan over 30 years, knots every 2.5pp over 0-20% are within 0.4 kr of
+    loan_calc, and knots every 1pp within a hundredth of a krone.
+
+    Parameters
+    ----------
+    loan_amount : float
+        The loan amount.
+    knot_rates : np.ndarray
+        The increasing annual rates at which the payment is evaluated, at least two.
+    loan_term_months : int
+        The number of months over which the loan is amortized.
+    rates : np.ndarray
+        The annual rates to interpolate at, within the knots.
+    loan_type : str, optional
+        One of LOAN_TYPES, by default 'annuity'.
+
+    Returns
+    -------
+    np.ndarray
+        The interpolated monthly payments, one per rate.
+
+    Raises
+    ------
+    ValueError
+        If there are fewer than two knots or they are not increasing.
+
+    Examples
+    --------
+    >>> rates = np.array([0.01, 0.035, 0.06])
+    >>> float(payment_curve(100000, np.array([0.0, 0.05, 0.1]), 360, rates)[1].round(2))
+    449.11
+    """
+    knot_rates = np.asarray(knot_rates, dtype=float)
+    if knot_rates.size < 2 or (np.diff(knot_rates) <= 0).any():
+        raise ValueError("knot_rates must hold at least two increasing rates")
+
+    sens = loan_sensitivities(loan_amount, knot_rates, loan_term_months, loan_type)
+    rates = np.asarray(rates, dtype=float)
+
+    # Interval of every rate and the position within it
+    interval = np.clip(np.searchsorted(knot_rates, rates, side="right") - 1, 0, knot_rates.size - 2)
+    width = np.diff(knot_rates)[interval]
+    t = (rates - knot_rates[interval]) / width
+
+    # Cubic Hermite basis functions
+    h00 = (1 + 2 * t) * (1 - t) ** 2
+    h10 = t * (1 - t) ** 2
+    h01 = t**2 * (3 - 2 * t)
+    h11 = t**2 * (t - 1)
+
+    return (
+        h00 * sens.payment[interval]
+        + h10 * width * sens.payment_d_rate[interval]
+        + h01 * sens.payment[interval + 1]
+        + h11 * width * sens.payment_d_rate[interval + 1]
+    )
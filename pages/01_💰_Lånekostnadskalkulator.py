@@ -18,10 +18,12 @@ project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
 
+from functions.affordability_funcs import break_even_rate, max_house_price  # noqa: E402
 from functions.calc_funcs import (  # noqa: E402
     loan_calc,
     interest_rate_sensitivity,
 )
+from functions.plot_funcs import decimate_line  # noqa: E402
 
 
 st.set_page_config(layout="centered")
@@ -64,6 +66,9 @@ ammortisation_periods = st.number_input(
     value=360,
     step=1,
 )
+monthly_budget = st.number_input(
+    "Hvor mye kan du betale på lånet i måneden? (kr):", min_value=0, value=15000, step=500
+)
 
 # Convert interest rates from percentages to decimals
 interest_rate_range = np.arange(
@@ -82,6 +87,20 @@ if st.button("Beregn kostnader"):
             houseprice_nok, interest_rate_range, ammortisation_periods
         )
 
+        # Largest loan the monthly budget covers at every rate
+        df["Maks lån for budsjettet"] = max_house_price(
+            monthly_budget, None, df["Rentesats"].to_numpy(), ammortisation_periods, 0
+        ).round(-3)
+        max_rate = break_even_rate(
+            monthly_budget, None, houseprice_nok, ammortisation_periods, 0
+        )
+        if np.isnan(max_rate):
+            st.warning("Budsjettet dekker ikke lånet selv uten rente")
+        elif np.isinf(max_rate):
+            st.metric("Høyeste rente budsjettet tåler", "Over 100 %")
+        else:
+            st.metric("Høyeste rente budsjettet tåler", f"{max_rate * 100:.2f} %")
+
         # Format the dataframe
         df["Rentesats"] = df["Rentesats"] * 100  # Convert to percentage
         df["Månedlig lånekostnad"] = df["Månedlig lånekostnad"].round(0)
@@ -91,17 +110,20 @@ if st.button("Beregn kostnader"):
             "OrRd", [i / 10 for i in range(3, 9)]
         )
 
+        # Small rate steps give more points than the chart can show
+        rates, payments = decimate_line(df["Rentesats"], df["Månedlig lånekostnad"])
+
         # Create a line chart with adjusted OrRd color gradient
         fig_line = go.Figure()
         fig_line.add_trace(
             go.Scatter(
-                x=df["Rentesats"],
-                y=df["Månedlig lånekostnad"],
+                x=rates,
+                y=payments,
                 mode="lines+markers",
                 line=dict(color=custom_color_scale[-1], width=2),
                 marker=dict(
                     size=8,
-                    color=df["Rentesats"],
+                    color=rates,
                     colorscale=custom_color_scale,
                     colorbar=dict(title="Rentesats (%)"),
                     showscale=True,
@@ -123,6 +145,7 @@ if st.button("Beregn kostnader"):
                 df.style.format(
                     {
                         "Månedlig lånekostnad": "{:,.0f} kr",
+                        "Maks lån for budsjettet": "{:,.0f} kr",
                         "Rentesats": "{:.2f}%",
                     }
                 )
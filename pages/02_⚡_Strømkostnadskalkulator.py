@@ -9,14 +9,20 @@ import streamlit as st
 import numpy as np
 import toml
 import sys
+from io import BytesIO
 from pathlib import Path
 
 # Add the project root to the Python path
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
-from functions.calc_funcs import scenario_analysis_electricity_costs  # noqa: E402
-from functions.plot_funcs import create_heatmap_divergent_hover  # noqa: E402
+from functions.calc_funcs import calculate_electricity_costs_array  # noqa: E402
+from functions.electricity_funcs import (  # noqa: E402
+    flat_consumption_profile,
+    hourly_electricity_costs,
+    load_hourly_series,
+)
+from functions.plot_funcs import create_heatmap_from_grid  # noqa: E402
 from functions.metric_cards import electricity_metric_cards  # noqa: E402
 from functions import util_funcs  # noqa: E402
 
@@ -26,14 +32,23 @@ variables = toml.load(project_root.joinpath("variables.toml"))["electricity"]
 
 @st.cache_data
 def calculate_electricity_costs(
-    kwh_usage_range, kwh_price_range, markup_nok, fixed_cost_nok
+    kwh_usage_range, kwh_price_range, markup_nok, fixed_cost_nok, resolution
 ):
-    return scenario_analysis_electricity_costs(
-        kwh_usage_range=np.linspace(kwh_usage_range[0], kwh_usage_range[1], 50),
-        kwh_price_range=np.linspace(kwh_price_range[0], kwh_price_range[1], 50),
-        markup_nok=markup_nok,
-        fixed_cost_nok=fixed_cost_nok,
+    kwh_usage = np.linspace(kwh_usage_range[0], kwh_usage_range[1], resolution)
+    kwh_price = np.linspace(kwh_price_range[0], kwh_price_range[1], resolution)
+    # Usage along the rows and price along the columns broadcast to the full cost grid
+    total_costs = calculate_electricity_costs_array(
+        kwh_usage[:, np.newaxis], kwh_price[np.newaxis, :], markup_nok, fixed_cost_nok
     )
+    return total_costs, kwh_usage, kwh_price
+
+
+@st.cache_data
+def load_hourly_file(data, file_name):
+    # The file name decides between CSV and Parquet
+    buffer = BytesIO(data)
+    buffer.name = file_name
+    return load_hourly_series(buffer)
 
 
 st.set_page_config(layout="centered")
@@ -99,19 +114,22 @@ fixed_cost_nok = st.number_input(
 
 # Add a button to trigger the calculation
 if st.button("Beregn kostnader"):
-    df = calculate_electricity_costs(
-        kwh_usage_range, kwh_price_range, markup_nok, fixed_cost_nok
+    total_costs, kwh_usage, kwh_price = calculate_electricity_costs(
+        kwh_usage_range,
+        kwh_price_range,
+        markup_nok,
+        fixed_cost_nok,
+        variables["HEATMAP_RESOLUTION"],
     )
 
     st.subheader("Oppsummert kostnadsbilde")
-    electricity_metric_cards(df)
+    electricity_metric_cards(total_costs)
 
     st.plotly_chart(
-        create_heatmap_divergent_hover(
-            df,
-            x_column="kWh Price (NOK)",
-            y_column="kWh Usage",
-            z_column="Total Cost (NOK)",
+        create_heatmap_from_grid(
+            total_costs,
+            x=kwh_price,
+            y=kwh_usage,
             title="Strømkostnader",
             x_axis_title="Pris per kWh (NOK)",
             y_axis_title="Strømforbruk (kWh)",
@@ -120,6 +138,46 @@ if st.button("Beregn kostnader"):
         use_container_width=True,
     )
 
+# Hour-by-hour calculation from uploaded spot prices
+st.subheader("Timesberegning med spotpriser")
+st.write("""
+Last opp timespriser (kr/kWh inkl. mva) som CSV eller Parquet med tidspunkt i første
+kolonne og pris i andre. Strømstøtten beregnes da time for time. Uten en fil med
+timesforbruk fordeles et fast månedlig forbruk jevnt over timene.
+""")
+price_file = st.file_uploader("Timespriser", type=["csv", "parquet"])
+usage_file = st.file_uploader("Timesforbruk (valgfritt)", type=["csv", "parquet"])
+monthly_kwh = st.number_input(
+    "Månedlig forbruk uten forbruksfil (kWh):",
+    value=int(np.mean(kwh_usage_range)),
+    min_value=0,
+    step=variables["KWH_USAGE_RANGE_STEP"],
+)
+
+if price_file is not None:
+    hourly_prices = load_hourly_file(price_file.getvalue(), price_file.name)
+    if usage_file is not None:
+        hourly_usage = load_hourly_file(usage_file.getvalue(), usage_file.name)
+    else:
+        hourly_usage = flat_consumption_profile(hourly_prices.index, monthly_kwh)
+
+    monthly_costs = hourly_electricity_costs(
+        hourly_usage, hourly_prices, markup_nok, fixed_cost_nok
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric(
+            label="Total kostnad",
+            value=f"kr{monthly_costs['Total Cost (NOK)'].sum():.2f}",
+        )
+    with col2:
+        st.metric(
+            label="Total strømstøtte",
+            value=f"kr{monthly_costs['Govt Support (NOK)'].sum():.2f}",
+        )
+    st.dataframe(monthly_costs.astype({"Month": str}), use_container_width=True)
+
 st.write("""
 **Om strømstøtteordningen**
 - Staten dekker 90% av strømprisen som overstiger 70 øre per kWh.
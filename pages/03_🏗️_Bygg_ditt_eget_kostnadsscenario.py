@@ -16,14 +16,18 @@ import numpy as np
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
-from classes.state_manager import ScenarioState
+from classes.state_manager import LightScenarioState
 
 from functions.calc_funcs import (  # noqa: E402
-    monthly_price_calculator_scenarios,
-    calculate_amortization_schedule,
+    LOAN_TYPES,
+    monthly_price_calculator_scenarios_incremental,
+    expand_scenario_frame,
 )
 
-from functions.formatters import format_interest_rate  # noqa: E402
+from functions.export_funcs import EXPORT_FORMATS, scenario_export_bytes  # noqa: E402
+from functions.formatters import format_interest_rate, format_loan_type  # noqa: E402
+
+from functions.sensitivity_funcs import RATE_STEP, loan_sensitivities  # noqa: E402
 
 from functions.plot_funcs import (  # noqa: E402
     create_cost_breakdown_sunburst,
@@ -33,7 +37,7 @@ from functions.plot_funcs import (  # noqa: E402
 
 # Initialize session state
 if 'scenario_state' not in st.session_state:
-    st.session_state.scenario_state = ScenarioState()
+    st.session_state.scenario_state = LightScenarioState()
 
 # Load constants from variables.toml
 variables = toml.load(project_root.joinpath("variables.toml"))
@@ -67,6 +71,9 @@ Perfekt for deg som:
 if "df" not in st.session_state:
     st.session_state.df = None
 
+if "scenario_key" not in st.session_state:
+    st.session_state.scenario_key = None
+
 # Ownership splitting
 with st.container():
     st.subheader("Eierskap")
@@ -107,6 +114,12 @@ with st.container():
         max_value=variables["loan"]["AMMORTISATION_PERIOD_MAX"],
         value=variables["loan"]["AMMORTISATION_PERIOD_DEFAULT"],
     )
+    loan_types = st.multiselect(
+        variables["loan"]["LOAN_TYPE_LABEL"],
+        options=LOAN_TYPES,
+        default=variables["loan"]["LOAN_TYPE_DEFAULT"],
+        format_func=format_loan_type,
+    )
     ek = st.number_input(
         variables["loan"]["EK_LABEL"],
         value=variables["loan"]["EK_DEFAULT"],
@@ -201,10 +214,12 @@ def calculate_scenarios(
     transaction_costs,
     ek,
     ownership_fraq,
+    loan_types,
 ):
-    df = monthly_price_calculator_scenarios(
+    # Widening or moving the house price or rate slider only evaluates the new cells
+    df = monthly_price_calculator_scenarios_incremental(
         houseprice_range=np.arange(*houseprice_range, step=100000),
-        interest_rate_range=interest_rates_decimal,
+        interest_rate_range=np.round(interest_rates_decimal, 5),
         fixed_cost_house_range=[fixed_cost_house],
         kwh_usage_range=[kwh_usage_range],
         kwh_price_range=[kwh_price_range],
@@ -216,27 +231,39 @@ def calculate_scenarios(
         transaction_costs_range=[transaction_costs],
         ek_range=[ek],
         ownership_fraq_range=[ownership_fraq / 100],  # Convert percentage to fraction
+        loan_type_range=list(loan_types),
+        compact=True,
     )
-    df["interest_rate"] = df["interest_rate"].round(5)
     return df
 
 
+# Export files are only built when a download is requested, and cached per scenario
+@st.cache_data(max_entries=8)
+def export_scenarios(scenario_key, data_format, _df):
+    return scenario_export_bytes(_df, data_format)
+
+
 # Button to perform calculation
 if st.button('Beregn scenario'):
-    df = calculate_scenarios(
-        houseprice_range, interest_rates_decimal, fixed_cost_house, kwh_usage_range, kwh_price_range, 
-        markup_nok, fixed_cost_electricity, ammortisation_periods, person_a_fixed_costs, 
-        person_b_fixed_costs, transaction_costs, ek, ownership_fraq
+    scenario_key = (
+        houseprice_range, tuple(interest_rates_decimal), fixed_cost_house, kwh_usage_range, kwh_price_range,
+        markup_nok, fixed_cost_electricity, ammortisation_periods, person_a_fixed_costs,
+        person_b_fixed_costs, transaction_costs, ek, ownership_fraq,
+        tuple(loan_types) or LOAN_TYPES[:1]
     )
-    if df is not None:
-        st.session_state.scenario_state.df = df
-        st.session_state.scenario_state.selected_house_price = df["house_price"].unique()[0]
-        st.session_state.scenario_state.selected_interest_rate = df["interest_rate"].unique()[0]
-        
-        filtered_df = df[
-            (df["house_price"] == st.session_state.scenario_state.selected_house_price)
-            & (df["interest_rate"] == st.session_state.scenario_state.selected_interest_rate)
-        ]
+    df = calculate_scenarios(*scenario_key)
+    if df is not None and len(df) > 0:
+        st.session_state.scenario_key = scenario_key
+        st.session_state.scenario_state.set_results(df, variables["house_price"]["HOUSEPRICE_STEP"])
+        st.session_state.scenario_state.selected_house_price = st.session_state.scenario_state.house_prices[0]
+        st.session_state.scenario_state.selected_interest_rate = st.session_state.scenario_state.interest_rates[0]
+        st.session_state.scenario_state.selected_loan_type = st.session_state.scenario_state.loan_types[0]
+
+        filtered_df = st.session_state.scenario_state.select(
+            st.session_state.scenario_state.selected_house_price,
+            st.session_state.scenario_state.selected_interest_rate,
+            st.session_state.scenario_state.selected_loan_type,
+        )
         st.session_state.scenario_state.update(filtered_df, st.session_state.scenario_state.selected_house_price, ek, ammortisation_periods)
 
 
@@ -244,28 +271,39 @@ if st.button('Beregn scenario'):
 if st.session_state.scenario_state.calculation_done:
     st.subheader("Resultater")
 
-    # Filters for sunburst charts
-    col1, col2 = st.columns(2)
+    # Filters for sunburst charts, with options from the sorted grid axes
+    house_prices = st.session_state.scenario_state.house_prices
+    interest_rates = st.session_state.scenario_state.interest_rates
+    scenario_loan_types = st.session_state.scenario_state.loan_types
+    col1, col2, col3 = st.columns(3)
     with col1:
         st.session_state.scenario_state.selected_house_price = st.selectbox(
             "Velg boligpris",
-            st.session_state.scenario_state.df["house_price"].unique(),
-            index=list(st.session_state.scenario_state.df["house_price"].unique()).index(st.session_state.scenario_state.selected_house_price)
+            house_prices,
+            index=int(np.searchsorted(house_prices, st.session_state.scenario_state.selected_house_price))
         )
     with col2:
-        formatted_rates = [format_interest_rate(rate) for rate in st.session_state.scenario_state.df["interest_rate"].unique()]
+        formatted_rates = [format_interest_rate(rate) for rate in interest_rates]
         selected_interest_rate_str = st.selectbox(
             "Velg rentesats",
             formatted_rates,
-            index=formatted_rates.index(format_interest_rate(st.session_state.scenario_state.selected_interest_rate))
+            index=int(np.searchsorted(interest_rates, st.session_state.scenario_state.selected_interest_rate))
+        )
+        st.session_state.scenario_state.selected_interest_rate = interest_rates[formatted_rates.index(selected_interest_rate_str)]
+    with col3:
+        st.session_state.scenario_state.selected_loan_type = st.selectbox(
+            "Velg lånetype",
+            scenario_loan_types,
+            index=scenario_loan_types.index(st.session_state.scenario_state.selected_loan_type),
+            format_func=format_loan_type,
         )
-        st.session_state.scenario_state.selected_interest_rate = round(float(selected_interest_rate_str.strip('%')) / 100, 5)
 
-    # Re-filter the DataFrame and update state based on new selections
-    filtered_df = st.session_state.scenario_state.df[
-        (st.session_state.scenario_state.df["house_price"] == st.session_state.scenario_state.selected_house_price)
-        & (st.session_state.scenario_state.df["interest_rate"] == st.session_state.scenario_state.selected_interest_rate)
-    ]
+    # Look up the selected scenario and update state
+    filtered_df = st.session_state.scenario_state.select(
+        st.session_state.scenario_state.selected_house_price,
+        st.session_state.scenario_state.selected_interest_rate,
+        st.session_state.scenario_state.selected_loan_type,
+    )
     st.session_state.scenario_state.update(filtered_df, st.session_state.scenario_state.selected_house_price, ek, ammortisation_periods)
 
     # Summary Dashboard
@@ -280,7 +318,7 @@ if st.session_state.scenario_state.calculation_done:
     col2.metric(
         "Månedlig betaling",
         f"{st.session_state.scenario_state.monthly_payment:,.0f} kr",
-        help="Den totale månedlige betalingen inkludert renter og avdrag"
+        help="Den totale månedlige betalingen inkludert renter og avdrag. For serielån vises første og høyeste betaling"
     )
     col3.metric(
         "Total rentebelastning",
@@ -331,16 +369,36 @@ if st.session_state.scenario_state.calculation_done:
     renteendringer påvirker dine månedlige utgifter.
     """)
     
+    # Closed-form sensitivities at the selected rate, for both persons at once
+    sensitivities = loan_sensitivities(
+        np.array([st.session_state.scenario_state.loan_amount_a, st.session_state.scenario_state.loan_amount_b]),
+        st.session_state.scenario_state.selected_interest_rate,
+        ammortisation_periods,
+        st.session_state.scenario_state.selected_loan_type,
+    )
+    payment_per_step = sensitivities.payment_change(RATE_STEP)
+    interest_per_step = sensitivities.interest_change(RATE_STEP)
+
     col1, col2 = st.columns(2)
     with col1:
-        fig_sensitivity_a = create_interest_rate_sensitivity_chart(st.session_state.scenario_state.loan_amount_a, ammortisation_periods, interest_rate_range)
+        fig_sensitivity_a = create_interest_rate_sensitivity_chart(st.session_state.scenario_state.loan_amount_a, ammortisation_periods, interest_rate_range, st.session_state.scenario_state.selected_loan_type)
         fig_sensitivity_a.update_layout(title='Person A: Månedlig lånekostnad vs. Rentesats')
         st.plotly_chart(fig_sensitivity_a, use_container_width=True)
+        st.caption(
+            f"+0,25 pp rente: {payment_per_step[0]:+,.0f} kr per måned og "
+            f"{interest_per_step[0]:+,.0f} kr i totale renter. "
+            f"Renteelastisitet: {sensitivities.payment_rate_elasticity[0]:.2f}"
+        )
 
     with col2:
-        fig_sensitivity_b = create_interest_rate_sensitivity_chart(st.session_state.scenario_state.loan_amount_b, ammortisation_periods, interest_rate_range)
+        fig_sensitivity_b = create_interest_rate_sensitivity_chart(st.session_state.scenario_state.loan_amount_b, ammortisation_periods, interest_rate_range, st.session_state.scenario_state.selected_loan_type)
         fig_sensitivity_b.update_layout(title='Person B: Månedlig lånekostnad vs. Rentesats')
         st.plotly_chart(fig_sensitivity_b, use_container_width=True)
+        st.caption(
+            f"+0,25 pp rente: {payment_per_step[1]:+,.0f} kr per måned og "
+            f"{interest_per_step[1]:+,.0f} kr i totale renter. "
+            f"Renteelastisitet: {sensitivities.payment_rate_elasticity[1]:.2f}"
+        )
     
     # Amortization Schedule
     st.subheader("Nedbetalingsplan")
@@ -351,23 +409,14 @@ if st.session_state.scenario_state.calculation_done:
     """)
     
     col1, col2 = st.columns(2)
+    loan_type_name = format_loan_type(st.session_state.scenario_state.selected_loan_type)
     
     with col1:
-        schedule_a = calculate_amortization_schedule(
-            st.session_state.scenario_state.loan_amount_a,
-            st.session_state.scenario_state.selected_interest_rate,
-            ammortisation_periods,
-            )
-        fig_a = create_amortization_chart(schedule_a, "Person A")
+        fig_a = create_amortization_chart(st.session_state.scenario_state.schedule_a, f"Person A ({loan_type_name})")
         st.plotly_chart(fig_a, use_container_width=True)
 
     with col2:
-        schedule_b = calculate_amortization_schedule(
-            st.session_state.scenario_state.loan_amount_b,
-            st.session_state.scenario_state.selected_interest_rate,
-            ammortisation_periods,
-            )
-        fig_b = create_amortization_chart(schedule_b, "Person B")
+        fig_b = create_amortization_chart(st.session_state.scenario_state.schedule_b, f"Person B ({loan_type_name})")
         st.plotly_chart(fig_b, use_container_width=True)
 
     # Data display and download options
@@ -375,12 +424,23 @@ if st.session_state.scenario_state.calculation_done:
     data_option = st.selectbox("Velg datavisning", ["Vis data", "Last ned data"])
 
     if data_option == "Vis data":
-        st.dataframe(st.session_state.scenario_state.df)
+        st.dataframe(expand_scenario_frame(st.session_state.scenario_state.df))
     elif data_option == "Last ned data":
-        csv = st.session_state.scenario_state.df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="Last ned CSV",
-            data=csv,
-            file_name="kostnadsscenario_data.csv",
-            mime="text/csv",
-        )
+        data_format = st.radio("Velg filformat", list(EXPORT_FORMATS), horizontal=True)
+        export_format = EXPORT_FORMATS[data_format]
+        export_key = (st.session_state.scenario_key, data_format)
+
+        # The file is built on request and kept until the scenario or format changes
+        if st.button("Lag fil"):
+            st.session_state.export_file = (
+                export_key,
+                export_scenarios(*export_key, st.session_state.scenario_state.df),
+            )
+        export_file = st.session_state.get("export_file")
+        if export_file is not None and export_file[0] == export_key:
+            st.download_button(
+                label=f"Last ned {data_format}",
+                data=export_file[1],
+                file_name=f"kostnadsscenario_data.{export_format.extension}",
+                mime=export_format.mime,
+            )
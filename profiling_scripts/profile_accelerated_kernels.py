@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.accel_funcs import NUMBA_AVAILABLE  # noqa: E402
+from functions.calc_funcs import (  # noqa: E402
+    calculate_amortization_schedules_batched,
+    calculate_electricity_costs_array,
+)
+
+# Batch sweep of the scenario page: loans as a column, rates as a row, both loan types
+LOANS = np.arange(1_000_000, 10_000_001, 50_000)[:, np.newaxis, np.newaxis]
+RATES = np.round(np.arange(0, 0.1001, 0.005), 4)[:, np.newaxis]
+LOAN_TYPES = np.array(["annuity", "serial"])
+MONTHS = 360
+
+# Electricity heatmap at a resolution of 1000 x 1000
+USAGE = np.linspace(0, 10_000, 1000)[:, np.newaxis]
+PRICES = np.linspace(0, 5, 1000)
+
+
+def time_per_call(func, repeats=3):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def peak_bytes(func):
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, result
+
+
+def calls(backend):
+    return {
+        "schedules": lambda: calculate_amortization_schedules_batched(
+            LOANS, RATES, MONTHS, LOAN_TYPES, backend
+        ),
+        "electricity": lambda: calculate_electricity_costs_array(
+            USAGE, PRICES, 0.1, 39, backend=backend
+        ),
+    }
+
+
+def main():
+    backends = ["numpy", "numba"] if NUMBA_AVAILABLE else ["numpy"]
+    if NUMBA_AVAILABLE:
+        # Compile before timing
+        for call in calls("numba").values():
+            call()
+    else:
+        print("Numba is not installed, only the NumPy reference is timed\n")
+
+    cells = LOANS.size * RATES.size * LOAN_TYPES.size * (MONTHS + 1)
+    print(f"Schedules: {cells:,} cells, electricity: {USAGE.size * PRICES.size:,} cells\n")
+    print(f"{'calculation':<14} {'backend':<8} {'time (ms)':>10} {'peak (MiB)':>11}")
+    for name in ("schedules", "electricity"):
+        for backend in backends:
+            call = calls(backend)[name]
+            seconds, _ = time_per_call(call)
+            peak, _ = peak_bytes(call)
+            print(f"{name:<14} {backend:<8} {seconds * 1e3:10.1f} {peak / 2**20:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
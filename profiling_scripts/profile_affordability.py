@@ -0,0 +1,79 @@
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.affordability_funcs import affordability_table, break_even_rate  # noqa: E402
+from functions.calc_funcs import monthly_price_calculator_scenarios_vectorized  # noqa: E402
+
+BUDGETS = np.arange(20_000, 60_001, 2_000)
+INTEREST_RATES = np.round(np.arange(0, 0.1001, 0.0025), 5)
+EQUITY = [500_000, 1_000_000, 1_500_000, 2_000_000, 3_000_000]
+OWNERSHIP_FRAQS = [0.3, 0.5, 0.7]
+
+# The forward sweep finds the highest price on a grid of house prices in 10 000 NOK steps
+HOUSE_PRICES = np.arange(1_000_000, 15_000_001, 10_000)
+COSTS = dict(fixed_cost_house=5000, person_a_fixed_costs=10000, person_b_fixed_costs=10000)
+
+
+def time_per_call(func, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def forward_sweep():
+    df = monthly_price_calculator_scenarios_vectorized(
+        HOUSE_PRICES, INTEREST_RATES, [5000], [1000], [1.5], [0.0], [0], [360],
+        [10000], [10000], [200000], EQUITY, OWNERSHIP_FRAQS,
+    )
+    # The highest price per budget where both persons stay within it
+    cost = np.maximum(df["a_total"], df["b_total"]).to_numpy()
+    keys = ["interest_rate", "ek", "ownership_fraq"]
+    return {
+        budget: df["house_price"].where(cost <= budget).groupby([df[key] for key in keys]).max()
+        for budget in BUDGETS
+    }, len(df), df["el_cost"].iloc[0]
+
+
+def main():
+    cells = BUDGETS.size * INTEREST_RATES.size * len(EQUITY) * len(OWNERSHIP_FRAQS)
+    print(f"Affordability table: {cells} cells\n")
+
+    forward, (sweep, rows, el_cost) = time_per_call(forward_sweep, repeats=1)
+
+    # Electricity cost after support, as computed by the forward sweep
+    costs = dict(COSTS, el_cost=el_cost)
+    inverse, table = time_per_call(
+        lambda: affordability_table(
+            BUDGETS, INTEREST_RATES, EQUITY, [360], OWNERSHIP_FRAQS, 200000, **costs
+        )
+    )
+
+    # Both answers agree to within the step of the forward grid
+    reference = np.concatenate([sweep[budget].to_numpy() for budget in BUDGETS])
+    exact = table["max_house_price"].to_numpy()
+    valid = np.isfinite(reference) & (exact < HOUSE_PRICES[-1])
+    gap = (exact[valid] - reference[valid]).max()
+
+    rates, _ = time_per_call(
+        lambda: break_even_rate(
+            table["budget"].to_numpy(), table["budget"].to_numpy(), 4_000_000, 360,
+            table["ek"].to_numpy(), 200000, table["ownership_fraq"].to_numpy(), **costs,
+        )
+    )
+
+    print(f"{'method':<28} {'rows':>9} {'time (ms)':>10}")
+    print(f"{'forward sweep':<28} {rows:>9} {forward * 1e3:10.0f}")
+    print(f"{'closed-form max price':<28} {cells:>9} {inverse * 1e3:10.1f}")
+    print(f"{'Newton break-even rate':<28} {cells:>9} {rates * 1e3:10.1f}")
+    print(f"\nLargest gap to the forward sweep: {gap:,.0f} NOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import time
+import numpy as np
+import numpy_financial as npf
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    annuity_kernel,
+    calculate_amortization_schedule,
+)
+
+
+def calculate_amortization_schedule_npf(loan_amount, annual_interest_rate, loan_term_months):
+    # Previous implementation based on numpy_financial ipmt/ppmt, kept as reference
+    monthly_interest_rate = annual_interest_rate / 12
+    per = np.arange(loan_term_months) + 1
+
+    interest_pmt = npf.ipmt(monthly_interest_rate, per, loan_term_months, loan_amount) * -1
+    principal_pmt = npf.ppmt(monthly_interest_rate, per, loan_term_months, loan_amount) * -1
+
+    cumulative_interest = np.insert(interest_pmt.cumsum(), 0, 0).round(0)
+    cumulative_principal = np.insert(principal_pmt.cumsum(), 0, 0).round(0)
+    cumulative_total = cumulative_principal + cumulative_interest
+
+    remaining_balance = np.insert(
+        np.repeat(loan_amount, loan_term_months) - cumulative_principal[1:], 0, loan_amount
+    )
+
+    return pd.DataFrame(
+        {
+            "Month": np.arange(loan_term_months + 1),
+            "Principal": cumulative_principal,
+            "Interest": cumulative_interest,
+            "Remaining Balance": remaining_balance,
+            "Total Paid": cumulative_total,
+        }
+    )
+
+
+def npf_payment_split(loan_amount, annual_interest_rate, loan_term_months):
+    # The array work done by the previous implementation, without building a DataFrame
+    monthly_interest_rate = annual_interest_rate / 12
+    per = np.arange(loan_term_months) + 1
+    interest_pmt = npf.ipmt(monthly_interest_rate, per, loan_term_months, loan_amount)
+    principal_pmt = npf.ppmt(monthly_interest_rate, per, loan_term_months, loan_amount)
+    return interest_pmt, principal_pmt
+
+
+def time_per_call(func, loan_amount, rate, months, repeats=200):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(loan_amount, rate, months)
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark_amortization_kernel():
+    loan_amount = 3500000
+    rate = 0.045
+
+    print(f"{'months':>6} {'npf (ms)':>10} {'kernel (ms)':>12} {'speedup':>8} {'max abs diff':>13}")
+    for months in (1, 12, 60, 120, 240, 360, 480):
+        reference = calculate_amortization_schedule_npf(loan_amount, rate, months)
+        result = calculate_amortization_schedule(loan_amount, rate, months)
+        max_diff = np.abs(result.to_numpy() - reference.to_numpy()).max()
+
+        npf_time = time_per_call(calculate_amortization_schedule_npf, loan_amount, rate, months)
+        kernel_time = time_per_call(calculate_amortization_schedule, loan_amount, rate, months)
+        print(
+            f"{months:>6} {npf_time * 1e3:>10.3f} {kernel_time * 1e3:>12.3f} "
+            f"{npf_time / kernel_time:>7.1f}x {max_diff:>13.1f}"
+        )
+
+
+def benchmark_array_work():
+    loan_amount = 3500000
+    rate = 0.045
+
+    print(f"\n{'months':>6} {'ipmt+ppmt (ms)':>15} {'annuity_kernel (ms)':>20} {'speedup':>8}")
+    for months in (1, 12, 60, 120, 240, 360, 480):
+        npf_time = time_per_call(npf_payment_split, loan_amount, rate, months)
+        kernel_time = time_per_call(annuity_kernel, loan_amount, rate, months)
+        print(
+            f"{months:>6} {npf_time * 1e3:>15.3f} {kernel_time * 1e3:>20.3f} "
+            f"{npf_time / kernel_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_amortization_kernel()
+    benchmark_array_work()
@@ -0,0 +1,56 @@
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    calculate_electricity_costs_array,
+    scenario_analysis_electricity_costs,
+)
+from functions.plot_funcs import (  # noqa: E402
+    HEATMAP_MAX_CELLS,
+    create_heatmap_divergent_hover,
+    create_heatmap_from_grid,
+)
+
+
+def time_per_call(func, repeats=3):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    print(f"{'grid':>11} {'builder':<9} {'cells':>10} {'build (ms)':>11} {'JSON (MB)':>10}")
+    for resolution in (50, 200, 1000):
+        usage = np.linspace(500, 5000, resolution)
+        price = np.linspace(0.1, 10, resolution)
+        grid = calculate_electricity_costs_array(usage[:, np.newaxis], price, 0.1, 39)
+        df = scenario_analysis_electricity_costs(usage, price, 0.1, 39)
+
+        # The old behaviour: pivot the long frame and send every cell
+        cases = {
+            "pivot": lambda: create_heatmap_divergent_hover(
+                df, "kWh Price (NOK)", "kWh Usage", "Total Cost (NOK)", max_cells=grid.size
+            ),
+            "grid": lambda: create_heatmap_from_grid(grid, price, usage),
+        }
+        for name, build in cases.items():
+            elapsed, fig = time_per_call(build)
+            cells = np.asarray(fig.data[0].z).size
+            size = len(fig.to_json()) / 1e6
+            print(
+                f"{resolution:>4} x {resolution:<4} {name:<9} {cells:>10} "
+                f"{elapsed * 1e3:11.1f} {size:10.2f}"
+            )
+
+    print(f"\nCell budget: {HEATMAP_MAX_CELLS}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.electricity_funcs import (  # noqa: E402
+    flat_consumption_profile,
+    hourly_electricity_costs,
+)
+
+
+def synthetic_prices(years, seed=0):
+    # Gamma distributed spot prices, only the shape of the data matters for timing
+    hours = pd.date_range("2020-01-01", periods=8760 * years, freq="h", tz="Europe/Oslo")
+    rng = np.random.default_rng(seed)
+    return pd.Series(0.5 + rng.gamma(2.0, 0.5, hours.size), index=hours)
+
+
+def time_per_call(func, repeats=50):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    print(f"{'years':>6} {'hours':>8} {'time (ms)':>10}")
+    for years in (1, 5, 10):
+        prices = synthetic_prices(years)
+        usage = flat_consumption_profile(prices.index, 6000)
+        elapsed = time_per_call(lambda: hourly_electricity_costs(usage, prices, 0.1, 39))
+        print(f"{years:>6} {prices.size:>8} {elapsed * 1e3:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    extend_scenario_grid,
+    monthly_price_calculator_scenarios_vectorized,
+)
+
+INTEREST_RATES = np.round(np.arange(0, 0.2001, 0.0025), 5)
+EK = [500_000, 1_000_000, 1_500_000, 2_000_000]
+
+
+def scenario_ranges(house_prices, interest_rates):
+    return (
+        house_prices, interest_rates, [5000], [500], [1.5], [0.1], [39], [240, 300, 360],
+        [10000], [10000], [200000], EK, [0.3, 0.5, 0.7], ["annuity", "serial"],
+    )
+
+
+def time_per_call(func, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    # Slider moves on a grid with every equity, term, ownership split and loan type
+    moves = {
+        "widen prices 3.5-5.0M -> 3.5-5.5M": (
+            (np.arange(3_500_000, 5_000_001, 10_000), INTEREST_RATES),
+            (np.arange(3_500_000, 5_500_001, 10_000), INTEREST_RATES),
+        ),
+        "shift prices by 0.2M": (
+            (np.arange(3_500_000, 5_000_001, 10_000), INTEREST_RATES),
+            (np.arange(3_700_000, 5_200_001, 10_000), INTEREST_RATES),
+        ),
+        "widen rates 0-15% -> 0-20%": (
+            (np.arange(3_500_000, 5_000_001, 10_000), INTEREST_RATES[:61]),
+            (np.arange(3_500_000, 5_000_001, 10_000), INTEREST_RATES),
+        ),
+    }
+
+    print(f"{'move':<36} {'rows':>9} {'new rows':>9} {'full (ms)':>10} {'extend (ms)':>12}")
+    for name, (before, after) in moves.items():
+        previous = extend_scenario_grid(None, scenario_ranges(*before))
+        full, _ = time_per_call(lambda: extend_scenario_grid(None, scenario_ranges(*after)))
+        extend, grid = time_per_call(lambda: extend_scenario_grid(previous, scenario_ranges(*after)))
+
+        rows = int(np.prod(grid.shape))
+        new_prices = np.setdiff1d(after[0], before[0]).size
+        new_rates = np.setdiff1d(after[1], before[1]).size
+        new_rows = rows // (after[0].size * after[1].size) * (
+            new_prices * after[1].size + (after[0].size - new_prices) * new_rates
+        )
+        print(f"{name:<36} {rows:>9} {new_rows:>9} {full * 1e3:10.1f} {extend * 1e3:12.1f}")
+
+    # Building the frame is proportional to the whole grid either way
+    frame, _ = time_per_call(
+        lambda: monthly_price_calculator_scenarios_vectorized(
+            *scenario_ranges(*moves["widen prices 3.5-5.0M -> 3.5-5.5M"][1]), compact=True
+        )
+    )
+    print(f"\nFull compact frame incl. evaluation: {frame * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import calculate_amortization_schedule  # noqa: E402
+from functions.plot_funcs import (  # noqa: E402
+    LINE_CHART_MAX_POINTS,
+    create_amortization_chart,
+    create_amortization_chart_optimized,
+    create_interest_rate_sensitivity_chart,
+)
+
+
+def time_per_call(func, repeats=10):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    schedule = calculate_amortization_schedule(3_000_000, 0.05, 480)
+    charts = {
+        "amortization": lambda max_points: create_amortization_chart(
+            schedule, "Person A", max_points
+        ),
+        "amortization (optimized)": lambda max_points: create_amortization_chart_optimized(
+            schedule, "Person A", max_points
+        ),
+        # 0 - 200 % in 0.25 steps, the slider range is 0 - 20 %
+        "sensitivity": lambda max_points: create_interest_rate_sensitivity_chart(
+            3_000_000, 360, (0.0, 200.0), max_points=max_points
+        ),
+    }
+
+    print(f"Target points per trace: {LINE_CHART_MAX_POINTS}\n")
+    print(
+        f"{'chart':<26} {'points':>7} {'build (ms)':>11} {'JSON (kB)':>10} "
+        f"{'decimated':>10} {'build (ms)':>11} {'JSON (kB)':>10}"
+    )
+    for name, build in charts.items():
+        full_time, full = time_per_call(lambda: build(None))
+        decimated_time, decimated = time_per_call(lambda: build(LINE_CHART_MAX_POINTS))
+        print(
+            f"{name:<26} {sum(len(trace.x) for trace in full.data):>7} "
+            f"{full_time * 1e3:11.1f} {len(full.to_json()) / 1e3:10.1f} "
+            f"{sum(len(trace.x) for trace in decimated.data):>10} "
+            f"{decimated_time * 1e3:11.1f} {len(decimated.to_json()) / 1e3:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
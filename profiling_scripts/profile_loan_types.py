@@ -0,0 +1,60 @@
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    calculate_amortization_schedules_batched,
+    monthly_price_calculator_scenarios,
+    monthly_price_calculator_scenarios_vectorized,
+)
+
+# The full slider ranges of the scenario builder page
+HOUSE_PRICES = np.arange(1_000_000, 15_000_001, 100_000)
+INTEREST_RATES = np.round(np.arange(0, 0.2001, 0.0025), 5)
+
+
+def scenario_ranges(loan_types):
+    return (
+        HOUSE_PRICES, INTEREST_RATES, [5000], [500], [1.5], [0.1], [39], [360],
+        [10000], [10000], [200000], [1500000], [0.5], loan_types,
+    )
+
+
+def time_per_call(func, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    print(f"Grid: {HOUSE_PRICES.size} house prices x {INTEREST_RATES.size} rates\n")
+    print(f"{'loan types':<18} {'rows':>7} {'loop (ms)':>10} {'vectorized (ms)':>16} {'schedules (ms)':>15}")
+    for loan_types in (["annuity"], ["serial"], ["annuity", "serial"]):
+        ranges = scenario_ranges(loan_types)
+        rows = HOUSE_PRICES.size * INTEREST_RATES.size * len(loan_types)
+
+        loop = time_per_call(lambda: monthly_price_calculator_scenarios(*ranges), repeats=1)
+        vectorized = time_per_call(lambda: monthly_price_calculator_scenarios_vectorized(*ranges))
+
+        # Dense 30-year schedules of every loan on the grid, loan type as the last axis
+        loans = (HOUSE_PRICES - 1_300_000)[:, np.newaxis, np.newaxis]
+        schedules = time_per_call(
+            lambda: calculate_amortization_schedules_batched(
+                loans, INTEREST_RATES[:, np.newaxis], 360, np.array(loan_types)
+            ),
+            repeats=2,
+        )
+        print(
+            f"{'+'.join(loan_types):<18} {rows:>7} {loop * 1e3:10.0f} "
+            f"{vectorized * 1e3:16.1f} {schedules * 1e3:15.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.monte_carlo_funcs import monte_carlo_loan_costs  # noqa: E402
+
+
+def run(n_paths, loan_term_months, max_workers, chunk_size=5_000):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = monte_carlo_loan_costs(
+        3_000_000,
+        loan_term_months,
+        0.05,
+        n_paths=n_paths,
+        seed=1,
+        chunk_size=chunk_size,
+        max_workers=max_workers,
+    )
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    # Worker counts to compare can be given on the command line, e.g. 1 2 4
+    worker_counts = [int(arg) for arg in sys.argv[1:]] or sorted({1, os.cpu_count() or 1})
+
+    # The traced peak only covers the parent process, i.e. the in-process run
+    print(f"{'paths':>8} {'months':>7} {'workers':>8} {'time (s)':>9} {'peak (MB)':>10}")
+    for max_workers in worker_counts:
+        result, elapsed, peak = run(100_000, 480, max_workers)
+        print(
+            f"{100_000:>8} {480:>7} {max_workers:>8} {elapsed:9.2f} {peak / 1e6:10.1f}"
+        )
+
+    print("\nTotal interest percentiles (NOK):")
+    for percentile, value in zip(result.percentiles, result.total_interest):
+        print(f"  P{percentile:g}: {value:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    monthly_price_calculator_scenarios_parallel,
+    monthly_price_calculator_scenarios_vectorized,
+)
+
+# Synthetic 13-dimensional grid where every axis has more than one value
+synthetic_grid = dict(
+    houseprice_range=np.linspace(2000000, 8000000, 60),
+    interest_rate_range=np.arange(0.01, 0.08, 0.0025),
+    fixed_cost_house_range=[4000, 5000],
+    kwh_usage_range=[500, 1500],
+    kwh_price_range=[0.8, 2.0],
+    markup_nok_range=[0.05, 0.1],
+    fixed_cost_electricity_range=[39, 49],
+    ammortisation_periods_range=[300, 360],
+    person_a_fixed_costs_range=[8000, 10000],
+    person_b_fixed_costs_range=[8000, 10000],
+    transaction_costs_range=[150000, 200000],
+    ek_range=[1000000, 1500000],
+    ownership_fraq_range=[0.4, 0.5],
+)
+
+
+def time_call(func, **kwargs):
+    start = time.perf_counter()
+    df = func(**synthetic_grid, **kwargs)
+    return time.perf_counter() - start, len(df)
+
+
+def benchmark_parallel_scaling(max_workers=None, repeats=3):
+    max_workers = max_workers or os.cpu_count()
+
+    baseline, n_rows = min(
+        time_call(monthly_price_calculator_scenarios_vectorized) for _ in range(repeats)
+    )
+    print(f"Grid rows: {n_rows:,}")
+    print(f"Single process (vectorized): {baseline:.3f}s")
+
+    for workers in range(1, max_workers + 1):
+        elapsed, _ = min(
+            time_call(monthly_price_calculator_scenarios_parallel, max_workers=workers)
+            for _ in range(repeats)
+        )
+        print(
+            f"workers={workers:>3}  time={elapsed:.3f}s  "
+            f"speedup vs. single process={baseline / elapsed:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_parallel_scaling(int(sys.argv[1]) if len(sys.argv) > 1 else None)
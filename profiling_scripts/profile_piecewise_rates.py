@@ -0,0 +1,60 @@
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import calculate_piecewise_rate_schedules  # noqa: E402
+from functions.monte_carlo_funcs import floating_rate_amortization  # noqa: E402
+
+
+def random_rate_paths(n_paths, n_changes, loan_term_months, seed=0):
+    # Rate changes spread over the term, e.g. refixing of the rate every few years
+    rng = np.random.default_rng(seed)
+    change_months = np.sort(rng.integers(1, loan_term_months, (n_paths, n_changes)), axis=1)
+    change_months[:, 0] = 0
+    rates = rng.uniform(0.02, 0.07, (n_paths, n_changes))
+    return change_months, rates
+
+
+def dense_rate_paths(change_months, rates, loan_term_months):
+    segment = np.stack(
+        [
+            np.searchsorted(months, np.arange(loan_term_months), side="right") - 1
+            for months in change_months
+        ]
+    )
+    return np.take_along_axis(rates, segment, axis=1)
+
+
+def time_per_call(func, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    loans = np.linspace(1_000_000, 5_000_000, 41)[:, np.newaxis]
+    print(f"{'loans':>6} {'paths':>6} {'changes':>8} {'piecewise (ms)':>15} {'monthly (ms)':>13}")
+    for n_paths, n_changes in ((10, 4), (100, 4), (100, 10)):
+        change_months, rates = random_rate_paths(n_paths, n_changes, 360)
+        dense = dense_rate_paths(change_months, rates, 360)
+        piecewise = time_per_call(
+            lambda: calculate_piecewise_rate_schedules(loans, change_months, rates, 360)
+        )
+        # Month-by-month re-annuitization, one loan at a time
+        monthly = time_per_call(
+            lambda: [floating_rate_amortization(loan, dense) for loan in loans[:, 0]]
+        )
+        print(
+            f"{loans.size:>6} {n_paths:>6} {n_changes:>8} "
+            f"{piecewise * 1e3:15.1f} {monthly * 1e3:13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
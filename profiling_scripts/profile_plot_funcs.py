@@ -16,7 +16,7 @@ from functions.plot_funcs import (
     create_amortization_chart
 )
 from functions.calc_funcs import (
-    monthly_price_calculator_scenarios,
+    monthly_price_calculator_scenarios_vectorized,
     calculate_amortization_schedule
 )
 
@@ -39,7 +39,7 @@ def profile_function(func, *args, **kwargs):
 
 def create_sample_data():
     # Use monthly_price_calculator_scenarios to generate realistic data
-    sunburst_data = monthly_price_calculator_scenarios(
+    sunburst_data = monthly_price_calculator_scenarios_vectorized(
         houseprice_range=[5000000],
         interest_rate_range=[0.06],
         fixed_cost_house_range=[5000],
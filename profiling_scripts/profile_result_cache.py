@@ -0,0 +1,61 @@
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.cache_funcs import configure_cache  # noqa: E402
+from functions.calc_funcs import monthly_price_calculator_scenarios_vectorized  # noqa: E402
+
+# The full slider ranges of the scenario builder page
+HOUSE_PRICES = np.arange(1_000_000, 15_000_001, 100_000)
+INTEREST_RATES = np.round(np.arange(0, 0.2001, 0.0025), 5)
+
+
+def scenario_ranges(house_prices):
+    return (
+        house_prices, INTEREST_RATES, [5000], [500], [1.5], [0.1], [39], [360],
+        [10000], [10000], [200000], [1500000], [0.5], ["annuity", "serial"],
+    )
+
+
+def time_call(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    print(f"{'frame':<8} {'rows':>8} {'no cache (ms)':>14} {'cold (ms)':>10} {'warm (ms)':>10} {'file (kB)':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for compact in (True, False):
+            ranges = scenario_ranges(HOUSE_PRICES)
+            configure_cache(None)
+            uncached, df = time_call(
+                lambda: monthly_price_calculator_scenarios_vectorized(*ranges, compact=compact)
+            )
+
+            # Cold computes and stores, warm is what a restarted process sees
+            cache = configure_cache(directory)
+            cold, _ = time_call(
+                lambda: monthly_price_calculator_scenarios_vectorized(*ranges, compact=compact)
+            )
+            cache = configure_cache(directory)
+            warm, _ = time_call(
+                lambda: monthly_price_calculator_scenarios_vectorized(*ranges, compact=compact)
+            )
+            assert cache.hits == 1
+            size = cache.entries()[-1][1]
+            print(
+                f"{'compact' if compact else 'full':<8} {len(df):>8} {uncached * 1e3:14.1f} "
+                f"{cold * 1e3:10.1f} {warm * 1e3:10.1f} {size / 1e3:10.1f}"
+            )
+    configure_cache(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
 from functions.calc_funcs import (
-    monthly_price_calculator_scenarios,
+    monthly_price_calculator_scenarios_vectorized,
     calculate_amortization_schedule
 )
 from functions.plot_funcs import (
@@ -38,7 +38,7 @@ def run_initial_scenario():
     ownership_fraq = 50
 
     # Calculate scenarios
-    df = monthly_price_calculator_scenarios(
+    df = monthly_price_calculator_scenarios_vectorized(
         houseprice_range=np.arange(*houseprice_range, step=100000),
         interest_rate_range=interest_rates_decimal,
         fixed_cost_house_range=[fixed_cost_house],
@@ -56,22 +56,20 @@ def run_initial_scenario():
 
     # Initialize ScenarioState
     state = ScenarioState()
-    state.df = df
-    state.selected_house_price = df["house_price"].unique()[0]
-    state.selected_interest_rate = df["interest_rate"].unique()[0]
+    state.set_results(df)
+    state.selected_house_price = state.house_prices[0]
+    state.selected_interest_rate = state.interest_rates[0]
 
-    # Filter data and update state
-    filtered_df = state.df[
-        (state.df["house_price"] == state.selected_house_price)
-        & (state.df["interest_rate"] == state.selected_interest_rate)
-    ]
+    # Look up the selected row and update state
+    filtered_df = state.select(state.selected_house_price, state.selected_interest_rate)
     state.update(filtered_df, state.selected_house_price, ek, ammortisation_periods)
 
     # Generate initial charts
-    create_cost_breakdown_sunburst(state.df, 'A')
-    create_cost_breakdown_sunburst(state.df, 'B')
-    create_interest_rate_sensitivity_chart(state.loan_amount_a, ammortisation_periods, interest_rates_decimal)
-    create_interest_rate_sensitivity_chart(state.loan_amount_b, ammortisation_periods, interest_rates_decimal)
+    interest_rate_range = (state.interest_rates[0] * 100, state.interest_rates[-1] * 100)
+    create_cost_breakdown_sunburst(filtered_df, 'A')
+    create_cost_breakdown_sunburst(filtered_df, 'B')
+    create_interest_rate_sensitivity_chart(state.loan_amount_a, ammortisation_periods, interest_rate_range)
+    create_interest_rate_sensitivity_chart(state.loan_amount_b, ammortisation_periods, interest_rate_range)
     create_amortization_chart(state.schedule_a, "Person A")
     create_amortization_chart(state.schedule_b, "Person B")
 
@@ -79,23 +77,21 @@ def run_initial_scenario():
 
 def simulate_user_interaction(state, ek, ammortisation_periods):
     # Simulate changing house price
-    state.selected_house_price = state.df["house_price"].unique()[1]  # Select second house price
+    state.selected_house_price = state.house_prices[1]  # Select second house price
 
     # Simulate changing interest rate
-    state.selected_interest_rate = state.df["interest_rate"].unique()[1]  # Select second interest rate
+    state.selected_interest_rate = state.interest_rates[1]  # Select second interest rate
     
-    # Re-filter data and update state
-    filtered_df = state.df[
-        (state.df["house_price"] == state.selected_house_price)
-        & (state.df["interest_rate"] == state.selected_interest_rate)
-    ]
+    # Look up the selected row and update state
+    filtered_df = state.select(state.selected_house_price, state.selected_interest_rate)
     state.update(filtered_df, state.selected_house_price, ek, ammortisation_periods)
 
     # Regenerate charts
-    create_cost_breakdown_sunburst(state.df, 'A')
-    create_cost_breakdown_sunburst(state.df, 'B')
-    create_interest_rate_sensitivity_chart(state.loan_amount_a, ammortisation_periods, state.df["interest_rate"].unique())
-    create_interest_rate_sensitivity_chart(state.loan_amount_b, ammortisation_periods, state.df["interest_rate"].unique())
+    interest_rate_range = (state.interest_rates[0] * 100, state.interest_rates[-1] * 100)
+    create_cost_breakdown_sunburst(filtered_df, 'A')
+    create_cost_breakdown_sunburst(filtered_df, 'B')
+    create_interest_rate_sensitivity_chart(state.loan_amount_a, ammortisation_periods, interest_rate_range)
+    create_interest_rate_sensitivity_chart(state.loan_amount_b, ammortisation_periods, interest_rate_range)
     create_amortization_chart(state.schedule_a, "Person A")
     create_amortization_chart(state.schedule_b, "Person B")
 
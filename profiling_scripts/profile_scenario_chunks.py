@@ -0,0 +1,67 @@
+import time
+import tracemalloc
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import iter_monthly_price_calculator_scenarios  # noqa: E402
+
+
+def make_ranges(n_house_prices):
+    # Synthetic grid where the number of rows scales with the house price axis
+    return dict(
+        houseprice_range=np.linspace(2000000, 8000000, n_house_prices),
+        interest_rate_range=np.arange(0.01, 0.08, 0.0025),
+        fixed_cost_house_range=[4000, 5000],
+        kwh_usage_range=[500, 1000, 1500],
+        kwh_price_range=[0.8, 1.3, 2.0],
+        markup_nok_range=[0.1],
+        fixed_cost_electricity_range=[39],
+        ammortisation_periods_range=[300, 360],
+        person_a_fixed_costs_range=[10000],
+        person_b_fixed_costs_range=[10000],
+        transaction_costs_range=[200000],
+        ek_range=[1000000, 1500000],
+        ownership_fraq_range=[0.4, 0.5],
+    )
+
+
+def profile_streaming(n_house_prices, chunk_size):
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    n_rows = 0
+    checksum = 0.0
+    for chunk in iter_monthly_price_calculator_scenarios(
+        **make_ranges(n_house_prices), chunk_size=chunk_size
+    ):
+        # Stand-in for writing the chunk to disk
+        n_rows += len(chunk)
+        checksum += chunk["a_total"].sum()
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"rows={n_rows:>11,}  chunk_size={chunk_size:>9,}  "
+        f"time={elapsed:7.2f}s  peak_memory={peak / 1e6:8.1f} MB"
+    )
+
+
+def main():
+    # Peak memory should stay flat as the grid grows for a fixed chunk size
+    for n_house_prices in (10, 100, 1000):
+        profile_streaming(n_house_prices, chunk_size=250_000)
+
+    # ... and scale with the chunk size for a fixed grid
+    for chunk_size in (50_000, 500_000):
+        profile_streaming(100, chunk_size=chunk_size)
+
+
+if __name__ == "__main__":
+    main()
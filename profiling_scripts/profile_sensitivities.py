@@ -0,0 +1,69 @@
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import loan_calc, monthly_price_calculator_scenarios_vectorized  # noqa: E402
+from functions.sensitivity_funcs import (  # noqa: E402
+    RATE_STEP,
+    payment_curve,
+    scenario_sensitivities,
+)
+
+HOUSE_PRICES = np.arange(2_000_000, 10_000_001, 100_000)
+INTEREST_RATES = np.round(np.arange(0.01, 0.1001, 0.0025), 5)
+
+# The sensitivity chart of the scenario page, 0-20% in 0.25pp steps
+CHART_RATES = np.arange(0, 0.2001, 0.0025)
+KNOT_RATES = np.arange(0, 0.2001, 0.025)
+
+
+def time_per_call(func, repeats=5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def resweep(df):
+    # The change per 0.25pp by evaluating every scenario again at a shifted rate
+    loan = df["house_price"] - (df["ek"] - df["transaction_costs"])
+    rates = df["interest_rate"].to_numpy()
+    months = int(df["ammortisation_periods"].iloc[0])
+    return np.array([
+        loan_calc(loan_i, rate + RATE_STEP, months) - loan_calc(loan_i, rate, months)
+        for loan_i, rate in zip(loan.to_numpy(), rates)
+    ])
+
+
+def main():
+    df = monthly_price_calculator_scenarios_vectorized(
+        HOUSE_PRICES, INTEREST_RATES, [5000], [1000], [1.5], [0.0], [0], [360],
+        [10000], [10000], [200000], [1_000_000, 2_000_000], [0.3, 0.5, 0.7],
+    )
+    print(f"Scenario grid: {len(df)} rows\n")
+
+    swept, reference = time_per_call(lambda: resweep(df), repeats=1)
+    closed, sens = time_per_call(lambda: scenario_sensitivities(df))
+    gap = np.abs(sens["payment_per_step"].to_numpy() - reference).max()
+
+    dense, exact = time_per_call(lambda: loan_calc(4_000_000, CHART_RATES, 360))
+    curve, interpolated = time_per_call(
+        lambda: payment_curve(4_000_000, KNOT_RATES, 360, CHART_RATES)
+    )
+
+    print(f"{'method':<32} {'evaluations':>11} {'time (ms)':>10}")
+    print(f"{'kr per 0.25pp, loan_calc resweep':<32} {2 * len(df):>11} {swept * 1e3:10.1f}")
+    print(f"{'kr per 0.25pp, closed form':<32} {len(df):>11} {closed * 1e3:10.1f}")
+    print(f"{'chart, dense loan_calc':<32} {CHART_RATES.size:>11} {dense * 1e3:10.3f}")
+    print(f"{'chart, Hermite from knots':<32} {KNOT_RATES.size:>11} {curve * 1e3:10.3f}")
+    print(f"\nLargest gap per 0.25pp: {gap:.3f} NOK")
+    print(f"Largest gap of the Hermite curve: {np.abs(interpolated - exact).max():.3f} NOK")
+
+
+if __name__ == "__main__":
+    main()
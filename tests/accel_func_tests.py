@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions import accel_funcs  # noqa: E402
+from functions.accel_funcs import (  # noqa: E402
+    ACCELERATED_MIN_SIZE,
+    KERNEL_BACKEND_ENV,
+    NUMBA_AVAILABLE,
+    resolve_backend,
+)
+from functions.calc_funcs import (  # noqa: E402
+    calculate_amortization_schedules_batched,
+    calculate_electricity_costs_array,
+    scenario_analysis_electricity_costs,
+)
+
+# The uncompiled loops check the kernel logic everywhere, the compiled ones where Numba is installed
+KERNEL_BACKENDS = [
+    "python",
+    pytest.param(
+        "numba", marks=pytest.mark.skipif(not NUMBA_AVAILABLE, reason="Numba is not installed")
+    ),
+]
+
+
+@pytest.mark.parametrize("backend", KERNEL_BACKENDS)
+@pytest.mark.parametrize(
+    "loan_type", ["annuity", "serial", np.array([["annuity"], ["serial"]])]
+)
+def test_schedules_match_numpy_bit_for_bit(backend, loan_type):
+    rng = np.random.default_rng(1)
+    loans = np.r_[200000, rng.uniform(1e5, 8e6, 5).round(-3)][:, np.newaxis, np.newaxis]
+    rates = np.r_[0.0, 0.0025, 0.035, rng.uniform(0, 0.2, 3)]
+
+    for months in (1, 37, 360):
+        reference = calculate_amortization_schedules_batched(loans, rates, months, loan_type, "numpy")
+        result = calculate_amortization_schedules_batched(loans, rates, months, loan_type, backend)
+        for name, expected in reference._asdict().items():
+            actual = getattr(result, name)
+            assert actual.shape == expected.shape, name
+            np.testing.assert_array_equal(actual, expected, err_msg=name, strict=True)
+
+
+@pytest.mark.parametrize("backend", KERNEL_BACKENDS)
+def test_electricity_costs_match_numpy_bit_for_bit(backend):
+    # Prices on both sides of the support limit and usages on both sides of the cap
+    usage = np.r_[0, 100, 4999, 5000, 5001, 12000][:, np.newaxis]
+    price = np.r_[np.linspace(0, 3, 61), 0.9125, np.nextafter(0.9125, 1)]
+    markup = np.array([0.0, 0.1, 0.39])[:, np.newaxis, np.newaxis]
+
+    for args in [(usage, price, 0.1, 39), (usage, price, markup, 100.5), (2500, 1.7, 0.1, 39)]:
+        expected = calculate_electricity_costs_array(*args, backend="numpy")
+        result = calculate_electricity_costs_array(*args, backend=backend)
+        np.testing.assert_array_equal(result, expected, strict=True)
+
+
+def test_resolve_backend(monkeypatch):
+    monkeypatch.delenv(KERNEL_BACKEND_ENV, raising=False)
+    automatic = "numba" if NUMBA_AVAILABLE else "numpy"
+    assert resolve_backend() == automatic
+    assert resolve_backend(size=ACCELERATED_MIN_SIZE) == automatic
+    assert resolve_backend(size=ACCELERATED_MIN_SIZE - 1) == "numpy"
+
+    # An explicit backend is used regardless of the size
+    assert resolve_backend("python", size=1) == "python"
+
+    monkeypatch.setenv(KERNEL_BACKEND_ENV, "python")
+    assert resolve_backend(size=1) == "python"
+    assert resolve_backend("numpy") == "numpy"
+
+    with pytest.raises(ValueError):
+        resolve_backend("fortran")
+    if not NUMBA_AVAILABLE:
+        with pytest.raises(ValueError):
+            resolve_backend("numba")
+
+
+def test_environment_selects_backend(monkeypatch):
+    calls = []
+    schedule_loops, electricity_loops = accel_funcs._KERNELS["python"]
+
+    def counted(kernel):
+        def wrapper(*args):
+            calls.append(kernel.__name__)
+            return kernel(*args)
+        return wrapper
+
+    monkeypatch.setitem(
+        accel_funcs._KERNELS, "python", (counted(schedule_loops), counted(electricity_loops))
+    )
+    monkeypatch.setenv(KERNEL_BACKEND_ENV, "python")
+    calculate_amortization_schedules_batched(np.array([1e6, 2e6]), 0.04, 24)
+    scenario_analysis_electricity_costs.__wrapped__(np.arange(0, 2000, 500), np.array([0.5, 1.5]), 0.1, 39)
+    assert calls == ["_schedule_loops", "_electricity_loops"]
+
+
+if __name__ == "__main__":
+    pytest.main()
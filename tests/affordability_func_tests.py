@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.affordability_funcs import (  # noqa: E402
+    affordability_table,
+    break_even_rate,
+    max_house_price,
+    max_loan_payment,
+)
+from functions.calc_funcs import _person_totals, loan_calc  # noqa: E402
+
+COSTS = dict(
+    fixed_cost_house=5000,
+    el_cost=1500,
+    person_a_fixed_costs=12000,
+    person_b_fixed_costs=9000,
+)
+
+
+def forward_totals(house_price, rate, months, ek, transaction_costs, fraq, loan_type="annuity"):
+    """Monthly totals of both persons, evaluated one loan at a time."""
+    loan = house_price - (ek - transaction_costs)
+    payment = np.array(
+        [loan_calc(*args, loan_type) for args in np.broadcast(loan, rate, months)]
+    ).reshape(np.broadcast(loan, rate, months).shape)
+    return _person_totals(
+        payment,
+        COSTS["el_cost"],
+        COSTS["fixed_cost_house"],
+        fraq,
+        COSTS["person_a_fixed_costs"],
+        COSTS["person_b_fixed_costs"],
+    )
+
+
+def test_max_loan_payment():
+    # Person B is the binding constraint: (25000 - 3250 - 9000) / 0.6
+    assert max_loan_payment(30000, 25000, 0.4, **COSTS) == pytest.approx(21250)
+
+    # A person without a share of the loan does not limit it, unless short of budget
+    assert max_loan_payment(30000, 25000, 1.0, **COSTS) == pytest.approx(14750)
+    assert max_loan_payment(30000, 10000, 1.0, **COSTS) == -np.inf
+    assert max_loan_payment(30000, None, 0.5, **COSTS) == pytest.approx(29500)
+
+
+@pytest.mark.parametrize("loan_type", ["annuity", "serial"])
+def test_max_house_price_round_trip(loan_type):
+    budget_a = np.array([25000, 35000, 50000])[:, np.newaxis]
+    rate = np.array([0.0, 0.03, 0.06])
+    fraq = np.array([0.3, 0.5, 0.7])[:, np.newaxis, np.newaxis]
+
+    price = max_house_price(
+        budget_a, 30000, rate, 300, 1500000, 200000, fraq, **COSTS, loan_type=loan_type
+    )
+    assert price.shape == (3, 3, 3)
+
+    # At the highest price the binding person spends exactly the budget
+    a_total, b_total = forward_totals(price, rate, 300, 1500000, 200000, fraq, loan_type)
+    assert (a_total <= budget_a + 1e-6).all() and (b_total <= 30000 + 1e-6).all()
+    np.testing.assert_allclose(np.maximum(a_total - budget_a, b_total - 30000), 0, atol=1e-6)
+
+    # Price falls with the rate
+    assert (np.diff(price, axis=-1) < 0).all()
+
+
+def test_max_house_price_limits():
+    # Infeasible budgets give NaN
+    assert np.isnan(max_house_price(10000, None, 0.05, 360, 1000000, **COSTS))
+
+    # The loan limit caps the price
+    price = max_house_price(50000, None, 0.01, 360, 1000000, max_loan_limit=2000000)
+    assert price == pytest.approx(3000000)
+
+
+@pytest.mark.parametrize("loan_type", ["annuity", "serial"])
+def test_break_even_rate_round_trip(loan_type):
+    rng = np.random.default_rng(0)
+    budget = rng.uniform(20000, 60000, 2000)
+    house_price = rng.uniform(2e6, 8e6, 2000)
+    months = rng.choice([120, 240, 360, 480], 2000)
+    fraq = rng.uniform(0.2, 0.8, 2000)
+
+    rate = break_even_rate(
+        budget, budget, house_price, months, 1000000, 200000, fraq, **COSTS, loan_type=loan_type
+    )
+    solved = np.isfinite(rate)
+    assert solved.sum() > 500
+    assert (rate[solved] >= 0).all() and (rate[solved] < 1).all()
+
+    # At the break-even rate the binding person spends exactly the budget
+    a_total, b_total = forward_totals(
+        house_price[solved], rate[solved], months[solved], 1000000, 200000, fraq[solved],
+        loan_type,
+    )
+    np.testing.assert_allclose(
+        np.maximum(a_total / budget[solved], b_total / budget[solved]), 1, rtol=1e-9
+    )
+
+    # The inverse of max_house_price
+    price = max_house_price(
+        budget[solved], budget[solved], rate[solved], months[solved], 1000000, 200000,
+        fraq[solved], **COSTS, loan_type=loan_type,
+    )
+    np.testing.assert_allclose(price, house_price[solved], rtol=1e-9)
+
+
+def test_break_even_rate_edges():
+    # Unaffordable even at zero interest, and affordable at any rate
+    assert np.isnan(break_even_rate(20000, None, 10000000, 360, 0))
+    assert break_even_rate(20000, None, 1000000, 360, 1000000) == np.inf
+    assert break_even_rate(500000, None, 2000000, 360, 0) == np.inf
+
+    # Exactly the zero-interest payment
+    assert break_even_rate(10000, None, 3600000, 360, 0) == pytest.approx(0, abs=1e-9)
+
+
+def test_affordability_table():
+    budgets, rates, eks, terms, fraqs = [25000, 40000], [0.02, 0.05, 0.08], [1e6], [240, 360], [0.5]
+    table = affordability_table(budgets, rates, eks, terms, fraqs, 200000, **COSTS)
+
+    assert len(table) == 12
+    assert list(table.columns) == [
+        "budget", "interest_rate", "ek", "ammortisation_periods", "ownership_fraq",
+        "max_house_price",
+    ]
+
+    # Row order follows itertools.product over the ranges
+    row = table.iloc[7]
+    assert (row["budget"], row["interest_rate"], row["ammortisation_periods"]) == (40000, 0.02, 360)
+    assert row["max_house_price"] == pytest.approx(
+        max_house_price(40000, 40000, 0.02, 360, 1e6, 200000, 0.5, **COSTS)
+    )
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.allocation_funcs import (  # noqa: E402
+    allocate_costs,
+    allocation_matrix,
+    owner_labels,
+    two_owner_shares,
+)
+
+
+def test_allocation_matrix_rules():
+    allocation = allocation_matrix(
+        [0.4, 0.3, 0.2, 0.1],
+        {"el_cost": [1, 1, 1, 0], "fixed_cost_house": "ownership"},
+    )
+    assert allocation.shape == (3, 4)
+    np.testing.assert_allclose(allocation.sum(axis=-1), 1)
+    np.testing.assert_array_equal(allocation[0], [0.4, 0.3, 0.2, 0.1])
+    np.testing.assert_allclose(allocation[1], [1 / 3, 1 / 3, 1 / 3, 0])
+    np.testing.assert_array_equal(allocation[2], allocation[0])
+
+    # Without rules the loan follows ownership and the rest is split equally
+    np.testing.assert_array_equal(allocation_matrix([0.7, 0.3])[1:], 0.5)
+
+
+@pytest.mark.parametrize(
+    "shares, rules",
+    [
+        ([0.5, 0.6], None),
+        ([1.2, -0.2], None),
+        ([0.5, 0.5], {"water": "equal"}),
+        ([0.5, 0.5], {"el_cost": "usage"}),
+        ([0.5, 0.5], {"el_cost": [1, 1, 1]}),
+        ([0.5, 0.5], {"el_cost": [0, 0]}),
+        (0.5, None),
+    ],
+)
+def test_allocation_matrix_invalid(shares, rules):
+    with pytest.raises(ValueError):
+        allocation_matrix(shares, rules)
+
+
+def test_allocate_costs_over_grid():
+    # Payments on a (3, 1) grid and ownership fractions on a (1, 4) grid
+    payment = np.array([10000.0, 15000.0, 20000.0])[:, np.newaxis]
+    fraq = np.array([0.0, 0.33, 0.5, 1.0])
+    shared = np.stack(np.broadcast_arrays(payment, 1500.0, 4000.0), axis=-1)
+    totals = allocate_costs(shared, allocation_matrix(two_owner_shares(fraq)), [9000, 11000])
+    assert totals.shape == (3, 4, 2)
+
+    # The per-person formulas the matrix product replaces
+    np.testing.assert_array_equal(totals[..., 0], payment * fraq + 1500 / 2 + 4000 / 2 + 9000)
+    np.testing.assert_array_equal(
+        totals[..., 1], payment * (1 - fraq) + 1500 / 2 + 4000 / 2 + 11000
+    )
+
+    # Nothing is lost or counted twice
+    np.testing.assert_allclose(totals.sum(axis=-1), np.tile(shared.sum(axis=-1) + 20000, 4))
+
+
+def test_owner_labels():
+    assert owner_labels(3) == ("A", "B", "C")
+    with pytest.raises(ValueError):
+        owner_labels(0)
+
+
+if __name__ == "__main__":
+    pytest.main()
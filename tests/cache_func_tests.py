@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions import cache_funcs  # noqa: E402
+from functions.cache_funcs import ResultCache, cache_key, configure_cache  # noqa: E402
+from functions import calc_funcs  # noqa: E402
+from functions.calc_funcs import (  # noqa: E402
+    monthly_price_calculator_scenarios_incremental,
+    monthly_price_calculator_scenarios_vectorized,
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    yield configure_cache(tmp_path)
+    configure_cache(None)
+
+
+def scenario_ranges(house_prices):
+    return (
+        house_prices, [0.02, 0.035], [5000], [500], [1.5], [0.1], [39], [360],
+        [10000], [10000], [200000], [1500000], [0.5], ["annuity", "serial"],
+    )
+
+
+def test_cache_key():
+    def func():
+        pass
+
+    key = cache_key(func, {"x": [1, 2], "names": ["annuity"], "flag": True})
+    assert key == cache_key(func, {"x": np.array([1, 2]), "names": ("annuity",), "flag": 1})
+    assert key == cache_key(func, {"flag": True, "names": ["annuity"], "x": [1, 2]})
+
+    # Values, dtypes and shapes all count
+    assert key != cache_key(func, {"x": [1, 3], "names": ["annuity"], "flag": True})
+    assert key != cache_key(func, {"x": [1.0, 2.0], "names": ["annuity"], "flag": True})
+    assert key != cache_key(func, {"x": [[1, 2]], "names": ["annuity"], "flag": True})
+    assert cache_key(func, {"x": [1, "a"]}) != cache_key(func, {"x": ["1", "a"]})
+
+    with pytest.raises(TypeError):
+        cache_key(func, {"x": object()})
+
+
+def test_cache_key_covers_source_files(tmp_path, monkeypatch):
+    def func():
+        pass
+
+    (tmp_path / "functions").mkdir()
+    (tmp_path / "data").mkdir()
+    (tmp_path / "functions" / "helper_funcs.py").write_text("RATE = 1\n")
+    (tmp_path / "data" / "table.npy").write_bytes(b"\x00")
+    monkeypatch.setattr(cache_funcs, "PROJECT_ROOT", tmp_path)
+
+    def key():
+        cache_funcs._source_digest.cache_clear()
+        return cache_key(func, {"x": 1})
+
+    try:
+        original = key()
+        # Editing any module or data file, not only the one defining func, gives new keys
+        (tmp_path / "functions" / "helper_funcs.py").write_text("RATE = 2\n")
+        edited = key()
+        (tmp_path / "data" / "table.npy").write_bytes(b"\x01")
+        assert len({original, edited, key()}) == 3
+    finally:
+        cache_funcs._source_digest.cache_clear()
+
+
+def test_persistent_cache_round_trip(cache):
+    ranges = scenario_ranges(np.arange(3_000_000, 4_000_000, 100_000))
+    df = monthly_price_calculator_scenarios_vectorized(*ranges, compact=True)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(cache.entries()) == 1
+
+    # Keyword and positional calls share the entry, and the frame comes back exactly
+    cached = monthly_price_calculator_scenarios_vectorized(
+        *ranges[:-1], loan_type_range=ranges[-1], compact=True
+    )
+    assert (cache.hits, cache.misses) == (1, 1)
+    pd.testing.assert_frame_equal(cached, df)
+    assert cached.attrs == df.attrs
+
+    # A new instance on the same directory, as after a restart, is warm
+    restarted = configure_cache(cache.directory)
+    pd.testing.assert_frame_equal(
+        monthly_price_calculator_scenarios_vectorized(*ranges, compact=True), df
+    )
+    assert restarted.hits == 1
+
+    # Without a directory the cache is off
+    configure_cache(None)
+    monthly_price_calculator_scenarios_vectorized(*ranges, compact=True)
+    assert len(restarted.entries()) == 1
+
+
+def test_persistent_cache_incremental_scenarios(cache, monkeypatch):
+    ranges = scenario_ranges(np.arange(3_000_000, 4_000_000, 100_000))
+    df = monthly_price_calculator_scenarios_incremental(*ranges, compact=True)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # A hit is served from disk without touching the in-memory grids
+    def extend(previous, ranges):
+        raise AssertionError("The grid should not be extended on a cache hit")
+
+    monkeypatch.setattr(calc_funcs, "extend_scenario_grid", extend)
+    pd.testing.assert_frame_equal(
+        monthly_price_calculator_scenarios_incremental(*ranges, compact=True), df
+    )
+    assert cache.hits == 1
+
+
+def test_result_cache_eviction(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=10**9)
+    frames = {key: pd.DataFrame({"x": np.arange(1000.0) + i}) for i, key in enumerate("abcd")}
+    for i, (key, df) in enumerate(frames.items()):
+        cache.put(key, df)
+        os.utime(cache.path(key), (1000 + i, 1000 + i))
+    size = cache.total_bytes() // 4
+
+    # Reading 'a' makes 'b' the least recently used entry
+    pd.testing.assert_frame_equal(cache.get("a"), frames["a"])
+    cache.max_bytes = 3 * size
+    cache.evict()
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("d") is not None
+    assert cache.total_bytes() <= cache.max_bytes
+
+    # Unreadable entries count as misses and are removed
+    cache.path("c").write_bytes(b"not arrow")
+    assert cache.get("c") is None
+    assert not cache.path("c").exists()
+
+    # Frames Arrow cannot store are not cached and leave no temporary file behind
+    assert not cache.put("mixed", pd.DataFrame({"x": [1, "a"]}))
+    assert cache.get("mixed") is None
+    assert not list(tmp_path.glob("*.tmp"))
+
+    cache.clear()
+    assert cache.entries() == []
+
+
+def _write_and_read(directory):
+    cache = ResultCache(directory, max_bytes=10**6)
+    df = pd.DataFrame({"x": np.arange(5000.0)})
+    for i in range(20):
+        cache.put(f"key{i % 3}", df)
+        result = cache.get(f"key{(i + 1) % 3}")
+        if result is not None and not result.equals(df):
+            return False
+    return True
+
+
+def test_result_cache_shared_between_processes(tmp_path):
+    # Readers only ever see complete entries, however the writers interleave
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        assert all(executor.map(_write_and_read, [tmp_path] * 4))
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_active_cache_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(cache_funcs.CACHE_DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(cache_funcs.CACHE_MAX_BYTES_ENV, "12345")
+    monkeypatch.setattr(cache_funcs, "_configured", False)
+    try:
+        cache = cache_funcs.active_cache()
+        assert cache.directory == tmp_path and cache.max_bytes == 12345
+    finally:
+        configure_cache(None)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -8,6 +8,7 @@ Created on Mon Sep  2 2024
 import pytest
 import numpy as np
 import pandas as pd
+from collections import OrderedDict
 
 import sys
 from pathlib import Path
@@ -16,14 +17,39 @@ from pathlib import Path
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
+from functions.annuity_table import (  # noqa: E402
+    annuity_factors,
+    build_annuity_factor_table,
+    load_annuity_factor_table,
+)
+from functions import calc_funcs  # noqa: E402
 from functions.calc_funcs import (  # noqa: E402
+    annuity_kernel,
+    calculate_amortization_schedule,
+    calculate_amortization_schedules_batched,
+    calculate_piecewise_rate_schedules,
+    piecewise_annuity_kernel,
+    stack_rate_paths,
+    serial_kernel,
+    serial_loans,
+    first_payment_factors,
     loan_calc,
     calculate_govt_support,
     calculate_electricity_costs,
+    calculate_govt_support_array,
+    calculate_electricity_costs_array,
     scenario_analysis_electricity_costs,
     interest_rate_sensitivity,
     monthly_price_calculator,
     monthly_price_calculator_scenarios,
+    allocate_scenario_costs,
+    monthly_price_calculator_scenarios_vectorized,
+    iter_monthly_price_calculator_scenarios,
+    monthly_price_calculator_scenarios_parallel,
+    monthly_price_calculator_scenarios_incremental,
+    extend_scenario_grid,
+    compact_scenario_frame,
+    expand_scenario_frame,
 )
 
 
@@ -32,6 +58,232 @@ def test_loan_calc():
     assert pytest.approx(loan_calc(200000, 0.03, 240), 0.01) == 1108.86
 
 
+def test_annuity_kernel():
+    payment, balance = annuity_kernel(np.array([100000, 200000]), 0.03, 240)
+    assert balance.shape == (2, 241)
+    assert pytest.approx(payment[1], 1e-9) == loan_calc(200000, 0.03, 240)
+    assert balance[1, 0] == 200000
+    assert pytest.approx(balance[:, -1], abs=1e-6) == [0, 0]
+
+    # Zero rate is amortized linearly and exactly
+    payment, balance = annuity_kernel(120000, 0.0, 12)
+    assert payment == 10000
+    assert balance.tolist() == [120000 - 10000 * k for k in range(13)]
+
+
+def test_calculate_amortization_schedule():
+    schedule = calculate_amortization_schedule(200000, 0.05, 360)
+    assert len(schedule) == 361
+    assert schedule.loc[1, "Principal"] == 240
+    assert schedule.loc[1, "Interest"] == 833
+    assert schedule.loc[360, "Remaining Balance"] == 0
+    assert pytest.approx(schedule.loc[360, "Total Paid"], abs=1) == (
+        loan_calc(200000, 0.05, 360) * 360
+    )
+
+
+# Rows of the schedules computed with numpy_financial ipmt/ppmt before the closed-form
+# kernel: month, principal, interest, remaining balance and total paid
+REFERENCE_SCHEDULES = {
+    (200000, 0.05, 360): [
+        [0, 0, 0, 200000, 0],
+        [1, 240, 833, 199760, 1073],
+        [2, 482, 1666, 199518, 2148],
+        [12, 2951, 9933, 197049, 12884],
+        [60, 16343, 48076, 183657, 64419],
+        [180, 64232, 129024, 135768, 193256],
+        [359, 198931, 186507, 1069, 385438],
+        [360, 200000, 186512, 0, 386512],
+    ],
+    (2500000, 0.045, 240): [
+        [0, 0, 0, 2500000, 0],
+        [1, 6441, 9375, 2493559, 15816],
+        [2, 12907, 18726, 2487093, 31633],
+        [12, 78909, 110886, 2421091, 189795],
+        [60, 432500, 516474, 2067500, 948974],
+        [120, 973902, 924046, 1526098, 1897948],
+        [239, 2484243, 1295837, 15757, 3780080],
+        [240, 2500000, 1295896, 0, 3795896],
+    ],
+    (1000000, 0.0, 120): [
+        [0, 0, 0, 1000000, 0],
+        [1, 8333, 0, 991667, 8333],
+        [2, 16667, 0, 983333, 16667],
+        [12, 100000, 0, 900000, 100000],
+        [60, 500000, 0, 500000, 500000],
+        [119, 991667, 0, 8333, 991667],
+        [120, 1000000, 0, 0, 1000000],
+    ],
+}
+
+
+@pytest.mark.parametrize("loan, rate, months", list(REFERENCE_SCHEDULES))
+def test_amortization_schedule_reference(loan, rate, months):
+    expected = np.array(REFERENCE_SCHEDULES[(loan, rate, months)], dtype=float)
+    schedule = calculate_amortization_schedule(loan, rate, months)
+    np.testing.assert_array_equal(
+        schedule.loc[expected[:, 0]].to_numpy(dtype=float), expected
+    )
+
+    # The batched kernel gives the same rows
+    batched = calculate_amortization_schedules_batched(np.array([loan]), rate, months)
+    np.testing.assert_array_equal(
+        batched.to_frame((0,)).loc[expected[:, 0]].to_numpy(dtype=float), expected
+    )
+
+
+def test_amortization_schedule_numpy_financial():
+    npf = pytest.importorskip("numpy_financial")
+    loan, rate, months = 3333333, 0.0725, 300
+    per = np.arange(1, months + 1)
+    interest = -npf.ipmt(rate / 12, per, months, loan)
+    principal = -npf.ppmt(rate / 12, per, months, loan)
+
+    schedule = calculate_amortization_schedule(loan, rate, months)
+    np.testing.assert_array_equal(
+        schedule["Principal"][1:], principal.cumsum().round(0)
+    )
+    np.testing.assert_array_equal(schedule["Interest"][1:], interest.cumsum().round(0))
+
+
+def test_calculate_amortization_schedules_batched():
+    loans = np.array([2000000, 2500000, 3000000])
+    rates = np.array([0.02, 0.045])
+    schedules = calculate_amortization_schedules_batched(
+        loans[:, np.newaxis], rates[np.newaxis, :], 240
+    )
+    assert schedules.remaining_balance.shape == (3, 2, 241)
+    assert schedules.month.shape == (241,)
+
+    # Every row matches the single-loan schedule
+    for i, loan in enumerate(loans):
+        for j, rate in enumerate(rates):
+            pd.testing.assert_frame_equal(
+                schedules.to_frame((i, j)),
+                calculate_amortization_schedule(loan, rate, 240),
+                check_exact=True,
+            )
+
+
+def test_serial_loans():
+    payments, balance = serial_kernel(
+        np.array([[1200000], [2400000]]), np.array([0.0, 0.06]), 120
+    )
+    assert payments.shape == (2, 2, 120)
+    assert balance.shape == (2, 2, 121)
+
+    # Reference: constant principal plus interest on the balance month by month
+    remaining = 2400000.0
+    for month in range(120):
+        payment = 20000 + remaining * 0.06 / 12
+        remaining -= 20000
+        assert payments[1, 1, month] == pytest.approx(payment)
+        assert balance[1, 1, month + 1] == pytest.approx(remaining)
+    assert loan_calc(2400000, 0.06, 120, loan_type="serial") == pytest.approx(payments[1, 1, 0])
+    np.testing.assert_array_equal(payments[:, 0], np.broadcast_to([[10000], [20000]], (2, 120)))
+
+    schedule = calculate_amortization_schedule(2400000, 0.06, 120, "serial")
+    np.testing.assert_allclose(
+        schedule["Interest"][1:], payments[1, 1].cumsum() - schedule["Principal"][1:], atol=1
+    )
+    assert schedule["Remaining Balance"].iloc[-1] == 0
+
+    # Loan type as a batch axis matches the single-type schedules
+    loan_types = np.array(["annuity", "serial"])
+    schedules = calculate_amortization_schedules_batched(
+        np.array([1000000, 2000000])[:, np.newaxis], 0.05, 240, loan_types
+    )
+    assert schedules.interest.shape == (2, 2, 241)
+    for i, loan in enumerate([1000000, 2000000]):
+        for j, loan_type in enumerate(loan_types):
+            pd.testing.assert_frame_equal(
+                schedules.to_frame((i, j)),
+                calculate_amortization_schedule(loan, 0.05, 240, loan_type),
+                check_exact=True,
+            )
+
+    np.testing.assert_allclose(
+        first_payment_factors(0.05, 240, loan_types),
+        [loan_calc(1, 0.05, 240), 1 / 240 + 0.05 / 12],
+    )
+    np.testing.assert_array_equal(serial_loans(loan_types), [False, True])
+    with pytest.raises(ValueError):
+        serial_loans(np.array(["serial", "bullet"]))
+    with pytest.raises(ValueError):
+        loan_calc(1000000, 0.05, 240, loan_type="bullet")
+
+
+def test_calculate_piecewise_rate_schedules():
+    loans = np.array([2000000, 3000000])
+    change_months, rates = stack_rate_paths(
+        [
+            ([0], [0.045]),
+            ([0, 24], [0.05, 0.04]),
+            ([0, 12, 60, 60, 120], [0.05, 0.0, 0.06, 0.03, 0.02]),
+        ]
+    )
+    assert change_months.shape == rates.shape == (3, 5)
+
+    # A single rate gives exactly the fixed-rate schedules
+    schedules = calculate_piecewise_rate_schedules(
+        loans[:, np.newaxis], change_months, rates, 240
+    )
+    assert schedules.interest.shape == (2, 3, 241)
+    fixed = calculate_amortization_schedules_batched(loans, 0.045, 240)
+    np.testing.assert_array_equal(schedules.month, fixed.month)
+    for field in fixed._fields[1:]:
+        np.testing.assert_array_equal(getattr(schedules, field)[:, 0], getattr(fixed, field))
+
+    # Reference: re-annuitize the remaining balance month by month
+    payments, balances, paid = piecewise_annuity_kernel(
+        loans[:, np.newaxis], change_months, rates, 240
+    )
+    for path in range(3):
+        segment = np.searchsorted(change_months[path], np.arange(240), side="right") - 1
+        monthly_rates = rates[path][segment]
+        for i, loan in enumerate(loans):
+            balance = float(loan)
+            for month, rate in enumerate(monthly_rates):
+                remaining = 240 - month
+                payment = loan_calc(balance, rate, remaining) if rate > 0 else balance / remaining
+                balance -= payment - balance * rate / 12
+                assert payments[i, path, month] == pytest.approx(payment)
+                assert balances[i, path, month + 1] == pytest.approx(balance, abs=1e-4)
+    np.testing.assert_allclose(paid[..., 1:], payments.cumsum(axis=-1))
+    np.testing.assert_allclose(balances[..., -1], 0, atol=1e-4)
+
+    with pytest.raises(ValueError):
+        piecewise_annuity_kernel(loans, np.array([12, 24]), np.array([0.05, 0.04]), 240)
+
+
+def test_annuity_factor_table():
+    # The persisted table must be up to date with the formula
+    np.testing.assert_array_equal(
+        load_annuity_factor_table(), build_annuity_factor_table()
+    )
+
+    # Table lookups give exactly the same payment as the direct calculation
+    rates = np.array([0.02, 0.0325, 0.2])
+    monthly_rate = rates / 12
+    direct = monthly_rate * (1 + monthly_rate) ** 360 / ((1 + monthly_rate) ** 360 - 1)
+    assert [annuity_factors(rate, 360) for rate in rates] == direct.tolist()
+    np.testing.assert_array_equal(annuity_factors(rates, 360), direct)
+    np.testing.assert_array_equal(loan_calc(100000, rates, 360), direct * 100000)
+
+    # Rates and terms outside the table fall back to the normal computation
+    assert annuity_factors(0.0326, 360) == pytest.approx(
+        (0.0326 / 12) / (1 - (1 + 0.0326 / 12) ** -360), rel=1e-15
+    )
+    assert annuity_factors(0.25, 481) == pytest.approx(
+        (0.25 / 12) / (1 - (1 + 0.25 / 12) ** -481), rel=1e-15
+    )
+
+    # Zero rate gives the linear payment instead of dividing by zero
+    assert annuity_factors(0.0, 12) == 1 / 12
+    assert loan_calc(120000, 0.0, 12) == 10000
+    np.testing.assert_array_equal(annuity_factors(np.array([0.0]), 500), [1 / 500])
+
+
 def test_calculate_govt_support():
     assert pytest.approx(calculate_govt_support(1000, 1.5, 0.9125), 0.01) == 527.25
     assert (
@@ -62,6 +314,20 @@ def test_calculate_electricity_costs():
     )
 
 
+def test_electricity_cost_kernels_match_scalar_functions():
+    kwh_usage = np.array([0, 100, 1000, 5000, 5001, 8000])[:, np.newaxis]
+    kwh_price = np.array([0.0, 0.5, 0.9125, 1.0, 1.5, 4.0])[np.newaxis, :]
+
+    support = calculate_govt_support_array(kwh_usage, kwh_price)
+    costs = calculate_electricity_costs_array(kwh_usage, kwh_price, 0.1, 39)
+    assert costs.shape == (6, 6)
+
+    for i, usage in enumerate(kwh_usage[:, 0]):
+        for j, price in enumerate(kwh_price[0]):
+            assert support[i, j] == calculate_govt_support(usage, price)
+            assert costs[i, j] == calculate_electricity_costs(usage, price, 0.1, 39)
+
+
 def test_scenario_analysis_electricity_costs():
     kwh_usage_range = np.array([500, 1000])
     kwh_price_range = np.array([1.0, 1.5])
@@ -74,6 +340,14 @@ def test_scenario_analysis_electricity_costs():
         column in result.columns
         for column in ["kWh Usage", "kWh Price (NOK)", "Total Cost (NOK)"]
     )
+    # Usage is the outer loop and price the inner loop
+    assert result["kWh Usage"].tolist() == [500, 500, 1000, 1000]
+    assert result["kWh Price (NOK)"].tolist() == [1.0, 1.5, 1.0, 1.5]
+    assert result["Total Cost (NOK)"].tolist() == [
+        calculate_electricity_costs(usage, price, 0.1, 100)
+        for usage in kwh_usage_range
+        for price in kwh_price_range
+    ]
 
 
 def test_interest_rate_sensitivity():
@@ -95,6 +369,91 @@ def test_monthly_price_calculator():
     )
 
 
+def test_monthly_price_calculator_owners():
+    # Two owners given as shares reproduce the ownership fraction split
+    two = monthly_price_calculator(2500000, 0.03, 3000, 1500, 360, 9000, 11000, ownership_fraq=0.4)
+    shares = monthly_price_calculator(
+        2500000, 0.03, 3000, 1500, 360, ownership_fraq=0.9,
+        ownership_shares=[0.4, 0.6], owner_fixed_costs=[9000, 11000],
+    )
+    pd.testing.assert_frame_equal(shares, two, check_exact=True)
+
+    result = monthly_price_calculator(
+        2500000, 0.03, 3000, 1500, 360,
+        ownership_shares=[0.5, 0.25, 0.25],
+        owner_fixed_costs=[9000, 8000, 7000],
+        split_rules={"fixed_cost_house": "ownership"},
+    )
+    assert list(result.columns[5:]) == [
+        "a_beløp_hus", "b_beløp_hus", "c_beløp_hus", "a_total", "b_total", "c_total",
+        "person_a_eierandel", "person_b_eierandel", "person_c_eierandel",
+    ]
+    row = result.iloc[0]
+    assert row["c_beløp_hus"] == pytest.approx(row["lån_total"] / 4 + 500 + 750)
+    assert row[["a_beløp_hus", "b_beløp_hus", "c_beløp_hus"]].sum() == pytest.approx(
+        row["total_beløp"]
+    )
+
+    # The ownership shares are reported as given, whatever rule splits the loan
+    equal_loan = monthly_price_calculator(
+        2500000, 0.03, 3000, 1500, 360,
+        ownership_shares=[0.6, 0.3, 0.1],
+        split_rules={"monthly_loan_payment": "equal"},
+    ).iloc[0]
+    assert list(equal_loan[["person_a_eierandel", "person_b_eierandel", "person_c_eierandel"]]) == [
+        0.6, 0.3, 0.1
+    ]
+    assert equal_loan["a_beløp_hus"] == pytest.approx(equal_loan["c_beløp_hus"])
+
+    with pytest.raises(ValueError, match="2 owner fixed costs for 3 ownership shares"):
+        monthly_price_calculator(
+            2500000, 0.03, 3000, 1500, 360,
+            ownership_shares=[0.5, 0.3, 0.2], owner_fixed_costs=[1, 2],
+        )
+
+
+@pytest.mark.parametrize("fraq", [1.2, -0.1])
+def test_ownership_fraq_out_of_range(fraq):
+    # A fraction outside [0, 1] would give one of the two owners a negative share
+    with pytest.raises(ValueError, match="must be non-negative"):
+        monthly_price_calculator(2500000, 0.03, 3000, 1500, 360, ownership_fraq=fraq)
+
+    for scenarios in (
+        monthly_price_calculator_scenarios,
+        monthly_price_calculator_scenarios_vectorized,
+    ):
+        with pytest.raises(ValueError, match="must be non-negative"):
+            scenarios(
+                [3000000], [0.03], [4000], [1000], [1.2], [0.1], [39], [360],
+                [9000], [11000], [200000], [1000000], [fraq],
+            )
+
+
+def test_allocate_scenario_costs():
+    df = monthly_price_calculator_scenarios_vectorized(
+        [3000000, 4000000], [0.02, 0.05], [4000], [1000], [1.2], [0.1], [39], [360],
+        [9000], [11000], [200000], [1000000], [0.3, 0.5], compact=True,
+    )
+
+    # Two owners by the ownership fraction of each row give the a_total and b_total columns
+    fraq = expand_scenario_frame(df)["ownership_fraq"].to_numpy()
+    fixed = np.array([9000, 11000])
+    totals = allocate_scenario_costs(df, np.column_stack([fraq, 1 - fraq]), fixed)
+    expanded = expand_scenario_frame(df)
+    pd.testing.assert_frame_equal(totals, expanded[["a_total", "b_total"]], check_exact=True)
+
+    # A family of four with electricity split by the number of adults and children
+    totals = allocate_scenario_costs(
+        df, [0.5, 0.5, 0, 0], [9000, 9000, 2000, 2000], {"el_cost": [2, 2, 1, 1]}
+    )
+    assert list(totals.columns) == ["a_total", "b_total", "c_total", "d_total"]
+    np.testing.assert_allclose(
+        totals.sum(axis=1),
+        expanded["monthly_loan_payment"] + expanded["el_cost"] + 4000 + 22000,
+    )
+    np.testing.assert_allclose(totals["c_total"], expanded["el_cost"] / 6 + 1000 + 2000)
+
+
 def test_monthly_price_calculator_scenarios():
     result = monthly_price_calculator_scenarios(
         [2000000, 2500000],
@@ -125,5 +484,274 @@ def test_monthly_price_calculator_scenarios():
     )
 
 
+def test_monthly_price_calculator_scenarios_vectorized():
+    ranges = (
+        [2000000, 2500000, 3000000],
+        [0.02, 0.03],
+        [3000, 5000],
+        [1000, 6000],
+        [0.5, 1.5],
+        [0.1],
+        [100],
+        [240, 360],
+        [12000],
+        [10000, 12000],
+        [200000],
+        [500000],
+        [0.33, 0.5],
+    )
+    expected = monthly_price_calculator_scenarios(*ranges)
+    result = monthly_price_calculator_scenarios_vectorized(*ranges)
+
+    # Results must match the loop implementation exactly, including row order
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_scenarios_with_loan_types():
+    ranges = (
+        [2000000, 2500000],
+        [0.0, 0.03],
+        [3000],
+        [1000],
+        [1.5],
+        [0.1],
+        [100],
+        [240, 360],
+        [12000],
+        [12000],
+        [200000],
+        [500000],
+        [0.33],
+        ["annuity", "serial"],
+    )
+    expected = monthly_price_calculator_scenarios(*ranges)
+    assert list(expected["loan_type"][:2]) == ["annuity", "serial"]
+
+    # All engines agree with the loop, with loan type as the innermost grid axis
+    pd.testing.assert_frame_equal(
+        monthly_price_calculator_scenarios_vectorized(*ranges), expected, check_exact=True
+    )
+    pd.testing.assert_frame_equal(
+        pd.concat(iter_monthly_price_calculator_scenarios(*ranges, chunk_size=5)),
+        expected,
+        check_exact=True,
+    )
+    pd.testing.assert_frame_equal(
+        monthly_price_calculator_scenarios_parallel(*ranges, max_workers=1),
+        expected,
+        check_exact=True,
+    )
+    compact = monthly_price_calculator_scenarios_vectorized(*ranges, compact=True)
+    pd.testing.assert_frame_equal(
+        expand_scenario_frame(compact), expected, check_exact=False, atol=0.005, rtol=0
+    )
+
+    # With interest the serial loan starts with the larger payment
+    payments = expected["monthly_loan_payment"].to_numpy().reshape(-1, 2)
+    with_interest = expected["interest_rate"].to_numpy()[::2] > 0
+    assert (payments[with_interest, 1] > payments[with_interest, 0]).all()
+    np.testing.assert_allclose(payments[~with_interest, 1], payments[~with_interest, 0])
+
+    # Without loan types every engine returns the annuity rows without a loan_type column
+    annuity = expected[expected["loan_type"] == "annuity"].drop(columns="loan_type")
+    annuity = annuity.reset_index(drop=True)
+    default_ranges = ranges[:-1]
+    for result in (
+        monthly_price_calculator_scenarios(*default_ranges),
+        monthly_price_calculator_scenarios_vectorized(*default_ranges),
+        monthly_price_calculator_scenarios_incremental(*default_ranges),
+        pd.concat(iter_monthly_price_calculator_scenarios(*default_ranges)),
+        monthly_price_calculator_scenarios_parallel(*default_ranges, max_workers=1),
+        expand_scenario_frame(
+            monthly_price_calculator_scenarios_vectorized(*default_ranges, compact=True)
+        ),
+    ):
+        pd.testing.assert_frame_equal(result, annuity, check_exact=False, atol=0.005, rtol=0)
+
+
+@pytest.mark.parametrize(
+    "house_prices, interest_rates",
+    [
+        ([3500000, 3600000, 3700000, 3800000], [0.02, 0.025, 0.03, 0.035]),  # widened
+        ([3300000, 3400000, 3500000], [0.02, 0.025]),  # shifted down, narrowed
+        ([3600000, 3400000], [0.04, 0.02, 0.01]),  # reordered, new rates
+        ([4000000], [0.05]),  # disjoint
+    ],
+)
+def test_extend_scenario_grid(house_prices, interest_rates):
+    def ranges(house_prices, interest_rates, ek=(500000, 1000000)):
+        return (
+            house_prices, interest_rates, [3000], [1000], [1.5], [0.1], [100], [240, 360],
+            [12000], [10000, 12000], [200000], list(ek), [0.5], ["annuity", "serial"],
+        )
+
+    previous = extend_scenario_grid(None, ranges([3500000, 3600000], [0.02, 0.025]))
+    grid = extend_scenario_grid(previous, ranges(house_prices, interest_rates))
+
+    # Identical to evaluating the whole grid, in both representations
+    for compact in (False, True):
+        expected = monthly_price_calculator_scenarios_vectorized(
+            *ranges(house_prices, interest_rates), compact=compact
+        )
+        result = grid.to_frame(compact)
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+        assert result.attrs == expected.attrs
+
+    # Other fixed parameters fall back to a full evaluation
+    other = extend_scenario_grid(previous, ranges(house_prices, interest_rates, ek=[700000]))
+    pd.testing.assert_frame_equal(
+        other.to_frame(),
+        monthly_price_calculator_scenarios_vectorized(
+            *ranges(house_prices, interest_rates, ek=[700000])
+        ),
+        check_exact=True,
+    )
+
+
+def test_monthly_price_calculator_scenarios_incremental():
+    fixed = ([5000], [500], [1.5], [0.1], [39], [360], [10000], [10000], [200000], [1500000], [0.5])
+    for house_prices in (
+        np.arange(3500000, 5000001, 100000),
+        np.arange(3500000, 5500001, 100000),
+        np.arange(3700000, 5200001, 100000),
+    ):
+        rates = np.round(np.arange(0.02, 0.05, 0.0025), 5)
+        result = monthly_price_calculator_scenarios_incremental(
+            house_prices, rates, *fixed, compact=True
+        )
+        expected = monthly_price_calculator_scenarios_vectorized(
+            house_prices, rates, *fixed, compact=True
+        )
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_incremental_grid_memory_budget(monkeypatch):
+    fixed = ([5000], [500], [1.5], [0.1], [39], [360], [10000], [10000], [200000], [1500000])
+    rates = [0.02, 0.03, 0.04]
+    grid_bytes = extend_scenario_grid(
+        None, (np.arange(3000000, 4000000, 10000), rates, *fixed, [0.5], ["annuity"])
+    ).nbytes
+    monkeypatch.setattr(calc_funcs, "INCREMENTAL_GRID_CACHE_MAX_BYTES", int(2.5 * grid_bytes))
+    monkeypatch.setattr(calc_funcs, "_recent_grids", OrderedDict())
+
+    # Grids are dropped least recently used first to stay within the byte budget
+    for ownership_fraq in (0.3, 0.4, 0.5):
+        monthly_price_calculator_scenarios_incremental(
+            np.arange(3000000, 4000000, 10000), rates, *fixed, [ownership_fraq]
+        )
+    assert len(calc_funcs._recent_grids) == 2
+    assert sum(grid.nbytes for grid in calc_funcs._recent_grids.values()) <= 2.5 * grid_bytes
+
+    # Grids above the budget are not kept at all
+    kept = list(calc_funcs._recent_grids)
+    monthly_price_calculator_scenarios_incremental(
+        np.arange(3000000, 6000000, 10000), rates, *fixed, [0.6]
+    )
+    assert list(calc_funcs._recent_grids) == kept
+
+
+def test_iter_monthly_price_calculator_scenarios():
+    ranges = (
+        [2000000, 2500000, 3000000],
+        [0.02, 0.03, 0.04],
+        [3000],
+        [1000, 6000],
+        [1.5],
+        [0.1],
+        [100],
+        [360],
+        [12000],
+        [12000],
+        [200000],
+        [500000],
+        [0.33, 0.5],
+    )
+    chunks = list(iter_monthly_price_calculator_scenarios(*ranges, chunk_size=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 10, 6]
+
+    # Chunks come out in grid order and concatenate to the full result
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks),
+        monthly_price_calculator_scenarios(*ranges),
+        check_exact=True,
+    )
+
+    with pytest.raises(ValueError):
+        next(iter_monthly_price_calculator_scenarios(*ranges, chunk_size=0))
+
+
+def test_monthly_price_calculator_scenarios_parallel():
+    ranges = (
+        [2000000, 2500000],
+        [0.02, 0.03, 0.04, 0.05, 0.06],
+        [3000],
+        [1000, 6000],
+        [1.5],
+        [0.1],
+        [100],
+        [360],
+        [12000],
+        [12000],
+        [200000],
+        [500000],
+        [0.33, 0.5],
+    )
+    expected = monthly_price_calculator_scenarios_vectorized(*ranges)
+
+    # Sharding along the rate axis must not change the row order
+    result = monthly_price_calculator_scenarios_parallel(
+        *ranges, max_workers=2, shard_size=2
+    )
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+    # Zero workers or shards are rejected rather than read as the default
+    with pytest.raises(ValueError):
+        monthly_price_calculator_scenarios_parallel(*ranges, max_workers=0)
+    with pytest.raises(ValueError):
+        monthly_price_calculator_scenarios_parallel(*ranges, shard_size=0)
+
+
+def test_compact_scenario_frame():
+    ranges = (
+        np.arange(2000000, 4000000, 100000),
+        [0.02, 0.0225, 0.025, 0.0275],
+        [3000],
+        [1000, 6000],
+        [1.5],
+        [0.1],
+        [100],
+        [360],
+        [12000],
+        [12000],
+        [200000],
+        [500000],
+        [0.5],
+    )
+    full = monthly_price_calculator_scenarios_vectorized(*ranges)
+    compact = monthly_price_calculator_scenarios_vectorized(*ranges, compact=True)
+
+    # Constant parameters are stored once and the grid axes as categoricals
+    assert compact.attrs["scenario_constants"]["fixed_cost_house"] == 3000
+    assert "fixed_cost_house" not in compact.columns
+    assert isinstance(compact["house_price"].dtype, pd.CategoricalDtype)
+    assert compact.memory_usage(deep=True).sum() * 5 < full.memory_usage(deep=True).sum()
+
+    # Expanding restores the full layout, with money columns within half an øre
+    expanded = expand_scenario_frame(compact)
+    pd.testing.assert_index_equal(expanded.columns, full.columns)
+    pd.testing.assert_series_equal(expanded.dtypes, full.dtypes)
+    pd.testing.assert_frame_equal(expanded, full, check_exact=False, atol=0.005, rtol=0)
+
+    # Compacting an existing frame gives the same result as the engine flag
+    pd.testing.assert_frame_equal(
+        expand_scenario_frame(compact_scenario_frame(full)), expanded
+    )
+
+    # Filtering works on the compact frame and full frames pass through unchanged
+    selected = compact[(compact["house_price"] == 3000000) & (compact["interest_rate"] == 0.025)]
+    assert len(expand_scenario_frame(selected)) == 2
+    pd.testing.assert_frame_equal(expand_scenario_frame(full), full)
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import calculate_electricity_costs  # noqa: E402
+from functions.electricity_funcs import (  # noqa: E402
+    flat_consumption_profile,
+    hourly_electricity_costs,
+    hourly_govt_support,
+    load_hourly_series,
+)
+
+
+@pytest.fixture
+def hours():
+    return pd.date_range("2024-01-01", "2024-03-31 23:00", freq="h", tz="Europe/Oslo")
+
+
+def test_load_hourly_series(tmp_path, hours):
+    df = pd.DataFrame({"time": hours.tz_convert("UTC"), "price": np.linspace(0.5, 3.0, hours.size)})
+    df.iloc[::-1].to_csv(tmp_path / "prices.csv", index=False)
+    df.to_parquet(tmp_path / "prices.parquet")
+
+    for name in ("prices.csv", "prices.parquet"):
+        series = load_hourly_series(tmp_path / name)
+        assert series.index.is_monotonic_increasing
+        assert str(series.index.tz) == "Europe/Oslo"
+        np.testing.assert_allclose(series.to_numpy(), df["price"].to_numpy())
+
+    with pytest.raises(ValueError):
+        pd.concat([df, df]).to_csv(tmp_path / "duplicated.csv", index=False)
+        load_hourly_series(tmp_path / "duplicated.csv")
+
+
+def test_hourly_govt_support_monthly_cap():
+    rng = np.random.default_rng(1)
+    usage = rng.uniform(0, 20, 2000)
+    price = rng.uniform(0, 4, 2000)
+    month_ids = np.repeat([0, 1, 2], [700, 700, 600])
+
+    # Reference: walk the hours and track the consumption of the month so far
+    expected = np.empty_like(usage)
+    used = 0.0
+    for i in range(usage.size):
+        if i == 0 or month_ids[i] != month_ids[i - 1]:
+            used = 0.0
+        supported = min(usage[i], max(5000 - used, 0.0))
+        expected[i] = supported * max(price[i] - 0.9125, 0.0) * 0.9
+        used += usage[i]
+
+    np.testing.assert_allclose(hourly_govt_support(usage, price, month_ids), expected)
+
+
+def test_hourly_electricity_costs(hours):
+    prices = pd.Series(1.5, index=hours)
+
+    # A constant price gives the same monthly cost as the average-price calculation
+    usage = flat_consumption_profile(hours, 1000)
+    result = hourly_electricity_costs(usage, prices, 0.1, 39)
+    assert list(result["Month"].astype(str)) == ["2024-01", "2024-02", "2024-03"]
+    np.testing.assert_allclose(result["kWh Usage"], 1000)
+    np.testing.assert_allclose(
+        result["Total Cost (NOK)"], calculate_electricity_costs(1000, 1.5, 0.1, 39)
+    )
+
+    # Above the cap only the first 5000 kWh of each month are supported
+    usage = flat_consumption_profile(hours, 6000)
+    result = hourly_electricity_costs(usage, prices, 0.1, 39)
+    np.testing.assert_allclose(result["Govt Support (NOK)"], 5000 * (1.5 - 0.9125) * 0.9)
+
+    # Volatile prices with the same average get more support than the average price
+    volatile = pd.Series(np.where(np.arange(hours.size) % 2 == 0, 0.5, 2.5), index=hours)
+    result = hourly_electricity_costs(flat_consumption_profile(hours, 1000), volatile, 0.1, 39)
+    assert (result["Govt Support (NOK)"] > 1000 * (1.5 - 0.9125) * 0.9).all()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from io import BytesIO
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    monthly_price_calculator_scenarios_vectorized,
+    expand_scenario_frame,
+)
+from functions.export_funcs import (  # noqa: E402
+    iter_export_chunks,
+    scenario_export_bytes,
+)
+
+
+@pytest.fixture
+def compact_df():
+    return monthly_price_calculator_scenarios_vectorized(
+        np.arange(2000000, 3000000, 100000),
+        [0.02, 0.0225, 0.025],
+        [3000],
+        [1000, 6000],
+        [1.5],
+        [0.1],
+        [100],
+        [360],
+        [12000],
+        [12000],
+        [200000],
+        [500000],
+        [0.5],
+        compact=True,
+    )
+
+
+def test_iter_export_chunks(compact_df):
+    chunks = list(iter_export_chunks(compact_df, chunk_size=25))
+    assert [len(chunk) for chunk in chunks] == [25, 25, 10]
+    pd.testing.assert_frame_equal(pd.concat(chunks), expand_scenario_frame(compact_df))
+
+    # An empty frame still yields the header
+    assert len(list(iter_export_chunks(compact_df.iloc[:0]))) == 1
+
+
+def test_scenario_export_csv(compact_df):
+    expected = expand_scenario_frame(compact_df).to_csv(index=False).encode("utf-8")
+
+    # Chunked writing gives the same file as a single to_csv call
+    assert scenario_export_bytes(compact_df, "CSV", chunk_size=7) == expected
+    assert scenario_export_bytes(compact_df.iloc[:0], "CSV").count(b"\n") == 1
+
+
+@pytest.mark.parametrize("data_format", ["Parquet", "Arrow"])
+def test_scenario_export_columnar(compact_df, data_format):
+    pa = pytest.importorskip("pyarrow")
+    data = scenario_export_bytes(compact_df, data_format, chunk_size=25)
+
+    if data_format == "Parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(BytesIO(data))
+        assert parquet_file.num_row_groups == 3
+        table = parquet_file.read()
+    else:
+        table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+
+    pd.testing.assert_frame_equal(table.to_pandas(), expand_scenario_frame(compact_df))
+
+
+def test_scenario_export_invalid_format(compact_df):
+    with pytest.raises(ValueError):
+        scenario_export_bytes(compact_df, "xlsx")
+
+
+if __name__ == "__main__":
+    pytest.main()
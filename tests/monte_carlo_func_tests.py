@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    calculate_amortization_schedule,
+    loan_calc,
+)
+from functions.monte_carlo_funcs import (  # noqa: E402
+    PAYMENT_BAND_RESOLUTION,
+    floating_rate_amortization,
+    monte_carlo_loan_costs,
+    simulate_rate_paths,
+)
+
+
+def test_simulate_rate_paths():
+    paths = simulate_rate_paths(2000, 120, 0.05, long_term_rate=0.03, seed=7)
+    assert paths.shape == (2000, 120)
+    assert (paths[:, 0] == 0.05).all()
+    assert paths.min() >= 0
+
+    # Seedable, and the mean reverts towards the long-term rate
+    np.testing.assert_array_equal(
+        paths, simulate_rate_paths(2000, 120, 0.05, long_term_rate=0.03, seed=7)
+    )
+    assert abs(paths[:, -1].mean() - 0.03) < abs(paths[:, 1].mean() - 0.03)
+
+    # Without volatility the path is the deterministic decay towards the long-term rate
+    flat = simulate_rate_paths(1, 13, 0.05, long_term_rate=0.03, mean_reversion=0.5, volatility=0)
+    assert flat[0, 12] == pytest.approx(0.03 + 0.02 * np.exp(-0.5))
+
+
+def test_floating_rate_amortization_constant_rate():
+    payments, interest = floating_rate_amortization(
+        np.array([3000000, 1000000]), np.full((2, 360), 0.05)
+    )
+
+    # A constant rate reproduces the fixed annuity loan
+    np.testing.assert_allclose(payments[0], loan_calc(3000000, 0.05, 360))
+    schedule = calculate_amortization_schedule(1000000, 0.05, 360)
+    np.testing.assert_allclose(interest[1].cumsum().round(0), schedule["Interest"][1:], atol=1)
+    assert (payments.sum(axis=1) - interest.sum(axis=1)) == pytest.approx([3000000, 1000000])
+
+
+def test_monte_carlo_loan_costs():
+    result = monte_carlo_loan_costs(
+        3000000, 240, 0.05, n_paths=3000, seed=3, chunk_size=1000
+    )
+
+    # Reference: the same paths evaluated at once
+    paths = np.concatenate(
+        [
+            simulate_rate_paths(1000, 240, 0.05, seed=seed)
+            for seed in np.random.SeedSequence(3).spawn(3)
+        ]
+    )
+    payments, interest = floating_rate_amortization(3000000, paths)
+    bin_width = PAYMENT_BAND_RESOLUTION * loan_calc(3000000, 0.05, 240)
+
+    np.testing.assert_allclose(
+        result.total_interest, np.percentile(interest.sum(axis=1), result.percentiles)
+    )
+    np.testing.assert_allclose(
+        result.monthly_payment,
+        np.percentile(payments, result.percentiles, axis=0),
+        atol=3 * bin_width,
+    )
+    np.testing.assert_allclose(result.mean_monthly_payment, payments.mean(axis=0))
+    assert list(result.to_frame().columns) == ["Month", "Mean", "P5", "P25", "P50", "P75", "P95"]
+
+    # Worker count does not change the result
+    parallel = monte_carlo_loan_costs(
+        3000000, 240, 0.05, n_paths=3000, seed=3, chunk_size=1000, max_workers=2
+    )
+    np.testing.assert_array_equal(parallel.monthly_payment, result.monthly_payment)
+    np.testing.assert_array_equal(parallel.total_interest, result.total_interest)
+
+    with pytest.raises(ValueError):
+        monte_carlo_loan_costs(3000000, 240, 0.05, chunk_size=0)
+    with pytest.raises(ValueError):
+        monte_carlo_loan_costs(3000000, 240, 0.05, max_workers=0)
+
+
+if __name__ == "__main__":
+    pytest.main()
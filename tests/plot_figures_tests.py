@@ -14,8 +14,14 @@ from functions.plot_funcs import (  # noqa: E402
     create_interest_rate_sensitivity_chart,
     create_cost_breakdown_sunburst,
     create_amortization_chart,
-    create_heatmap_divergent_hover
+    create_amortization_chart_optimized,
+    create_heatmap_divergent_hover,
+    create_heatmap_from_grid,
+    decimate_grid,
+    decimate_line,
+    lttb_indices,
 )
+from functions.calc_funcs import calculate_amortization_schedule  # noqa: E402
 
 @pytest.fixture
 def sample_df():
@@ -34,7 +40,8 @@ def sample_schedule():
         'Month': range(1, 13),
         'Remaining Balance': [10000 - i*100 for i in range(12)],
         'Principal': [100] * 12,
-        'Interest': [50] * 12
+        'Interest': [50] * 12,
+        'Total Paid': [150] * 12
     })
 
 def test_create_interest_rate_sensitivity_chart():
@@ -53,10 +60,26 @@ def test_create_cost_breakdown_sunburst(sample_df):
     assert fig.data[0].type == 'sunburst'
     assert fig.layout.title.text == 'Kostnadsfordeling'
 
+def test_create_cost_breakdown_sunburst_owners(sample_df):
+    # Owner C of three, with electricity split by the given weights
+    fig = create_cost_breakdown_sunburst(
+        sample_df, 'C', [0.5, 0.3, 0.2], [7000, 8000, 9000], {'el_cost': [1, 1, 2]}
+    )
+    values = dict(zip(fig.data[0].labels, fig.data[0].values))
+    assert values['Strøm'] == pytest.approx(sample_df['el_cost'].iloc[0] / 2)
+    assert values['Lånebetaling'] == pytest.approx(sample_df['monthly_loan_payment'].iloc[0] * 0.2)
+    assert values['Andre faste kostnader'] == 9000
+
+    # Owners outside the allocation are rejected with a clear error
+    with pytest.raises(ValueError, match="not one of the owners"):
+        create_cost_breakdown_sunburst(sample_df, 'C')
+    with pytest.raises(ValueError, match="not one of the owners"):
+        create_cost_breakdown_sunburst(sample_df, 'D', [0.5, 0.3, 0.2])
+
 def test_create_amortization_chart(sample_schedule):
     fig = create_amortization_chart(sample_schedule, 'Test Amortization')
     assert isinstance(fig, go.Figure)
-    assert len(fig.data) == 3
+    assert len(fig.data) == 4
     assert all(trace.type == 'scatter' for trace in fig.data)
     assert fig.layout.title.text == 'Test Amortization'
     assert fig.layout.xaxis.title.text == 'Måned'
@@ -76,5 +99,91 @@ def test_create_heatmap_divergent_hover():
     assert fig.layout.xaxis.title.text == 'X Axis'
     assert fig.layout.yaxis.title.text == 'Y Axis'
 
+def test_decimate_grid():
+    z = np.arange(1000 * 800, dtype=float).reshape(1000, 800)
+    x, y = np.arange(800) * 0.01, np.arange(1000) * 10
+
+    z_shown, x_shown, y_shown = decimate_grid(z, x, y, 40000)
+    assert z_shown.size <= 40000 and z_shown.shape == (y_shown.size, x_shown.size)
+    assert (x_shown[0], x_shown[-1], y_shown[0], y_shown[-1]) == (x[0], x[-1], y[0], y[-1])
+
+    # Every displayed cell is the exact value at its displayed axis values
+    rows = np.searchsorted(y, y_shown)
+    columns = np.searchsorted(x, x_shown)
+    np.testing.assert_array_equal(z_shown, z[np.ix_(rows, columns)])
+
+    # Small grids are left alone
+    assert decimate_grid(z[:10, :10], x[:10], y[:10], 40000)[0].shape == (10, 10)
+    with pytest.raises(ValueError):
+        decimate_grid(z, y, x, 40000)
+
+    # Elongated grids keep both ends of the short axis and stay within the budget
+    for shape in [(100000, 2), (3, 100000), (100000, 1)]:
+        z_long = np.ones(shape)
+        x_long, y_long = np.arange(shape[1]), np.arange(shape[0])
+        z_shown, x_shown, y_shown = decimate_grid(z_long, x_long, y_long, 40000)
+        assert z_shown.size <= 40000
+        assert (x_shown[0], x_shown[-1]) == (x_long[0], x_long[-1])
+        assert (y_shown[0], y_shown[-1]) == (y_long[0], y_long[-1])
+    assert decimate_grid(np.ones((100000, 2)), np.arange(2), np.arange(100000), 40000)[0].shape == (
+        20000, 2
+    )
+
+def test_create_heatmap_from_grid():
+    usage, price = np.linspace(100, 5000, 1000), np.linspace(0.1, 10, 1000)
+    z = usage[:, np.newaxis] * price
+
+    fig = create_heatmap_from_grid(z, price, usage, max_cells=10000)
+    assert fig.data[0].type == 'heatmap'
+    assert np.asarray(fig.data[0].z).size <= 10000
+
+    # The color scale covers the full grid
+    assert (fig.data[0].zmin, fig.data[0].zmax) == (z.min(), z.max())
+
+    # The pivoting builder draws the same figure
+    df = pd.DataFrame({'x': np.tile(price, 1000), 'y': np.repeat(usage, 1000), 'z': z.ravel()})
+    pivoted = create_heatmap_divergent_hover(df, 'x', 'y', 'z', max_cells=10000)
+    np.testing.assert_array_equal(pivoted.data[0].z, fig.data[0].z)
+
+def test_lttb_indices():
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[500] = 10  # a spike that a plain stride would miss
+
+    indices = lttb_indices(x, y, 100)
+    assert indices.size == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert (np.diff(indices) > 0).all()
+    assert 500 in indices
+
+    # Short lines are kept whole
+    np.testing.assert_array_equal(lttb_indices(x[:50], y[:50], 100), np.arange(50))
+    with pytest.raises(ValueError):
+        lttb_indices(x, y, 2)
+
+def test_decimated_line_charts():
+    schedule = calculate_amortization_schedule(3000000, 0.05, 480)
+
+    fig = create_amortization_chart(schedule, 'Person A', max_points=100)
+    assert len(fig.data[0].x) <= 100
+    assert fig.data[0].x[-1] == 480 and fig.data[0].y[-1] == schedule['Remaining Balance'].iloc[-1]
+
+    # All traces are drawn at the same months, each at its exact values
+    for trace, column in zip(fig.data, ['Remaining Balance', 'Principal', 'Interest', 'Total Paid']):
+        np.testing.assert_array_equal(trace.x, fig.data[0].x)
+        np.testing.assert_array_equal(trace.y, schedule[column].to_numpy()[np.asarray(trace.x)])
+    optimized = create_amortization_chart_optimized(schedule, 'Person A', max_points=100)
+    assert all(np.array_equal(trace.x, optimized.data[0].x) for trace in optimized.data)
+
+    # Without a limit every month is drawn
+    full = create_amortization_chart(schedule, 'Person A', max_points=None)
+    assert all(len(trace.x) == 481 for trace in full.data)
+
+    fig = create_interest_rate_sensitivity_chart(100000, 360, (0.0, 20.0), max_points=20)
+    assert len(fig.data[0].x) == 20
+
+    x, y = decimate_line(np.arange(10), np.arange(10), None)
+    assert x.size == 10
+
 if __name__ == '__main__':
     pytest.main()
\ No newline at end of file
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    calculate_amortization_schedules_batched,
+    loan_calc,
+    monthly_price_calculator_scenarios_vectorized,
+)
+from functions.prepayment_funcs import (  # noqa: E402
+    PREPAYMENT_MODES,
+    calculate_prepayment_schedules,
+    scenario_prepayment_savings,
+)
+
+
+def reference_payoff(loan, rate, months, extra, lump_sums, mode, serial):
+    # Walk the loan month by month, paying the extra payments on top of the regular one
+    monthly_rate = rate / 12
+    balance = loan
+    interest = 0.0
+    payment = loan_calc(loan, rate, months) if rate > 0 else loan / months
+    for month in range(1, months + 1):
+        month_interest = balance * monthly_rate
+        if mode == "reduce_term":
+            principal = loan / months if serial else payment - month_interest
+        else:
+            remaining = months - month + 1
+            if serial or rate == 0:
+                principal = balance / remaining
+            else:
+                principal = loan_calc(balance, rate, remaining) - month_interest
+        principal = min(principal + extra + lump_sums.get(month, 0), balance)
+        balance -= principal
+        interest += month_interest
+        if balance <= 0.005:
+            return month, interest
+    return months, interest
+
+
+@pytest.mark.parametrize("mode", PREPAYMENT_MODES)
+@pytest.mark.parametrize("loan_type", ["annuity", "serial"])
+def test_calculate_prepayment_schedules(mode, loan_type):
+    loans = np.array([2000000, 3000000])
+    rates = np.array([0.0, 0.05])
+    lump_sums = {12: 100000, 100: 500000}
+    result = calculate_prepayment_schedules(
+        loans[:, np.newaxis], rates, 360, 2000, lump_sums, mode, loan_type
+    )
+    assert result.payments.shape == (2, 2, 360)
+    assert result.schedules.interest.shape == (2, 2, 361)
+
+    for i, loan in enumerate(loans):
+        for j, rate in enumerate(rates):
+            payoff_month, interest = reference_payoff(
+                loan, rate, 360, 2000, lump_sums, mode, loan_type == "serial"
+            )
+            assert result.payoff_month[i, j] == payoff_month
+            assert result.schedules.interest[i, j, -1] == round(interest)
+            assert result.schedules.remaining_balance[i, j, -1] == 0
+
+    # Nothing is paid after the payoff, and the savings are positive with interest
+    after_payoff = np.arange(1, 361) > result.payoff_month[..., np.newaxis]
+    assert (result.payments[after_payoff] == 0).all()
+    assert (result.payments[~after_payoff] > 0).all()
+    assert (result.interest_saved[:, 1] > 0).all()
+    np.testing.assert_allclose(result.interest_saved[:, 0], 0, atol=1e-6)
+
+
+def test_prepayment_without_extra_payments():
+    loans = np.array([[2000000], [3000000]])
+    for mode in PREPAYMENT_MODES:
+        result = calculate_prepayment_schedules(loans, np.array([0.03, 0.05]), 360, mode=mode)
+        expected = calculate_amortization_schedules_batched(loans, np.array([0.03, 0.05]), 360)
+        for field in expected._fields[1:]:
+            np.testing.assert_allclose(
+                getattr(result.schedules, field), getattr(expected, field), atol=1
+            )
+        assert (result.months_saved == 0).all()
+
+    # A reduced payment keeps the term but lowers the payment after the lump sum
+    result = calculate_prepayment_schedules(
+        3000000, 0.05, 360, lump_sums={12: 500000}, mode="reduce_payment"
+    )
+    assert result.payoff_month == 360
+    balance = result.schedules.remaining_balance[12]
+    assert result.payments[12] == pytest.approx(loan_calc(balance, 0.05, 348), rel=1e-6)
+    assert result.payments[12] < result.payments[10]
+
+    with pytest.raises(ValueError):
+        calculate_prepayment_schedules(3000000, 0.05, 360, mode="reduce_both")
+    with pytest.raises(ValueError):
+        calculate_prepayment_schedules(3000000, 0.05, 360, lump_sums={361: 1000})
+
+
+def test_scenario_prepayment_savings():
+    df = monthly_price_calculator_scenarios_vectorized(
+        [3000000, 4000000], [0.03, 0.05], [5000], [500, 1000], [1.5], [0.1], [39],
+        [240, 360], [10000], [10000], [200000], [1500000], [0.5], ["annuity", "serial"],
+        compact=True,
+    )
+    savings = scenario_prepayment_savings(df, extra_monthly=3000, lump_sums={24: 200000})
+    assert len(savings) == len(df)
+    pd.testing.assert_index_equal(savings.index, df.index)
+
+    # Every row matches the single-loan calculation
+    for row in (0, 5, 17, len(df) - 1):
+        scenario = df.iloc[row]
+        result = calculate_prepayment_schedules(
+            scenario["house_price"] - 1300000,
+            scenario["interest_rate"],
+            int(scenario["ammortisation_periods"]),
+            3000,
+            {24: 200000},
+            loan_type=scenario["loan_type"],
+        )
+        assert savings["months_saved"].iloc[row] == result.months_saved
+        assert savings["interest_saved"].iloc[row] == pytest.approx(result.interest_saved)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.annuity_table import annuity_factor_derivatives  # noqa: E402
+from functions.calc_funcs import (  # noqa: E402
+    calculate_amortization_schedule,
+    loan_calc,
+    monthly_price_calculator_scenarios_vectorized,
+)
+from functions.sensitivity_funcs import (  # noqa: E402
+    RATE_STEP,
+    loan_sensitivities,
+    payment_curve,
+    scenario_sensitivities,
+)
+
+
+def test_annuity_factor_derivatives_near_zero():
+    # The series and the closed forms meet without a jump around the switch
+    rates = np.array([0.0, 1e-9, 1e-7, 1.1e-6, 1e-5])
+    d_rate, d2_rate, d_months, d2_months = annuity_factor_derivatives(rates, 360)
+    np.testing.assert_allclose(d_rate, 361 / 720 / 12, rtol=1e-3)
+    np.testing.assert_allclose(d2_rate, (360**2 - 1) / 2160 / 144, rtol=1e-2)
+    np.testing.assert_allclose(d_months, -1 / 360**2, rtol=1e-3)
+    np.testing.assert_allclose(d2_months, 2 / 360**3, rtol=1e-3)
+
+
+@pytest.mark.parametrize("loan_type", ["annuity", "serial"])
+def test_loan_sensitivities_finite_differences(loan_type):
+    loan = np.array([1e6, 4e6])[:, np.newaxis, np.newaxis]
+    rate = np.array([0.0, 0.001, 0.035, 0.08, 0.2])[:, np.newaxis]
+    months = np.array([12, 240, 480])
+    sens = loan_sensitivities(loan, rate, months, loan_type)
+    assert sens.payment.shape == (2, 5, 3)
+
+    def values(loan=loan, rate=rate, months=months):
+        result = loan_sensitivities(loan, rate, months, loan_type)
+        return result.payment, result.total_interest
+
+    # Central differences, the rate stays non-negative
+    h = 1e-4
+    up, down = values(rate=rate + 2 * h), values(rate=rate)
+    mid = values(rate=rate + h)
+    shifted = loan_sensitivities(loan, rate + h, months, loan_type)
+    for value_up, value_mid, value_down, d1, d2 in zip(
+        up, mid, down,
+        (shifted.payment_d_rate, shifted.interest_d_rate),
+        (shifted.payment_d2_rate, shifted.interest_d2_rate),
+    ):
+        np.testing.assert_allclose((value_up - value_down) / (2 * h), d1, rtol=1e-6)
+        np.testing.assert_allclose(
+            (value_up - 2 * value_mid + value_down) / h**2 / loan, d2 / loan, rtol=1e-3, atol=1e-3
+        )
+
+    # Term derivatives on the continuous formulas, with annuity factors outside the table
+    h = 0.25
+    for value_up, value_mid, value_down, d1, d2 in zip(
+        values(months=months + h), values(), values(months=months - h),
+        (sens.payment_d_term, sens.interest_d_term),
+        (sens.payment_d2_term, sens.interest_d2_term),
+    ):
+        np.testing.assert_allclose(
+            (value_up - value_down) / (2 * h) / loan, d1 / loan, rtol=1e-3, atol=1e-9
+        )
+        np.testing.assert_allclose(
+            (value_up - 2 * value_mid + value_down) / h**2 / loan, d2 / loan, rtol=1e-2, atol=1e-9
+        )
+
+    # Payments and interest are linear in the loan
+    np.testing.assert_allclose(sens.payment, loan * sens.payment_d_loan)
+    np.testing.assert_allclose(sens.total_interest, loan * sens.interest_d_loan)
+
+
+@pytest.mark.parametrize("loan_type", ["annuity", "serial"])
+def test_loan_sensitivities_match_loan_calc(loan_type):
+    rates = np.arange(0, 0.2001, 0.0025)
+    sens = loan_sensitivities(2500000, rates, 300, loan_type)
+    np.testing.assert_array_equal(sens.payment, loan_calc(2500000, rates, 300, loan_type))
+
+    # Total interest agrees with the rounded cumulative interest of the schedule
+    schedule = calculate_amortization_schedule(2500000, 0.045, 300, loan_type)
+    single = loan_sensitivities(2500000, 0.045, 300, loan_type)
+    assert float(single.total_interest) == pytest.approx(schedule["Interest"].iloc[-1], abs=0.5)
+
+    # The second-order change per 0.25pp is close to the exact change
+    exact = loan_calc(2500000, rates + RATE_STEP, 300, loan_type) - sens.payment
+    np.testing.assert_allclose(sens.payment_change(), exact, atol=0.05)
+
+
+def test_scenario_sensitivities():
+    df = monthly_price_calculator_scenarios_vectorized(
+        [3000000, 4000000], [0.02, 0.05], [5000], [500], [1.5], [0.1], [39], [240, 360],
+        [10000], [10000], [200000], [1000000], [0.5], ["annuity", "serial"], compact=True,
+    )
+    sens = scenario_sensitivities(df)
+    assert len(sens) == len(df) and (sens.index == df.index).all()
+
+    # The payments are the ones in the scenario frame
+    np.testing.assert_allclose(sens["payment"], df["monthly_loan_payment"])
+    assert (sens["payment_per_step"] > 0).all() and (sens["interest_per_step"] > 0).all()
+
+
+@pytest.mark.parametrize("loan_type", ["annuity", "serial"])
+def test_payment_curve(loan_type):
+    rates = np.arange(0, 0.2001, 0.0025)
+    curve = payment_curve(5000000, np.arange(0, 0.2001, 0.01), 360, rates, loan_type)
+    np.testing.assert_allclose(curve, loan_calc(5000000, rates, 360, loan_type), atol=0.01)
+
+    with pytest.raises(ValueError):
+        payment_curve(5000000, [0.05], 360, rates)
+
+
+if __name__ == "__main__":
+    pytest.main()
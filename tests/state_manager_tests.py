@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+@author: Benedikt Goodman
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from functions.calc_funcs import (  # noqa: E402
+    calculate_amortization_schedule,
+    monthly_price_calculator_scenarios_vectorized,
+)
+from classes.state_manager import (  # noqa: E402
+    SCHEDULE_CACHE_SIZE,
+    LightScenarioState,
+    ScenarioState,
+)
+
+
+def scenario_frame(house_prices, interest_rates, compact=False, loan_types=("annuity",)):
+    return monthly_price_calculator_scenarios_vectorized(
+        house_prices,
+        interest_rates,
+        [5000],
+        [500],
+        [1.5],
+        [0.1],
+        [39],
+        [360],
+        [10000],
+        [10000],
+        [200000],
+        [1500000],
+        [0.5],
+        loan_types,
+        compact=compact,
+    )
+
+
+@pytest.fixture(params=[ScenarioState, LightScenarioState])
+def state_class(request):
+    return request.param
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_select(state_class, compact):
+    interest_rates = np.arange(0.021, 0.05, 0.0025)
+    df = scenario_frame(np.arange(3500000, 5000000, 100000), interest_rates, compact)
+    state = state_class()
+    state.set_results(df)
+
+    np.testing.assert_array_equal(state.house_prices, np.arange(3500000, 5000000, 100000))
+    np.testing.assert_array_equal(state.interest_rates, interest_rates)
+
+    # The lookup matches the mask filter and tolerates rounded rates
+    expected = scenario_frame(np.arange(3500000, 5000000, 100000), interest_rates)
+    expected = expected[(expected["house_price"] == 4200000) & (expected["interest_rate"] == interest_rates[3])]
+    pd.testing.assert_frame_equal(state.select(4200000, round(interest_rates[3], 5)), expected)
+
+    with pytest.raises(KeyError):
+        state.select(6000000, interest_rates[0])
+
+
+def test_select_single_house_price(state_class):
+    # A single house price is stored as a constant in compact frames
+    state = state_class()
+    state.set_results(scenario_frame([4000000], [0.03, 0.04], compact=True))
+    assert list(state.house_prices) == [4000000]
+    assert state.select(4000000, 0.04)["interest_rate"].iloc[0] == 0.04
+
+
+def test_update_reuses_cached_schedules(state_class):
+    state = state_class()
+    state.set_results(scenario_frame([4000000, 4100000], [0.03, 0.04]))
+    state.selected_interest_rate = 0.03
+
+    # With a 50/50 split both persons have the same loan, which is calculated once
+    state.update(state.select(4000000, 0.03), 4000000, 1500000, 360)
+    assert (state.schedule_cache_hits, state.schedule_cache_misses) == (1, 1)
+    pd.testing.assert_frame_equal(
+        state.schedule_a, calculate_amortization_schedule(1250000, 0.03, 360)
+    )
+
+    # A rerun with the same selection does no schedule work
+    schedule_a = state.schedule_a
+    state.update(state.select(4000000, 0.03), 4000000, 1500000, 360)
+    assert (state.schedule_cache_hits, state.schedule_cache_misses) == (3, 1)
+    assert state.schedule_a is schedule_a
+
+
+def test_schedule_cache_is_bounded(state_class):
+    state = state_class()
+    for loan in range(SCHEDULE_CACHE_SIZE + 1):
+        state.schedules([100000 + loan], 0.03, 12)
+
+    # The least recently used schedule has been evicted
+    state.schedules([100000 + SCHEDULE_CACHE_SIZE], 0.03, 12)
+    state.schedules([100000], 0.03, 12)
+    assert state.schedule_cache_hits == 1
+    assert state.schedule_cache_misses == SCHEDULE_CACHE_SIZE + 2
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_update_serial_loan(state_class, compact):
+    state = state_class()
+    state.set_results(scenario_frame([4000000], [0.03, 0.04], compact, ("annuity", "serial")))
+    assert state.loan_types == ("annuity", "serial")
+    state.selected_interest_rate = 0.03
+
+    state.update(state.select(4000000, 0.03, "serial"), 4000000, 1500000, 360)
+    assert state.selected_loan_type == "serial"
+    assert state.monthly_payment == pytest.approx(2700000 / 360 + 2700000 * 0.03 / 12)
+    pd.testing.assert_frame_equal(
+        state.schedule_a, calculate_amortization_schedule(1250000, 0.03, 360, "serial")
+    )
+    assert state.total_interest == pytest.approx(
+        state.schedule_a["Interest"].iloc[-1] * 2, abs=2
+    )
+
+    # Annuity schedules of the same loan are cached separately
+    state.update(state.select(4000000, 0.03, "annuity"), 4000000, 1500000, 360)
+    pd.testing.assert_frame_equal(
+        state.schedule_a, calculate_amortization_schedule(1250000, 0.03, 360)
+    )
+    assert state.schedule_cache_misses == 2
+
+
+def test_light_state_validates_results_once():
+    state = LightScenarioState()
+    with pytest.raises(ValueError):
+        state.set_results(scenario_frame([4000000], [0.03, 1.5]))
+
+    # Zero interest is a valid selection
+    state.set_results(scenario_frame([4000000], [0.0, 0.03]))
+    state.selected_interest_rate = state.interest_rates[0]
+    state.update(state.select(4000000, 0.0), 4000000, 1500000, 360)
+    assert state.monthly_payment == pytest.approx((4000000 - 1500000 + 200000) / 360)
+    assert not hasattr(state, "__dict__")
+
+
+def test_update_with_owners(state_class):
+    state = state_class()
+    state.set_results(scenario_frame([4000000], [0.03]))
+    state.selected_interest_rate = 0.03
+    row = state.select(4000000, 0.03)
+
+    # By default person A and B split by the ownership fraction of the scenario
+    state.update(row, 4000000, 1500000, 360)
+    assert (state.total_cost_a, state.total_cost_b) == (row["a_total"].iloc[0], row["b_total"].iloc[0])
+    np.testing.assert_array_equal(state.total_costs, [state.total_cost_a, state.total_cost_b])
+
+    # Three owners with the house costs split by ownership
+    state.ownership_shares = np.array([0.5, 0.3, 0.2])
+    state.owner_fixed_costs = np.array([10000, 8000, 6000])
+    state.split_rules = {"fixed_cost_house": "ownership"}
+    state.update(row, 4000000, 1500000, 360)
+
+    assert len(state.owner_schedules) == 3
+    np.testing.assert_allclose(state.loan_amounts, [1250000, 750000, 500000])
+    shared = row[["monthly_loan_payment", "el_cost", "fixed_cost_house"]].iloc[0].sum()
+    assert state.total_costs.sum() == pytest.approx(shared + 24000)
+    assert state.total_cost_b == state.total_costs[1]
+    assert state.schedule_a is state.owner_schedules[0]
+    assert state.schedule_a["Remaining Balance"].iloc[0] == 1250000
+
+
+if __name__ == "__main__":
+    pytest.main()